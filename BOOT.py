@@ -1,6 +1,18 @@
+import time
+
+# Start of the imports of the bot, reported with the startup times
+IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import contextvars
+import functools
 import html
+import os
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AbstractContextManager, asynccontextmanager, nullcontext
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, TypeVar
 
 from dopynion.data_model import (
     CardName,
@@ -12,14 +24,82 @@ from dopynion.data_model import (
     PossibleCards,
 )
 from fastapi import Depends, FastAPI, Header, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from pydantic import BaseModel
 
 # Import our strategy modules
-from game_state import GameState, get_game_state
-from strategy import should_buy_estate
-
-app = FastAPI()
+from batching import batcher_from_env
+from bot_logging import bind_game_id, logger, setup_logging
+from buy_policy import END_TURN, active_policy
+from card_priority import card_priority
+from cards import card_index
+from endgame import endgame_from_env
+from fast_path import decision_response, fast_path_enabled, lazy_game
+from game_state import GameState, game_lock, game_state_session, game_states, release_game_state
+from journal import attach_journal_from_env
+from lookahead import lookahead_from_env
+from metrics import MetricsMiddleware, metrics
+from speculation import speculator_from_env
+from strategy import buy_situation, choose_play, update_deck_tracker
+from strategy_helpers import get_our_player_index
+from traffic import TrafficMiddleware, traffic_recorder_from_env
+from warmup import startup_from_env
+
+setup_logging()
+attach_journal_from_env(game_states)
+# Exact search of the last turns, taking over /play when the endgame fits its budget
+endgame = endgame_from_env()
+# Playout search of the /play buys, None to use the buy policy alone
+lookahead = lookahead_from_env()
+# Policy decisions of concurrent games evaluated together, None to evaluate each one alone
+batcher = batcher_from_env(active_policy)
+
+
+def choose_buy(game: Game, game_state: GameState) -> str:
+    decision = endgame.decide(game, game_state) if endgame is not None else None
+    if decision is not None:
+        return decision
+    if lookahead is not None:
+        return lookahead.decide(game, game_state)
+    if batcher is None:
+        return choose_play(game, game_state)
+    situation = buy_situation(game, game_state)
+    return END_TURN if situation is None else batcher.decide(situation)
+
+
+# Decisions of our next turn computed while the other players play theirs
+speculator = speculator_from_env(choose_buy, searching=lookahead is not None)
+
+
+def speculating(game: Game, game_state: GameState) -> bool:
+    """Whether speculated decisions answer this /play, the endgame being left to the solver."""
+    return speculator is not None and (endgame is None or not endgame.in_endgame(game, game_state))
+
+
+def expecting_decision(game: Game, game_state: GameState) -> AbstractContextManager[None]:
+    """Announce a /play to the batcher when its decision will be batched, not searched."""
+    if batcher is None or lookahead is not None or (endgame is not None and endgame.in_endgame(game, game_state)):
+        return nullcontext()
+    return batcher.expecting()
+
+
+# Saved buy tables and a synthetic game played before the first real request
+startup = startup_from_env(time.perf_counter() - IMPORT_STARTED, [active_policy])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await startup.start(app)
+    yield
+    startup.save_tables()
+
+
+app = FastAPI(lifespan=lifespan)
+# Log of the arbiter requests and our answers, for replays, None unless RHUM_TRAFFIC_DIR is set
+traffic_recorder = traffic_recorder_from_env()
+if traffic_recorder is not None:
+    app.add_middleware(TrafficMiddleware, recorder=traffic_recorder)
+app.add_middleware(MetricsMiddleware, excluded_paths=("/metrics", "/ready"))
 
 #####################################################
 # Data model for responses
@@ -41,6 +121,66 @@ class DopynionResponseStr(BaseModel):
     decision: str
 
 
+# Lean serving path: responses encoded directly and /play bodies read without validation
+FAST_PATH = fast_path_enabled()
+PlayRequest = Annotated[Game, Depends(lazy_game)] if FAST_PATH else Game
+
+
+def respond(response_model: type[BaseModel], game_id: str, decision: str | bool) -> BaseModel | Response:
+    """Response of a decision, a prebuilt JSON body on the fast path."""
+    if FAST_PATH:
+        return decision_response(game_id, decision)
+    return response_model(game_id=game_id, decision=decision)
+
+
+#####################################################
+# Request pipeline
+#####################################################
+
+# Handlers are async: the requests of a game take its lock, so they run one at a time and in
+# arrival order, and the /play decisions, like the sessions of a blocking game state store,
+# run on these threads so that the event loop never waits
+STRATEGY_WORKERS_ENV = "RHUM_STRATEGY_WORKERS"
+strategy_workers = os.environ.get(STRATEGY_WORKERS_ENV)
+strategy_executor = ThreadPoolExecutor(
+    max_workers=int(strategy_workers) if strategy_workers else None,
+    thread_name_prefix="strategy",
+)
+
+T = TypeVar("T")
+
+
+async def run_strategy(function: Callable[..., T], *args) -> T:
+    """Run strategy work on the strategy threads, with the context variables of the request."""
+    context = contextvars.copy_context()
+    future = asyncio.get_running_loop().run_in_executor(
+        strategy_executor, functools.partial(context.run, function, *args)
+    )
+    try:
+        return await asyncio.shield(future)
+    finally:
+        # A cancelled request still holds its game lock until the work is over
+        if not future.done():
+            await asyncio.wait([future])
+
+
+def update_game_state(game_id: str, update: Callable[[GameState], T]) -> T:
+    with game_state_session(game_id) as game_state:
+        return update(game_state)
+
+
+async def run_storage(function: Callable[..., T], *args) -> T:
+    """Run work on the game state store, on the strategy threads when the store blocks."""
+    if not game_states.blocking:
+        return function(*args)
+    return await run_strategy(function, *args)
+
+
+async def in_game_state(game_id: str, update: Callable[[GameState], T]) -> T:
+    """Apply an update to the state of a game in a session of the store."""
+    return await run_storage(update_game_state, game_id, update)
+
+
 #####################################################
 # Getter for the game identifier
 #####################################################
@@ -60,7 +200,7 @@ GameIdDependency = Annotated[str, Depends(get_game_id)]
 
 @app.exception_handler(Exception)
 def unknown_exception_handler(_request: Request, exc: Exception) -> JSONResponse:
-    print(exc.__class__.__name__, str(exc))
+    logger.error("%s %s", exc.__class__.__name__, exc)
     return JSONResponse(
         status_code=500,
         content={
@@ -78,45 +218,94 @@ def unknown_exception_handler(_request: Request, exc: Exception) -> JSONResponse
 
 
 @app.get("/name")
-def name() -> str:
+async def name() -> str:
     return "Rhum & Ruin"
 
 
 @app.get("/start_game")
-def start_game(game_id: GameIdDependency) -> DopynionResponseStr:
-    print(f"🚀 GAME STARTED - Game ID: {game_id}")
-    return DopynionResponseStr(game_id=game_id, decision="OK")
+async def start_game(game_id: GameIdDependency) -> DopynionResponseStr:
+    logger.info("🚀 GAME STARTED - Game ID: %s", game_id, extra={"game_id": game_id})
+    return respond(DopynionResponseStr, game_id, "OK")
 
 
 @app.get("/start_turn")
-def start_turn(game_id: GameIdDependency) -> DopynionResponseStr:
-    game_state = get_game_state(game_id)
-    game_state.reset_turn()
-    print(f"▶️ TURN STARTED - Game ID: {game_id}")
-    return DopynionResponseStr(game_id=game_id, decision="OK")
+async def start_turn(game_id: GameIdDependency) -> DopynionResponseStr:
+    async with game_lock(game_id):
+        await in_game_state(game_id, GameState.reset_turn)
+    logger.debug("▶️ TURN STARTED - Game ID: %s", game_id, extra={"game_id": game_id})
+    return respond(DopynionResponseStr, game_id, "OK")
 
 
 @app.post("/play")
-def play(game: Game, game_id: GameIdDependency) -> DopynionResponseStr:
-    game_state = get_game_state(game_id)
-    
-    print(f"\n🎯 RECEIVED PLAY REQUEST - Game ID: {game_id}")
-    print(f"📊 Game state: {len(game.players)} players, finished: {game.finished}")
-    print(f"🏪 Purchase status: {game_state.purchases_remaining_this_turn} purchases remaining this turn")
+async def play(game: PlayRequest, game_id: GameIdDependency) -> DopynionResponseStr:
+    metrics.mark_parsed()
+    bind_game_id(game_id)
+    async with game_lock(game_id):
+        decision = await run_strategy(play_in_game, game, game_id)
+    metrics.count_decision(decision)
+    return respond(DopynionResponseStr, game_id, decision)
+
+
+def play_in_game(game: Game, game_id: str) -> str:
+    """Decide a /play and update the game state, on a strategy thread."""
+    with game_state_session(game_id) as game_state, expecting_decision(game, game_state):
+        tracker = game_state.opponents
+        player_index = get_our_player_index(game, game_state)
+        if player_index is not None:
+            tracker.observe(game, player_index, game_state.turn)
+        decision = decide_play(game, game_state)
+        if decision == END_TURN:
+            tracker.end_turn()
+            if speculating(game, game_state):
+                speculator.schedule(game, game_state)
+        elif (bought := card_index(decision.partition(" ")[2])) is not None:
+            tracker.record_buy(bought)
+    return decision
+
+
+def decide_play(game: Game, game_state: GameState) -> str:
+    logger.debug("🎯 RECEIVED PLAY REQUEST - Game ID: %s", game_state.game_id)
+    logger.debug("📊 Game state: %d players, finished: %s", len(game.players), game.finished)
+    logger.debug(
+        "🏪 Purchase status: %d purchases remaining this turn",
+        game_state.purchases_remaining_this_turn,
+    )
     
-    if should_buy_estate(game, game_state):
+    with metrics.timer("/play strategy"):
+        update_deck_tracker(game, game_state)
+        decision = speculator.lookup(game, game_state) if speculating(game, game_state) else None
+        if decision is None:
+            decision = choose_buy(game, game_state)
+
+    if decision.startswith("BUY"):
         game_state.use_purchase()  # Consume one purchase
-        print(f"🛒 DECISION: BUY ESTATE")
-        return DopynionResponseStr(game_id=game_id, decision="BUY ESTATE")
-    
-    print("⏭️ DECISION: END_TURN")
-    return DopynionResponseStr(game_id=game_id, decision="END_TURN")
+        logger.debug("🛒 DECISION: %s", decision)
+    else:
+        logger.debug("⏭️ DECISION: END_TURN")
+
+    game_state.deck.record_decision(decision)
+    return decision
 
 
 @app.get("/end_game")
-def end_game(game_id: GameIdDependency) -> DopynionResponseStr:
-    print(f"🏁 GAME ENDED - Game ID: {game_id}")
-    return DopynionResponseStr(game_id=game_id, decision="OK")
+async def end_game(game_id: GameIdDependency) -> DopynionResponseStr:
+    async with game_lock(game_id):
+        nb_games = await run_storage(end_game_state, game_id)
+    logger.info(
+        "🏁 GAME ENDED - Game ID: %s (%d games still stored)",
+        game_id,
+        nb_games,
+        extra={"game_id": game_id},
+    )
+    return respond(DopynionResponseStr, game_id, "OK")
+
+
+def end_game_state(game_id: str) -> int:
+    """Forget a finished game, return the number of games still stored."""
+    release_game_state(game_id)
+    if speculator is not None:
+        speculator.forget(game_id)
+    return game_states.size
 
 
 #####################################################
@@ -129,8 +318,18 @@ async def confirm_discard_card_from_hand(
     game_id: GameIdDependency,
     decision_input: CardNameAndHand,
 ) -> DopynionResponseBool:
-    print(f"🗑️ CONFIRM DISCARD - Card: {decision_input.card_name}, Game ID: {game_id}")
-    return DopynionResponseBool(game_id=game_id, decision=True)
+    metrics.mark_parsed()
+    card = card_index(decision_input.card_name)
+    logger.debug(
+        "🗑️ CONFIRM DISCARD - Card: %s, Game ID: %s",
+        decision_input.card_name,
+        game_id,
+        extra={"game_id": game_id},
+    )
+    async with game_lock(game_id):
+        await in_game_state(game_id, lambda game_state: game_state.deck.discard_from_hand(card))
+    metrics.count_decision("CONFIRM_DISCARD")
+    return respond(DopynionResponseBool, game_id, True)
 
 
 @app.post("/discard_card_from_hand")
@@ -138,17 +337,44 @@ async def discard_card_from_hand(
     game_id: GameIdDependency,
     decision_input: Hand,
 ) -> DopynionResponseCardName:
-    card_to_discard = decision_input.hand[0]
-    print(f"🗑️ DISCARD CARD - Discarding: {card_to_discard}, Game ID: {game_id}")
-    return DopynionResponseCardName(game_id=game_id, decision=card_to_discard)
+    metrics.mark_parsed()
+    def discard(game_state: GameState) -> str:
+        game_state.opponents.observe_discard()
+        priority = card_priority(game_state)
+        card_to_discard = priority.pick(decision_input.hand, priority.discard_order)
+        game_state.deck.discard_from_hand(card_index(card_to_discard))
+        return card_to_discard
+
+    async with game_lock(game_id):
+        card_to_discard = await in_game_state(game_id, discard)
+    logger.debug(
+        "🗑️ DISCARD CARD - Discarding: %s, Game ID: %s",
+        card_to_discard,
+        game_id,
+        extra={"game_id": game_id},
+    )
+    metrics.count_decision(f"DISCARD {card_to_discard.upper()}")
+    return respond(DopynionResponseCardName, game_id, card_to_discard)
 
 
 @app.post("/confirm_trash_card_from_hand")
 async def confirm_trash_card_from_hand(
     game_id: GameIdDependency,
-    _decision_input: CardNameAndHand,
+    decision_input: CardNameAndHand,
 ) -> DopynionResponseBool:
-    return DopynionResponseBool(game_id=game_id, decision=True)
+    metrics.mark_parsed()
+    card = card_index(decision_input.card_name)
+    def confirm(game_state: GameState) -> bool:
+        # Cards missing from the catalogue are trashed, as they all were before the card priorities
+        confirmed = card is None or card_priority(game_state).confirm_trash(card, game_state.deck)
+        if confirmed and card is not None:
+            game_state.deck.trash(card)
+        return confirmed
+
+    async with game_lock(game_id):
+        confirmed = await in_game_state(game_id, confirm)
+    metrics.count_decision("CONFIRM_TRASH" if confirmed else "DECLINE_TRASH")
+    return respond(DopynionResponseBool, game_id, confirmed)
 
 
 @app.post("/trash_card_from_hand")
@@ -156,14 +382,27 @@ async def trash_card_from_hand(
     game_id: GameIdDependency,
     decision_input: Hand,
 ) -> DopynionResponseCardName:
-    return DopynionResponseCardName(game_id=game_id, decision=decision_input.hand[0])
+    metrics.mark_parsed()
+    def trash(game_state: GameState) -> str:
+        priority = card_priority(game_state)
+        card_to_trash = priority.pick(decision_input.hand, priority.trash_order)
+        game_state.deck.trash(card_index(card_to_trash))
+        return card_to_trash
+
+    async with game_lock(game_id):
+        card_to_trash = await in_game_state(game_id, trash)
+    metrics.count_decision(f"TRASH {card_to_trash.upper()}")
+    return respond(DopynionResponseCardName, game_id, card_to_trash)
 
 
 @app.post("/confirm_discard_deck")
 async def confirm_discard_deck(
     game_id: GameIdDependency,
 ) -> DopynionResponseBool:
-    return DopynionResponseBool(game_id=game_id, decision=True)
+    async with game_lock(game_id):
+        await in_game_state(game_id, lambda game_state: game_state.deck.discard_draw_pile())
+    metrics.count_decision("CONFIRM_DISCARD_DECK")
+    return respond(DopynionResponseBool, game_id, True)
 
 
 @app.post("/choose_card_to_receive_in_discard")
@@ -171,10 +410,17 @@ async def choose_card_to_receive_in_discard(
     game_id: GameIdDependency,
     decision_input: PossibleCards,
 ) -> DopynionResponseCardName:
-    return DopynionResponseCardName(
-        game_id=game_id,
-        decision=decision_input.possible_cards[0],
-    )
+    metrics.mark_parsed()
+    def receive(game_state: GameState) -> str:
+        priority = card_priority(game_state)
+        card_to_receive = priority.pick(decision_input.possible_cards, priority.gain_order)
+        game_state.deck.gain(card_index(card_to_receive))
+        return card_to_receive
+
+    async with game_lock(game_id):
+        card_to_receive = await in_game_state(game_id, receive)
+    metrics.count_decision(f"RECEIVE_IN_DISCARD {card_to_receive.upper()}")
+    return respond(DopynionResponseCardName, game_id, card_to_receive)
 
 
 @app.post("/choose_card_to_receive_in_deck")
@@ -182,18 +428,31 @@ async def choose_card_to_receive_in_deck(
     game_id: GameIdDependency,
     decision_input: PossibleCards,
 ) -> DopynionResponseCardName:
-    return DopynionResponseCardName(
-        game_id=game_id,
-        decision=decision_input.possible_cards[0],
-    )
+    metrics.mark_parsed()
+    def receive(game_state: GameState) -> str:
+        priority = card_priority(game_state)
+        card_to_receive = priority.pick(decision_input.possible_cards, priority.gain_order)
+        game_state.deck.gain(card_index(card_to_receive), "deck")
+        return card_to_receive
+
+    async with game_lock(game_id):
+        card_to_receive = await in_game_state(game_id, receive)
+    metrics.count_decision(f"RECEIVE_IN_DECK {card_to_receive.upper()}")
+    return respond(DopynionResponseCardName, game_id, card_to_receive)
 
 
 @app.post("/skip_card_reception_in_hand")
 async def skip_card_reception_in_hand(
     game_id: GameIdDependency,
-    _decision_input: CardNameAndHand,
+    decision_input: CardNameAndHand,
 ) -> DopynionResponseBool:
-    return DopynionResponseBool(game_id=game_id, decision=True)
+    metrics.mark_parsed()
+    # The skipped card is set aside, then discarded
+    card = card_index(decision_input.card_name)
+    async with game_lock(game_id):
+        await in_game_state(game_id, lambda game_state: game_state.deck.discard_from_draw_pile(card))
+    metrics.count_decision("SKIP_RECEPTION")
+    return respond(DopynionResponseBool, game_id, True)
 
 
 @app.post("/trash_money_card_for_better_money_card")
@@ -201,7 +460,33 @@ async def trash_money_card_for_better_money_card(
     game_id: GameIdDependency,
     decision_input: MoneyCardsInHand,
 ) -> DopynionResponseCardName:
-    return DopynionResponseCardName(
-        game_id=game_id,
-        decision=decision_input.money_in_hand[0],
-    )
+    metrics.mark_parsed()
+    def trash(game_state: GameState) -> str:
+        priority = card_priority(game_state)
+        card_to_trash = priority.pick(decision_input.money_in_hand, priority.upgrade_order)
+        game_state.deck.trash(card_index(card_to_trash))
+        return card_to_trash
+
+    async with game_lock(game_id):
+        card_to_trash = await in_game_state(game_id, trash)
+    metrics.count_decision(f"TRASH_FOR_BETTER {card_to_trash.upper()}")
+    return respond(DopynionResponseCardName, game_id, card_to_trash)
+
+
+#####################################################
+# API Routes - Monitoring
+#####################################################
+
+
+@app.get("/metrics")
+async def get_metrics() -> dict:
+    snapshot = metrics.snapshot()
+    snapshot["games_stored"] = game_states.size
+    snapshot["startup"] = startup.summary()
+    return snapshot
+
+
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    """Readiness probe, 503 until the warm-up is over, with the startup times."""
+    return JSONResponse(startup.summary(), status_code=200 if startup.ready else 503)
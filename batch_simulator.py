@@ -0,0 +1,428 @@
+"""
+Vectorized batch simulator for Rhum & Ruin bot.
+Plays many games at once as NumPy arrays, one row per game: supply counts,
+and draw pile, hand and discard counts per player. Every step plays one
+player's turn in all the games of the batch, so buy policy sweeps run over
+millions of games instead of thousands.
+
+Only the treasure and victory cards and the simple +cards/+actions/+buys/
++money actions are covered, with the end conditions of simulator.Simulation.
+Draws pick a uniformly random card of the draw pile counts, which deals the
+same hands as drawing from a shuffled pile.
+"""
+
+import argparse
+import time
+
+import numpy as np
+from dopynion.data_model import CardName
+
+from buy_policy import (
+    MAX_BUYS,
+    MAX_COPPERS,
+    MAX_EMPTY_PILES,
+    MAX_MONEY,
+    MAX_PROVINCES_LEFT,
+    NB_TURN_BUCKETS,
+    POLICIES,
+    TURN_BUCKET_SIZE,
+    BuyPolicy,
+    BuyRule,
+)
+from cards import (
+    CARD_INDEX,
+    CARD_NAMES,
+    CARDS,
+    COLONY,
+    COPPER,
+    CURSE,
+    DUCHY,
+    ESTATE,
+    GOLD,
+    PLATINUM,
+    PROVINCE,
+    SILVER,
+)
+from simulator import HAND_SIZE, KINGDOM_PILE_SIZE, MAX_NB_PLAYERS, MAX_TURNS
+
+# Kingdom of every batch, in play order: non-terminal actions before terminal ones
+BATCH_ACTIONS: tuple[int, ...] = tuple(CARD_INDEX[name] for name in (
+    CardName.LABORATORY,
+    CardName.MARKET,
+    CardName.VILLAGE,
+    CardName.FESTIVAL,
+    CardName.SMITHY,
+    CardName.WOODCUTTER,
+))
+BATCH_CARDS: tuple[int, ...] = (
+    COPPER, SILVER, GOLD, PLATINUM, ESTATE, DUCHY, PROVINCE, COLONY, CURSE,
+) + BATCH_ACTIONS
+# Column of a catalogue card in the batch arrays
+COLUMN: dict[int, int] = {card: column for column, card in enumerate(BATCH_CARDS)}
+NB_COLUMNS = len(BATCH_CARDS)
+FIRST_ACTION_COLUMN = COLUMN[BATCH_ACTIONS[0]]
+
+# Games simulated together, bounding the memory of a run
+BATCH_SIZE = 100_000
+# Loop guards, far above what the covered cards allow in practice
+MAX_ACTIONS_PER_TURN = 30
+MAX_BUYS_PER_TURN = 10
+
+COUNT = np.int16
+_COST = np.array([CARDS[card].cost for card in BATCH_CARDS])
+_MONEY = np.array([CARDS[card].money for card in BATCH_CARDS])
+_VICTORY_POINTS = np.array([CARDS[card].victory_points for card in BATCH_CARDS])
+_PLUS_CARDS = np.array([CARDS[card].plus_cards for card in BATCH_CARDS])
+_PLUS_ACTIONS = np.array([CARDS[card].plus_actions for card in BATCH_CARDS])
+_PLUS_BUYS = np.array([CARDS[card].plus_buys for card in BATCH_CARDS])
+_PLUS_MONEY = np.array([CARDS[card].plus_money for card in BATCH_CARDS])
+
+
+class BatchPlayers:
+    """Card counts of one seat in every game of a batch."""
+
+    __slots__ = ("draw_pile", "hand", "discard", "owned")
+
+    def __init__(self, nb_games: int):
+        self.owned = np.zeros((nb_games, NB_COLUMNS), dtype=COUNT)
+        self.owned[:, COLUMN[COPPER]] = 7
+        self.owned[:, COLUMN[ESTATE]] = 3
+        self.draw_pile = self.owned.copy()
+        self.hand = np.zeros_like(self.owned)
+        self.discard = np.zeros_like(self.owned)
+
+    def keep(self, rows: np.ndarray) -> None:
+        self.draw_pile = self.draw_pile[rows]
+        self.hand = self.hand[rows]
+        self.discard = self.discard[rows]
+        self.owned = self.owned[rows]
+
+    def scores(self) -> np.ndarray:
+        return self.owned @ _VICTORY_POINTS
+
+
+class BatchResult:
+    """Scores and lengths of the games of a batch, one row per game."""
+
+    def __init__(self, names: list[str], scores: np.ndarray, turns: np.ndarray):
+        self.names = names
+        self.scores = scores
+        self.turns = turns
+
+    @property
+    def nb_games(self) -> int:
+        return len(self.turns)
+
+    @property
+    def winners(self) -> np.ndarray:
+        """Whether each player shares the best score of each game."""
+        return self.scores == self.scores.max(axis=1, keepdims=True)
+
+    def win_rates(self) -> np.ndarray:
+        return self.winners.mean(axis=0)
+
+    def average_scores(self) -> np.ndarray:
+        return self.scores.mean(axis=0)
+
+    @classmethod
+    def concatenate(cls, results: list["BatchResult"]) -> "BatchResult":
+        return cls(
+            results[0].names,
+            np.concatenate([result.scores for result in results]),
+            np.concatenate([result.turns for result in results]),
+        )
+
+    def __repr__(self) -> str:
+        return f"BatchResult(games={self.nb_games}, win_rates={dict(zip(self.names, self.win_rates()))})"
+
+
+class BatchSimulation:
+    """Many games between the same buy policies, played in lockstep."""
+
+    def __init__(
+        self,
+        policies: list[BuyPolicy],
+        nb_games: int,
+        seed: int | np.random.SeedSequence | None = None,
+        max_turns: int = MAX_TURNS,
+    ):
+        if not 2 <= len(policies) <= MAX_NB_PLAYERS:
+            raise ValueError(f"A game needs 2 to {MAX_NB_PLAYERS} players, got {len(policies)}")
+        for policy in policies:
+            for rule in policy.rules:
+                if rule.card not in COLUMN:
+                    raise ValueError(f"{CARD_NAMES[rule.card].value} is not simulated in batches ({policy.name})")
+        self.policies = policies
+        self.rng = np.random.default_rng(seed)
+        self.max_turns = max_turns
+        self.turn = 0
+        nb_players = len(policies)
+        self.supply = np.zeros((nb_games, NB_COLUMNS), dtype=COUNT)
+        self._setup_supply(nb_players)
+        self.players = [BatchPlayers(nb_games) for _ in range(nb_players)]
+        # Original position of each remaining row, finished games being dropped
+        self.game_ids = np.arange(nb_games)
+        self.scores = np.zeros((nb_games, nb_players), dtype=np.int32)
+        self.turns = np.zeros(nb_games, dtype=np.int32)
+        for player in self.players:
+            self.draw(player, np.arange(nb_games), HAND_SIZE)
+
+    def _setup_supply(self, nb_players: int) -> None:
+        victory_quantity = 8 if nb_players <= 2 else 12
+        quantities = {
+            COPPER: 60 - 7 * nb_players,
+            SILVER: 40,
+            GOLD: 30,
+            PLATINUM: 10,
+            ESTATE: victory_quantity,
+            DUCHY: victory_quantity,
+            PROVINCE: victory_quantity,
+            COLONY: victory_quantity,
+            CURSE: 10 * (nb_players - 1),
+        }
+        for card in BATCH_ACTIONS:
+            quantities[card] = KINGDOM_PILE_SIZE
+        for card, quantity in quantities.items():
+            self.supply[:, COLUMN[card]] = quantity
+
+    @property
+    def nb_live_games(self) -> int:
+        return len(self.game_ids)
+
+    # Card movements
+
+    def draw_one(self, player: BatchPlayers, rows: np.ndarray) -> None:
+        """Draw one card in each game of rows, shuffling the discard in when needed."""
+        draw_pile = player.draw_pile
+        cumulative = draw_pile[rows].cumsum(axis=1, dtype=COUNT)
+        empty = cumulative[:, -1] == 0
+        if empty.any():
+            empty_rows = rows[empty]
+            draw_pile[empty_rows] += player.discard[empty_rows]
+            player.discard[empty_rows] = 0
+            cumulative[empty] = draw_pile[empty_rows].cumsum(axis=1, dtype=COUNT)
+        sizes = cumulative[:, -1]
+        positions = (self.rng.random(len(rows)) * sizes).astype(cumulative.dtype)
+        columns = (cumulative > positions[:, None]).argmax(axis=1)
+        has_cards = sizes > 0
+        rows, columns = rows[has_cards], columns[has_cards]
+        draw_pile[rows, columns] -= 1
+        player.hand[rows, columns] += 1
+
+    def draw(self, player: BatchPlayers, rows: np.ndarray, nb_cards: int) -> None:
+        for _ in range(nb_cards):
+            self.draw_one(player, rows)
+
+    # Turn phases
+
+    def play_turn(self, seat: int) -> None:
+        """Play the turn of one seat in every live game."""
+        player = self.players[seat]
+        nb_games = self.nb_live_games
+        hand = player.hand
+        in_play = np.zeros_like(hand)
+        actions = np.ones(nb_games, dtype=np.int32)
+        buys = np.ones(nb_games, dtype=np.int32)
+        money = np.zeros(nb_games, dtype=np.int32)
+
+        for _ in range(MAX_ACTIONS_PER_TURN):
+            playable = hand[:, FIRST_ACTION_COLUMN:] > 0
+            rows = np.flatnonzero((actions > 0) & playable.any(axis=1))
+            if not len(rows):
+                break
+            columns = FIRST_ACTION_COLUMN + playable[rows].argmax(axis=1)
+            hand[rows, columns] -= 1
+            in_play[rows, columns] += 1
+            actions[rows] += _PLUS_ACTIONS[columns] - 1
+            buys[rows] += _PLUS_BUYS[columns]
+            money[rows] += _PLUS_MONEY[columns]
+            plus_cards = _PLUS_CARDS[columns]
+            for nb_drawn_cards in range(plus_cards.max()):
+                self.draw_one(player, rows[plus_cards > nb_drawn_cards])
+
+        money += hand @ _MONEY
+        self.buy(seat, money, hand[:, COLUMN[COPPER]], buys)
+
+        player.discard += hand + in_play
+        hand[:] = 0
+        self.draw(player, np.arange(nb_games), HAND_SIZE)
+
+    def buy(self, seat: int, money: np.ndarray, coppers: np.ndarray, buys: np.ndarray) -> None:
+        """Buy what the seat's policy decides until it ends the turn or runs out of buys."""
+        player = self.players[seat]
+        rules = [rule for rule in self.policies[seat].rules if rule.matches_turn(self._turn_bucket_start())]
+        rows = np.arange(self.nb_live_games)
+        for _ in range(MAX_BUYS_PER_TURN):
+            rows = rows[buys[rows] > 0]
+            if not len(rows):
+                return
+            columns = self.decide(rules, rows, money[rows], coppers[rows], buys[rows])
+            bought = columns >= 0
+            rows, columns = rows[bought], columns[bought]
+            self.supply[rows, columns] -= 1
+            player.discard[rows, columns] += 1
+            player.owned[rows, columns] += 1
+            money[rows] -= _COST[columns]
+            buys[rows] -= 1
+
+    def _turn_bucket_start(self) -> int:
+        # Turns are counted from 1 as in GameState, and rules compared with their bucket start
+        turn_bucket = min((self.turn + 1) // TURN_BUCKET_SIZE, NB_TURN_BUCKETS - 1)
+        return turn_bucket * TURN_BUCKET_SIZE
+
+    def decide(
+        self,
+        rules: list[BuyRule],
+        rows: np.ndarray,
+        money: np.ndarray,
+        coppers: np.ndarray,
+        buys: np.ndarray,
+    ) -> np.ndarray:
+        """Column bought in each game of rows, -1 to end the turn, as BuyPolicy.decide would."""
+        supply = self.supply[rows]
+        money = np.minimum(money, MAX_MONEY)
+        coppers = np.minimum(coppers, MAX_COPPERS)
+        buys = np.minimum(buys, MAX_BUYS)
+        provinces_left = np.minimum(supply[:, COLUMN[PROVINCE]], MAX_PROVINCES_LEFT)
+        empty_piles = np.minimum((supply == 0).sum(axis=1), MAX_EMPTY_PILES)
+        choices = np.full(len(rows), -1)
+        for rule in rules:
+            column = COLUMN[rule.card]
+            matches = (
+                (choices < 0)
+                & (supply[:, column] > 0)
+                & (money >= rule.min_money)
+                & (coppers >= rule.min_coppers)
+                & (buys >= rule.min_buys)
+                & (provinces_left >= rule.min_provinces_left)
+                & (empty_piles >= rule.min_empty_piles)
+            )
+            if rule.max_money is not None:
+                matches &= money <= rule.max_money
+            if rule.max_provinces_left is not None:
+                matches &= provinces_left <= rule.max_provinces_left
+            if rule.max_empty_piles is not None:
+                matches &= empty_piles <= rule.max_empty_piles
+            choices[matches] = column
+        return choices
+
+    # Game ends
+
+    def finished(self) -> np.ndarray:
+        supply = self.supply
+        return (supply[:, COLUMN[PROVINCE]] == 0) | ((supply == 0).sum(axis=1) >= 3)
+
+    def retire(self, finished: np.ndarray) -> None:
+        """Record the results of the finished games and drop them from the batch."""
+        if not finished.any():
+            return
+        game_ids = self.game_ids[finished]
+        for seat, player in enumerate(self.players):
+            self.scores[game_ids, seat] = player.scores()[finished]
+        # The current turn ends the game, and counts as played
+        self.turns[game_ids] = self.turn + 1
+        keep = ~finished
+        self.game_ids = self.game_ids[keep]
+        self.supply = self.supply[keep]
+        for player in self.players:
+            player.keep(keep)
+
+    def run(self) -> BatchResult:
+        """Play every game of the batch to the end."""
+        while self.nb_live_games:
+            for seat in range(len(self.players)):
+                self.play_turn(seat)
+                self.retire(self.finished())
+                if not self.nb_live_games:
+                    break
+            else:
+                if self.turn + 1 >= self.max_turns:
+                    self.retire(np.ones(self.nb_live_games, dtype=bool))
+                self.turn += 1
+        return BatchResult([policy.name for policy in self.policies], self.scores, self.turns)
+
+
+#####################################################
+# Sweeps
+#####################################################
+
+
+def run_batches(
+    policies: list[BuyPolicy],
+    nb_games: int,
+    seed: int = 0,
+    batch_size: int = BATCH_SIZE,
+) -> BatchResult:
+    """Play nb_games games between the policies, batch_size of them at a time."""
+    nb_batches = max(1, -(-nb_games // batch_size))
+    seeds = np.random.SeedSequence(seed).spawn(nb_batches)
+    results = []
+    for batch_number, batch_seed in enumerate(seeds):
+        size = min(batch_size, nb_games - batch_number * batch_size)
+        results.append(BatchSimulation(policies, size, batch_seed).run())
+    return BatchResult.concatenate(results)
+
+
+def head_to_head(policy: BuyPolicy, opponent: BuyPolicy, nb_games: int, seed: int = 0) -> tuple[float, float]:
+    """Win rate and average score of a policy against another, each seat half of the games."""
+    first = run_batches([policy, opponent], nb_games // 2, seed)
+    second = run_batches([opponent, policy], nb_games - nb_games // 2, seed + 1)
+    wins = first.winners[:, 0].sum() + second.winners[:, 1].sum()
+    score = first.scores[:, 0].sum() + second.scores[:, 1].sum()
+    return float(wins / nb_games), float(score / nb_games)
+
+
+def estate_copper_policies(min_coppers: list[int]) -> list[BuyPolicy]:
+    """Variants of RHUM_AND_RUIN_POLICY, buying an Estate with at least the given Copper in hand."""
+    return [
+        BuyPolicy(f"Estate with {coppers}+ Copper", [BuyRule("estate", min_coppers=coppers)])
+        for coppers in min_coppers
+    ]
+
+
+#####################################################
+# Command line
+#####################################################
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate Dopynion games in vectorized batches")
+    parser.add_argument("players", nargs="*", help=f"buy policies among {sorted(POLICIES)}")
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--estate-coppers", type=int, nargs="+", default=None, choices=range(MAX_COPPERS + 1),
+        help="sweep the Copper in hand needed by our Estate rule (min_coppers) against --opponent",
+    )
+    parser.add_argument("--opponent", default="big_money", help="opponent policy of a sweep")
+    args = parser.parse_args()
+    players = args.players or ["rhum_and_ruin", "big_money"]
+    for policy_name in players + [args.opponent]:
+        if policy_name not in POLICIES:
+            parser.error(f"unknown buy policy {policy_name!r}")
+
+    start = time.perf_counter()
+    if args.estate_coppers:
+        opponent = POLICIES[args.opponent]
+        lines = []
+        for policy in estate_copper_policies(args.estate_coppers):
+            win_rate, average_score = head_to_head(policy, opponent, args.games, args.seed)
+            lines.append(f"   - {policy.name}: {win_rate:.1%} wins, average score {average_score:.1f}")
+        nb_games = args.games * len(args.estate_coppers)
+    else:
+        result = run_batches([POLICIES[name] for name in players], args.games, args.seed)
+        lines = [
+            f"   - {name} #{position}: {win_rate:.1%} wins, average score {average_score:.1f}"
+            for position, (name, win_rate, average_score) in enumerate(
+                zip(players, result.win_rates(), result.average_scores())
+            )
+        ]
+        nb_games = args.games
+    elapsed = time.perf_counter() - start
+
+    print(f"🎲 {nb_games} games in {elapsed:.2f}s ({nb_games / elapsed:.0f} games/s)")
+    print("\n".join(lines))
+
+
+if __name__ == "__main__":
+    main()
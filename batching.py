@@ -0,0 +1,163 @@
+"""
+Cross-game micro-batching for Rhum & Ruin bot.
+With RHUM_BATCHING=on, the /play buy decisions of different games are
+evaluated together: the first decision to arrive leads a batch, waits a
+short window for the /play requests already being handled on the other
+strategy threads, then evaluates the whole batch in one pass and hands each
+request its decision. The window adapts to the traffic: the leader only
+waits while other /play requests are on their way to a decision, so a lone
+request is never delayed, and stops as soon as they have all joined.
+
+The default evaluator looks the batch up in the buy policy tables with the
+cell indices computed as NumPy arrays, falling back to one lookup per
+decision without NumPy. Heavier evaluators (value model, rollouts) plug in
+the same way and gain the most from it. Batches are at most the number of
+strategy threads (RHUM_STRATEGY_WORKERS) wide.
+"""
+
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from buy_policy import END_TURN, BuyPolicy, cell_indices
+from cards import PROVINCE
+from metrics import metrics
+from strategy import BuySituation
+
+try:
+    import numpy as np
+except ImportError:  # Optional, decisions are then looked up one by one
+    np = None
+
+BATCHING_ENV = "RHUM_BATCHING"
+BATCH_WINDOW_ENV = "RHUM_BATCH_WINDOW_MS"
+BATCH_SIZE_ENV = "RHUM_BATCH_SIZE"
+DEFAULT_WINDOW_SECONDS = 0.002
+DEFAULT_MAX_BATCH = 64
+
+Evaluate = Callable[[list[BuySituation]], list[str]]
+
+
+def policy_evaluator(policy: BuyPolicy) -> Evaluate:
+    """Batch evaluation of the buy policy, one vectorized pass over the situations."""
+
+    def evaluate(situations: list[BuySituation]) -> list[str]:
+        tables = [policy.table_for(stock) for stock, *_ in situations]
+        if np is None:
+            return [
+                table.lookup(money, coppers, buys, stock[PROVINCE], empty_piles, turn)
+                for table, (stock, money, coppers, buys, empty_piles, turn) in zip(tables, situations)
+            ]
+        features = np.array(
+            [
+                (money, coppers, buys, stock[PROVINCE], empty_piles, turn)
+                for stock, money, coppers, buys, empty_piles, turn in situations
+            ],
+            dtype=np.int64,
+        )
+        cells = cell_indices(*features.T)
+        buys = features[:, 2]
+        return [
+            table.decisions[cell] if can_buy else END_TURN
+            for table, cell, can_buy in zip(tables, cells.tolist(), (buys > 0).tolist())
+        ]
+
+    return evaluate
+
+
+class BatchedDecision:
+    """One decision waiting in a batch."""
+
+    __slots__ = ("situation", "decision", "error")
+
+    def __init__(self, situation: BuySituation):
+        self.situation = situation
+        self.decision: str | None = None
+        self.error: BaseException | None = None
+
+
+class DecisionBatcher:
+    """Groups the buy decisions of concurrent /play requests into batches."""
+
+    def __init__(
+        self,
+        evaluate: Evaluate,
+        window: float = DEFAULT_WINDOW_SECONDS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+    ):
+        self.evaluate = evaluate
+        self.window = window
+        self.max_batch = max_batch
+        # /play requests being handled that have not asked for their decision yet
+        self._expected = 0
+        self._batch: list[BatchedDecision] = []
+        self._condition = threading.Condition()
+        self._local = threading.local()
+
+    @contextmanager
+    def expecting(self) -> Iterator[None]:
+        """Announce a /play request that may ask for a decision, for the leader of the batch to wait for it."""
+        with self._condition:
+            self._expected += 1
+        self._local.expected = True
+        try:
+            yield
+        finally:
+            if self._local.expected:
+                self._local.expected = False
+                with self._condition:
+                    self._expected -= 1
+                    self._condition.notify_all()
+
+    def decide(self, situation: BuySituation) -> str:
+        """Decision of a situation, evaluated with those of the other games arriving meanwhile."""
+        entry = BatchedDecision(situation)
+        with self._condition:
+            if getattr(self._local, "expected", False):
+                self._local.expected = False
+                self._expected -= 1
+            self._batch.append(entry)
+            if len(self._batch) > 1:
+                # The leader evaluates the batch
+                self._condition.notify_all()
+                while entry.decision is None and entry.error is None:
+                    self._condition.wait()
+                if entry.error is not None:
+                    raise entry.error
+                return entry.decision
+            start = time.perf_counter()
+            deadline = start + self.window
+            while self._expected > 0 and len(self._batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch, self._batch = self._batch, []
+        metrics.observe_phase("/play batch window", time.perf_counter() - start)
+        metrics.count(f"batch of {len(batch)}")
+        try:
+            decisions = self.evaluate([waiting.situation for waiting in batch])
+        except Exception as error:
+            with self._condition:
+                for waiting in batch:
+                    waiting.error = error
+                self._condition.notify_all()
+            raise
+        with self._condition:
+            for waiting, decision in zip(batch, decisions):
+                waiting.decision = decision
+            self._condition.notify_all()
+        return entry.decision
+
+
+def batcher_from_env(policy: BuyPolicy) -> DecisionBatcher | None:
+    """Batcher of the /play policy decisions, None unless RHUM_BATCHING=on."""
+    if os.environ.get(BATCHING_ENV, "off") != "on":
+        return None
+    return DecisionBatcher(
+        policy_evaluator(policy),
+        window=float(os.environ.get(BATCH_WINDOW_ENV, 1000 * DEFAULT_WINDOW_SECONDS)) / 1000,
+        max_batch=int(os.environ.get(BATCH_SIZE_ENV, DEFAULT_MAX_BATCH)),
+    )
@@ -0,0 +1,108 @@
+"""
+Logging for Rhum & Ruin bot.
+Level-gated logger with lazy %-style formatting and a queue-backed background
+writer, so that the /play hot path pays close to nothing in production.
+Verbose tracing stays available for chosen game ids.
+
+Configuration through the environment:
+- RHUM_LOG_LEVEL: base level (DEBUG, INFO, WARNING...), INFO by default
+- RHUM_TRACE_GAMES: comma-separated game ids logged at DEBUG level
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from contextvars import ContextVar
+from typing import TextIO
+
+LOG_LEVEL_ENV = "RHUM_LOG_LEVEL"
+TRACE_GAMES_ENV = "RHUM_TRACE_GAMES"
+DEFAULT_LOG_LEVEL = "INFO"
+LOG_FORMAT = "%(asctime)s %(levelname)s %(message)s"
+
+logger = logging.getLogger("rhum_ruin")
+logger.propagate = False
+
+# Game being handled by the current request, for records logged without a game id
+current_game_id: ContextVar[str | None] = ContextVar("current_game_id", default=None)
+
+_base_level = logging.INFO
+_traced_games: set[str] = set()
+_listener: logging.handlers.QueueListener | None = None
+
+
+class GameTraceFilter(logging.Filter):
+    """Let records below the base level through only for traced games."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= _base_level:
+            return True
+        game_id = getattr(record, "game_id", None) or current_game_id.get()
+        return game_id in _traced_games
+
+
+def _update_logger_level() -> None:
+    # Below the base level only when some game is traced, so that in production
+    # logger.debug() returns before building any record
+    logger.setLevel(logging.DEBUG if _traced_games else _base_level)
+
+
+def set_level(level: int | str) -> None:
+    """Change the base logging level."""
+    global _base_level
+    if isinstance(level, str):
+        level = logging.getLevelNamesMapping().get(level.upper(), logging.INFO)
+    _base_level = level
+    _update_logger_level()
+
+
+def trace_game(game_id: str) -> None:
+    """Log everything about one game, whatever the base level."""
+    _traced_games.add(game_id)
+    _update_logger_level()
+
+
+def untrace_game(game_id: str) -> None:
+    """Stop the verbose tracing of a game."""
+    _traced_games.discard(game_id)
+    _update_logger_level()
+
+
+def bind_game_id(game_id: str) -> None:
+    """Attach a game id to the records logged by the current request."""
+    current_game_id.set(game_id)
+
+
+def setup_logging(stream: TextIO | None = None) -> None:
+    """Start the background writer, records are then only queued by the caller."""
+    global _listener
+    if _listener is not None:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = logging.handlers.QueueListener(log_queue, handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush the queued records and stop the background writer."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            logger.removeHandler(handler)
+    _listener = None
+
+
+logger.addFilter(GameTraceFilter())
+set_level(os.environ.get(LOG_LEVEL_ENV, DEFAULT_LOG_LEVEL))
+for _game_id in filter(None, os.environ.get(TRACE_GAMES_ENV, "").split(",")):
+    trace_game(_game_id.strip())
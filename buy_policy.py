@@ -0,0 +1,290 @@
+"""
+Buy policies for Rhum & Ruin bot.
+A policy is an ordered list of declarative buy rules, compiled into a dense
+lookup table over (money, Copper in hand, buys left, Provinces left, empty
+piles, turn bucket) for a given set of available cards. Deciding a buy on
+/play is then one table index, whatever the number of rules.
+
+Compiled tables can be saved to a JSON file and loaded back on the next
+start, each policy keyed by a fingerprint of its rules and of the table
+dimensions so that a changed policy is compiled again.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from cards import CARD_NAMES, COST, PROVINCE, card_index
+
+try:
+    import numpy as np
+except ImportError:  # Optional, only cell_indices needs it
+    np = None
+
+END_TURN = "END_TURN"
+
+# Table dimensions, features above the last value share its cells
+MAX_MONEY = 15
+MAX_COPPERS = 5
+MAX_BUYS = 2
+MAX_PROVINCES_LEFT = 12
+MAX_EMPTY_PILES = 2
+TURN_BUCKET_SIZE = 5
+NB_TURN_BUCKETS = 8
+TABLE_SIZE = (
+    (MAX_MONEY + 1) * (MAX_COPPERS + 1) * MAX_BUYS * (MAX_PROVINCES_LEFT + 1) * (MAX_EMPTY_PILES + 1) * NB_TURN_BUCKETS
+)
+
+POLICY_ENV = "RHUM_BUY_POLICY"
+
+
+class BuyRule:
+    """Buy a card when every condition holds and the card is affordable and available.
+
+    Turn bounds are compared with the first turn of each turn bucket, so they
+    are best given as multiples of TURN_BUCKET_SIZE.
+    """
+
+    __slots__ = (
+        "card", "min_money", "max_money", "min_coppers", "min_buys",
+        "min_provinces_left", "max_provinces_left",
+        "min_empty_piles", "max_empty_piles", "min_turn", "max_turn",
+    )
+
+    def __init__(
+        self,
+        card: str,
+        *,
+        min_money: int | None = None,
+        max_money: int | None = None,
+        min_coppers: int = 0,
+        min_buys: int = 1,
+        min_provinces_left: int = 0,
+        max_provinces_left: int | None = None,
+        min_empty_piles: int = 0,
+        max_empty_piles: int | None = None,
+        min_turn: int = 0,
+        max_turn: int | None = None,
+    ):
+        index = card_index(card)
+        if index is None:
+            raise ValueError(f"Unknown card {card!r}")
+        if min_coppers > MAX_COPPERS:
+            raise ValueError(f"At most {MAX_COPPERS} Copper can be required, got {min_coppers}")
+        self.card = index
+        self.min_money = COST[index] if min_money is None else max(min_money, COST[index])
+        self.max_money = max_money
+        self.min_coppers = min_coppers
+        self.min_buys = min_buys
+        self.min_provinces_left = min_provinces_left
+        self.max_provinces_left = max_provinces_left
+        self.min_empty_piles = min_empty_piles
+        self.max_empty_piles = max_empty_piles
+        self.min_turn = min_turn
+        self.max_turn = max_turn
+
+    def matches_hand(self, money: int, coppers: int, buys: int) -> bool:
+        return (
+            money >= self.min_money
+            and (self.max_money is None or money <= self.max_money)
+            and coppers >= self.min_coppers
+            and buys >= self.min_buys
+        )
+
+    def matches_stock(self, provinces_left: int, empty_piles: int) -> bool:
+        return (
+            provinces_left >= self.min_provinces_left
+            and (self.max_provinces_left is None or provinces_left <= self.max_provinces_left)
+            and empty_piles >= self.min_empty_piles
+            and (self.max_empty_piles is None or empty_piles <= self.max_empty_piles)
+        )
+
+    def matches_turn(self, turn: int) -> bool:
+        return turn >= self.min_turn and (self.max_turn is None or turn <= self.max_turn)
+
+    def __repr__(self) -> str:
+        conditions = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[1:])
+        return f"BuyRule({CARD_NAMES[self.card].value!r}, {conditions})"
+
+
+class BuyTable:
+    """Compiled decisions of a policy for one set of available cards."""
+
+    __slots__ = ("decisions",)
+
+    def __init__(self, decisions: tuple[str, ...]):
+        self.decisions = decisions
+
+    def lookup(self, money: int, coppers: int, buys: int, provinces_left: int, empty_piles: int, turn: int) -> str:
+        if buys <= 0:
+            return END_TURN
+        return self.decisions[cell_index(money, coppers, buys, provinces_left, empty_piles, turn)]
+
+
+def cell_index(money: int, coppers: int, buys: int, provinces_left: int, empty_piles: int, turn: int) -> int:
+    """Position of a situation in a compiled table."""
+    index = min(money, MAX_MONEY)
+    index = index * (MAX_COPPERS + 1) + min(coppers, MAX_COPPERS)
+    index = index * MAX_BUYS + min(buys, MAX_BUYS) - 1
+    index = index * (MAX_PROVINCES_LEFT + 1) + min(provinces_left, MAX_PROVINCES_LEFT)
+    index = index * (MAX_EMPTY_PILES + 1) + min(empty_piles, MAX_EMPTY_PILES)
+    return index * NB_TURN_BUCKETS + min(turn // TURN_BUCKET_SIZE, NB_TURN_BUCKETS - 1)
+
+
+def cell_indices(
+    money: "np.ndarray",
+    coppers: "np.ndarray",
+    buys: "np.ndarray",
+    provinces_left: "np.ndarray",
+    empty_piles: "np.ndarray",
+    turn: "np.ndarray",
+) -> "np.ndarray":
+    """Positions of many situations in a compiled table, as cell_index, no buy left sharing the cells of one."""
+    index = np.minimum(money, MAX_MONEY)
+    index = index * (MAX_COPPERS + 1) + np.minimum(coppers, MAX_COPPERS)
+    index = index * MAX_BUYS + np.clip(buys, 1, MAX_BUYS) - 1
+    index = index * (MAX_PROVINCES_LEFT + 1) + np.minimum(provinces_left, MAX_PROVINCES_LEFT)
+    index = index * (MAX_EMPTY_PILES + 1) + np.minimum(empty_piles, MAX_EMPTY_PILES)
+    return index * NB_TURN_BUCKETS + np.minimum(turn // TURN_BUCKET_SIZE, NB_TURN_BUCKETS - 1)
+
+
+class BuyPolicy:
+    """Ordered buy rules, the first matching one wins, END_TURN when none does."""
+
+    def __init__(self, name: str, rules: list[BuyRule]):
+        self.name = name
+        self.rules = tuple(rules)
+        self.cards = frozenset(rule.card for rule in self.rules)
+        self._tables: dict[frozenset[int], BuyTable] = {}
+
+    def table_for(self, stock: list[int]) -> BuyTable:
+        """Compiled table for the cards of a stock, compiled once per set of available policy cards."""
+        available = frozenset(card for card in self.cards if stock[card])
+        table = self._tables.get(available)
+        if table is None:
+            table = self._tables[available] = self.compile(available)
+        return table
+
+    def compile(self, available: frozenset[int]) -> BuyTable:
+        decisions = []
+        buy_decisions = {card: f"BUY {CARD_NAMES[card].value.upper()}" for card in self.cards}
+        rules = [rule for rule in self.rules if rule.card in available]
+        for money in range(MAX_MONEY + 1):
+            for coppers in range(MAX_COPPERS + 1):
+                for buys in range(1, MAX_BUYS + 1):
+                    hand_rules = [rule for rule in rules if rule.matches_hand(money, coppers, buys)]
+                    for provinces_left in range(MAX_PROVINCES_LEFT + 1):
+                        for empty_piles in range(MAX_EMPTY_PILES + 1):
+                            stock_rules = [
+                                rule for rule in hand_rules if rule.matches_stock(provinces_left, empty_piles)
+                            ]
+                            for turn_bucket in range(NB_TURN_BUCKETS):
+                                turn = turn_bucket * TURN_BUCKET_SIZE
+                                decision = END_TURN
+                                for rule in stock_rules:
+                                    if rule.matches_turn(turn):
+                                        decision = buy_decisions[rule.card]
+                                        break
+                                decisions.append(decision)
+        return BuyTable(tuple(decisions))
+
+    def decide(self, stock: list[int], money: int, coppers: int, buys: int, empty_piles: int, turn: int) -> str:
+        """Decision for a situation, with the Provinces left read from the stock."""
+        return self.table_for(stock).lookup(money, coppers, buys, stock[PROVINCE], empty_piles, turn)
+
+    @property
+    def nb_tables(self) -> int:
+        return len(self._tables)
+
+    def fingerprint(self) -> str:
+        """Hash of everything the compiled tables depend on."""
+        dimensions = (
+            MAX_MONEY, MAX_COPPERS, MAX_BUYS, MAX_PROVINCES_LEFT, MAX_EMPTY_PILES, TURN_BUCKET_SIZE, NB_TURN_BUCKETS,
+        )
+        source = repr((dimensions, [card.value for card in CARD_NAMES], self.rules))
+        return hashlib.sha256(source.encode()).hexdigest()
+
+
+#####################################################
+# Table cache
+#####################################################
+
+
+def save_tables(path: Path, policies: list[BuyPolicy]) -> int:
+    """Write the compiled tables of the policies, replacing the file at once. Returns the number of tables."""
+    content = {
+        policy.name: {
+            "fingerprint": policy.fingerprint(),
+            "tables": [[sorted(available), list(table.decisions)] for available, table in policy._tables.items()],
+        }
+        for policy in policies
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(content, separators=(",", ":")))
+    os.replace(temporary, path)
+    return sum(len(entry["tables"]) for entry in content.values())
+
+
+def load_tables(path: Path, policies: list[BuyPolicy]) -> int:
+    """Add the saved tables still matching the policies to them. Returns the number of tables loaded.
+
+    Raises OSError when the file cannot be read and ValueError when it is not a table cache.
+    """
+    content = json.loads(path.read_text())
+    if not isinstance(content, dict):
+        raise ValueError(f"{path} is not a table cache")
+    loaded: list[tuple[BuyPolicy, frozenset[int], BuyTable]] = []
+    for policy in policies:
+        entry = content.get(policy.name)
+        if not isinstance(entry, dict) or entry.get("fingerprint") != policy.fingerprint():
+            continue
+        try:
+            for available, decisions in entry["tables"]:
+                if len(decisions) != TABLE_SIZE:
+                    raise ValueError(f"Table of {len(decisions)} cells instead of {TABLE_SIZE} for {policy.name!r}")
+                loaded.append((policy, frozenset(available), BuyTable(tuple(decisions))))
+        except (KeyError, TypeError) as error:
+            raise ValueError(f"Malformed tables for {policy.name!r} in {path}") from error
+    # Tables are only added once the whole file has been read
+    for policy, available, table in loaded:
+        policy._tables.setdefault(available, table)
+    return len(loaded)
+
+
+#####################################################
+# Policies
+#####################################################
+
+# Our historical strategy, same decisions as strategy.should_buy_estate: an Estate with 2+ Copper in hand
+RHUM_AND_RUIN_POLICY = BuyPolicy("Rhum & Ruin", [
+    BuyRule("estate", min_coppers=2),
+])
+
+# The classic "Big Money" baseline, same decisions as simulator.BigMoneyPlayer
+BIG_MONEY_POLICY = BuyPolicy("Big Money", [
+    BuyRule("province", min_money=8),
+    BuyRule("gold", min_money=8),
+    BuyRule("duchy", min_money=6, max_provinces_left=4),
+    BuyRule("gold", min_money=6),
+    BuyRule("duchy", min_money=5, max_money=5, max_provinces_left=5),
+    BuyRule("estate", min_money=3, max_money=4, max_provinces_left=2),
+    BuyRule("silver", min_money=3, max_money=5),
+    BuyRule("estate", min_money=2, max_money=2, max_provinces_left=3),
+])
+
+POLICIES: dict[str, BuyPolicy] = {
+    "rhum_and_ruin": RHUM_AND_RUIN_POLICY,
+    "big_money": BIG_MONEY_POLICY,
+}
+
+
+def get_policy(name: str) -> BuyPolicy:
+    if name not in POLICIES:
+        raise ValueError(f"Unknown buy policy {name!r}, expected one of {sorted(POLICIES)}")
+    return POLICIES[name]
+
+
+# Policy used on /play, chosen at startup
+active_policy = get_policy(os.environ.get(POLICY_ENV, "rhum_and_ruin"))
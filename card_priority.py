@@ -0,0 +1,181 @@
+"""
+Card priorities for Rhum & Ruin bot.
+Card orderings used by the card-interaction endpoints, computed once per
+kingdom and game phase and shared between games: which card to discard
+(Militia, Poacher), to trash for a better one (Remodel, Remake), to upgrade
+(Mine), to gain, and whether to confirm a trash: for nothing (Chapel), a
+Copper for money (Moneylender) or an action for another one (Swap). Each
+decision is then a scan of a precomputed order for the first card held, with
+no sorting per request.
+
+Cards are valued as owned cards: treasures by their money, actions by their
+cost, victory cards by their points weighted by the game phase, minus the
+cost of drawing a dead card, which fades as the game ends.
+"""
+
+from functools import lru_cache
+
+from dopynion.data_model import CardName
+
+from cards import (
+    CARD_INDEX,
+    CARD_NAMES,
+    CARDS,
+    COPPER,
+    COST,
+    CURSE,
+    ESTATE,
+    FAIRGROUNDS,
+    GARDENS,
+    IS_ACTION,
+    IS_TREASURE,
+    IS_VICTORY,
+    MONEY,
+    NB_CARD_TYPES,
+    TREASURE_CARDS,
+    VICTORY_POINTS,
+    card_index,
+)
+from deck_tracker import DeckTracker
+from game_state import GameState
+
+MONEYLENDER = CARD_INDEX[CardName.MONEYLENDER]
+SWAP = CARD_INDEX[CardName.SWAP]
+
+# Game phases, from the turn number: building the deck, then greening, then the last turns
+EARLY, MID, LATE = range(3)
+MID_GAME_TURN = 7
+LATE_GAME_TURN = 15
+
+# Weight of a victory point against a coin of money, per phase
+VICTORY_POINT_WEIGHT = (0.5, 1.5, 3.0)
+# Cost of a card useless in hand, which takes the place of a drawn one, per phase
+DEAD_CARD_COST = (2.0, 1.0, 0.0)
+# Usual points of the cards scoring from the deck, Gardens and Fairgrounds
+VARIABLE_VICTORY_POINTS = 2
+# Money left in our treasures besides Copper from which Chapel trashes Coppers
+CHAPEL_COPPER_MONEY = 6
+# Cost added by Remodel and Mine to the trashed card
+REMODEL_COST_BONUS = 2
+MINE_COST_BONUS = 3
+# Most expensive action Swap gains
+SWAP_MAX_COST = 5
+MAX_PRIORITY_TABLES = 256
+
+
+def game_phase(turn: int) -> int:
+    if turn < MID_GAME_TURN:
+        return EARLY
+    return MID if turn < LATE_GAME_TURN else LATE
+
+
+def card_value(card: int, phase: int) -> float:
+    """Worth of owning one more card, in coins."""
+    points = VICTORY_POINTS[card]
+    if card in (GARDENS, FAIRGROUNDS):
+        points = VARIABLE_VICTORY_POINTS
+    value = points * VICTORY_POINT_WEIGHT[phase]
+    if IS_TREASURE[card]:
+        value += 2 * MONEY[card]
+    elif IS_ACTION[card]:
+        value += COST[card]
+    else:
+        value -= DEAD_CARD_COST[phase]
+    return value
+
+
+def hand_value(card: int) -> int:
+    """Worth of a card in the hand for the current turn, in coins."""
+    if IS_TREASURE[card]:
+        return MONEY[card]
+    if IS_ACTION[card]:
+        return 1 + CARDS[card].plus_money + CARDS[card].plus_cards
+    return -1 if card == CURSE else 0
+
+
+class CardPriority:
+    """Card orderings of one kingdom and game phase."""
+
+    __slots__ = ("phase", "piles", "value", "discard_order", "gain_order", "trash_order", "upgrade_order")
+
+    def __init__(self, piles: frozenset[int], phase: int):
+        self.phase = phase
+        # Before the first /play the stock is unknown, every card may be in it
+        self.piles = piles or frozenset(range(NB_CARD_TYPES))
+        self.value: tuple[float, ...] = tuple(card_value(card, phase) for card in range(NB_CARD_TYPES))
+        every_card = range(NB_CARD_TYPES)
+        # Least useful in hand first, the cheapest first among dead cards
+        self.discard_order = tuple(sorted(every_card, key=lambda card: (hand_value(card), COST[card])))
+        self.gain_order = tuple(sorted(every_card, key=lambda card: -self.value[card]))
+        # Largest gain of value from trashing the card for a better one first
+        remodel_gain = [self.upgrade_gain(card, REMODEL_COST_BONUS, self.piles) for card in every_card]
+        self.trash_order = tuple(sorted(every_card, key=lambda card: -remodel_gain[card]))
+        treasure_piles = self.piles.intersection(TREASURE_CARDS)
+        mine_gain = {card: self.upgrade_gain(card, MINE_COST_BONUS, treasure_piles) for card in TREASURE_CARDS}
+        self.upgrade_order = tuple(sorted(TREASURE_CARDS, key=lambda card: -mine_gain[card]))
+
+    def upgrade_gain(self, card: int, cost_bonus: int, gainable: frozenset[int]) -> float:
+        """Value gained by trashing the card for the best one costing up to cost_bonus more."""
+        best = max((self.value[other] for other in gainable if COST[other] <= COST[card] + cost_bonus), default=0.0)
+        # Points already owned count fully at the end of the game, whatever the phase
+        lost = card_value(card, LATE) if IS_VICTORY[card] and card != CURSE else self.value[card]
+        return best - lost
+
+    def first_held(self, order: tuple[int, ...], counts: list[int]) -> int | None:
+        for card in order:
+            if counts[card]:
+                return card
+        return None
+
+    def confirm_trash(self, card: int, deck: DeckTracker) -> bool:
+        """Whether to trash a card of our hand for the action being played.
+
+        The arbiter asks the same question for Chapel, Moneylender and Swap:
+        the actions in play this turn tell them apart.
+        """
+        if card == COPPER and deck.in_play[MONEYLENDER]:
+            return True
+        if IS_ACTION[card] and deck.in_play[SWAP]:
+            return self.swap_gain(card) > 0
+        return self.confirm_chapel(card, deck.owned)
+
+    def confirm_chapel(self, card: int, owned: list[int]) -> bool:
+        """Trash a card for nothing: curses, early Estates, and Coppers once we own enough other money."""
+        if card == COPPER:
+            if self.phase == LATE or GARDENS in self.piles:
+                return False
+            other_money = sum(MONEY[treasure] * owned[treasure] for treasure in TREASURE_CARDS if treasure != COPPER)
+            return other_money >= CHAPEL_COPPER_MONEY
+        return card in (CURSE, ESTATE) and self.value[card] < 0
+
+    def swap_gain(self, card: int) -> float:
+        """Value gained by swapping an action for the best other one Swap can gain."""
+        best = max(
+            (
+                self.value[other] for other in self.piles
+                if IS_ACTION[other] and COST[other] <= SWAP_MAX_COST and other != card
+            ),
+            default=self.value[card],
+        )
+        return best - self.value[card]
+
+    def pick(self, card_names: list[CardName], order: tuple[int, ...]) -> CardName:
+        """First card of the order among the given ones, the first given one if none is in the catalogue."""
+        counts = [0] * NB_CARD_TYPES
+        for card_name in card_names:
+            card = card_index(card_name)
+            if card is not None:
+                counts[card] += 1
+        card = self.first_held(order, counts)
+        return card_names[0] if card is None else CARD_NAMES[card]
+
+
+@lru_cache(maxsize=MAX_PRIORITY_TABLES)
+def priority_for(piles: frozenset[int], phase: int) -> CardPriority:
+    return CardPriority(piles, phase)
+
+
+def card_priority(game_state: GameState) -> CardPriority:
+    """Card orderings for the kingdom and the current phase of a game."""
+    return priority_for(frozenset(game_state.known_piles), game_phase(game_state.turn))
+
@@ -0,0 +1,161 @@
+"""
+Card catalogue for Rhum & Ruin bot.
+Static, index-based description of every card the arbiter can deal, so that
+simulation and analysis code can work on plain integer lists instead of
+CardName-keyed dictionaries.
+"""
+
+from dopynion.data_model import CardName, Cards
+
+
+class CardInfo:
+    """Static characteristics of one card type."""
+
+    def __init__(
+        self,
+        name: CardName,
+        cost: int,
+        *,
+        money: int = 0,
+        victory_points: int = 0,
+        is_action: bool = False,
+        is_treasure: bool = False,
+        is_victory: bool = False,
+        is_kingdom: bool = True,
+        is_attack: bool = False,
+        plus_cards: int = 0,
+        plus_actions: int = 0,
+        plus_buys: int = 0,
+        plus_money: int = 0,
+    ):
+        self.name = name
+        self.cost = cost
+        self.money = money
+        self.victory_points = victory_points
+        self.is_action = is_action
+        self.is_treasure = is_treasure
+        self.is_victory = is_victory
+        self.is_kingdom = is_kingdom
+        self.is_attack = is_attack
+        self.plus_cards = plus_cards
+        self.plus_actions = plus_actions
+        self.plus_buys = plus_buys
+        self.plus_money = plus_money
+
+    def __repr__(self) -> str:
+        return f"CardInfo({self.name.value}, cost={self.cost})"
+
+
+# Base cards first (treasures, victory, curse), then kingdom cards alphabetically.
+# The position of a card in this tuple is its index everywhere else in the bot.
+CARDS: tuple[CardInfo, ...] = (
+    CardInfo(CardName.COPPER, 0, money=1, is_treasure=True, is_kingdom=False),
+    CardInfo(CardName.SILVER, 3, money=2, is_treasure=True, is_kingdom=False),
+    CardInfo(CardName.GOLD, 6, money=3, is_treasure=True, is_kingdom=False),
+    CardInfo(CardName.PLATINUM, 9, money=5, is_treasure=True, is_kingdom=False),
+    CardInfo(CardName.CURSEDGOLD, 4, money=3, is_treasure=True, is_kingdom=False),
+    CardInfo(CardName.ESTATE, 2, victory_points=1, is_victory=True, is_kingdom=False),
+    CardInfo(CardName.DUCHY, 5, victory_points=3, is_victory=True, is_kingdom=False),
+    CardInfo(CardName.PROVINCE, 8, victory_points=6, is_victory=True, is_kingdom=False),
+    CardInfo(CardName.COLONY, 11, victory_points=10, is_victory=True, is_kingdom=False),
+    CardInfo(CardName.CURSE, 0, victory_points=-1, is_victory=True, is_kingdom=False),
+    CardInfo(CardName.ADVENTURER, 6, is_action=True),
+    CardInfo(CardName.ARTIFICER, 5, is_action=True, plus_cards=1, plus_actions=1, plus_money=1),
+    CardInfo(CardName.BANDIT, 5, is_action=True, is_attack=True),
+    CardInfo(CardName.BUREAUCRAT, 4, is_action=True, is_attack=True),
+    CardInfo(CardName.CELLAR, 2, is_action=True, plus_actions=1),
+    CardInfo(CardName.CHANCELLOR, 3, is_action=True, plus_money=2),
+    CardInfo(CardName.CHAPEL, 2, is_action=True),
+    CardInfo(CardName.COUNCILROOM, 5, is_action=True, plus_cards=4, plus_buys=1),
+    CardInfo(
+        CardName.DISTANTSHORE, 6, victory_points=2, is_action=True, is_victory=True,
+        plus_cards=2, plus_actions=1,
+    ),
+    CardInfo(CardName.FAIRGROUNDS, 6, is_victory=True),
+    CardInfo(CardName.FARMINGVILLAGE, 4, is_action=True, plus_actions=2),
+    CardInfo(CardName.FEAST, 4, is_action=True),
+    CardInfo(CardName.FESTIVAL, 5, is_action=True, plus_actions=2, plus_buys=1, plus_money=2),
+    # +2 money as in the dopynion engine the arbiter runs, where the README says +1
+    CardInfo(CardName.FORTUNETELLER, 3, is_action=True, is_attack=True, plus_money=2),
+    CardInfo(CardName.GARDENS, 4, is_victory=True),
+    CardInfo(CardName.HARVEST, 5, is_action=True),
+    CardInfo(CardName.HIRELING, 6, is_action=True, plus_cards=1),
+    CardInfo(CardName.LABORATORY, 5, is_action=True, plus_cards=2, plus_actions=1),
+    CardInfo(CardName.LIBRARY, 5, is_action=True),
+    CardInfo(CardName.MAGNATE, 5, is_action=True),
+    CardInfo(CardName.MAGPIE, 4, is_action=True, plus_cards=1, plus_actions=1),
+    CardInfo(CardName.MARKET, 5, is_action=True, plus_cards=1, plus_actions=1, plus_buys=1, plus_money=1),
+    CardInfo(CardName.MARQUIS, 6, is_action=True, plus_buys=1),
+    CardInfo(CardName.MILITIA, 4, is_action=True, is_attack=True, plus_money=2),
+    CardInfo(CardName.MINE, 5, is_action=True),
+    CardInfo(CardName.MONEYLENDER, 4, is_action=True),
+    CardInfo(CardName.POACHER, 4, is_action=True, plus_cards=1, plus_actions=1, plus_money=1),
+    # +2 actions as in the dopynion engine the arbiter runs, where the README says +1
+    CardInfo(CardName.PORT, 4, is_action=True, plus_cards=1, plus_actions=2),
+    CardInfo(CardName.REMAKE, 4, is_action=True),
+    CardInfo(CardName.REMODEL, 4, is_action=True),
+    CardInfo(CardName.SMITHY, 4, is_action=True, plus_cards=3),
+    CardInfo(CardName.SWAP, 5, is_action=True, plus_cards=1, plus_actions=1),
+    CardInfo(CardName.VILLAGE, 3, is_action=True, plus_cards=1, plus_actions=2),
+    CardInfo(CardName.WITCH, 5, is_action=True, is_attack=True, plus_cards=2),
+    CardInfo(CardName.WOODCUTTER, 3, is_action=True, plus_buys=1, plus_money=2),
+    CardInfo(CardName.WORKSHOP, 3, is_action=True),
+)
+
+NB_CARD_TYPES = len(CARDS)
+
+CARD_NAMES: tuple[CardName, ...] = tuple(card.name for card in CARDS)
+CARD_INDEX: dict[CardName, int] = {card.name: index for index, card in enumerate(CARDS)}
+
+# Flat per-index tables, faster to read in hot loops than CardInfo attributes
+COST: tuple[int, ...] = tuple(card.cost for card in CARDS)
+MONEY: tuple[int, ...] = tuple(card.money for card in CARDS)
+VICTORY_POINTS: tuple[int, ...] = tuple(card.victory_points for card in CARDS)
+IS_ACTION: tuple[bool, ...] = tuple(card.is_action for card in CARDS)
+IS_TREASURE: tuple[bool, ...] = tuple(card.is_treasure for card in CARDS)
+IS_VICTORY: tuple[bool, ...] = tuple(card.is_victory for card in CARDS)
+
+TREASURE_CARDS: tuple[int, ...] = tuple(i for i, card in enumerate(CARDS) if card.is_treasure)
+ACTION_CARDS: tuple[int, ...] = tuple(i for i, card in enumerate(CARDS) if card.is_action)
+VICTORY_CARDS: tuple[int, ...] = tuple(i for i, card in enumerate(CARDS) if card.is_victory)
+KINGDOM_CARDS: tuple[int, ...] = tuple(i for i, card in enumerate(CARDS) if card.is_kingdom)
+
+COPPER = CARD_INDEX[CardName.COPPER]
+SILVER = CARD_INDEX[CardName.SILVER]
+GOLD = CARD_INDEX[CardName.GOLD]
+PLATINUM = CARD_INDEX[CardName.PLATINUM]
+CURSEDGOLD = CARD_INDEX[CardName.CURSEDGOLD]
+ESTATE = CARD_INDEX[CardName.ESTATE]
+DUCHY = CARD_INDEX[CardName.DUCHY]
+PROVINCE = CARD_INDEX[CardName.PROVINCE]
+COLONY = CARD_INDEX[CardName.COLONY]
+CURSE = CARD_INDEX[CardName.CURSE]
+GARDENS = CARD_INDEX[CardName.GARDENS]
+FAIRGROUNDS = CARD_INDEX[CardName.FAIRGROUNDS]
+
+
+def card_index(card_name: str) -> int | None:
+    """Get the catalogue index of a card from its name, whatever its case."""
+    # CardName is a StrEnum, so plain strings hash and compare like its members
+    return CARD_INDEX.get(card_name.lower())
+
+
+def counts_of(cards: Cards | None) -> list[int]:
+    """Convert arbiter card quantities into a counts list indexed like CARDS."""
+    counts = [0] * NB_CARD_TYPES
+    if cards is not None:
+        for card_name, quantity in cards.quantities.items():
+            index = CARD_INDEX.get(card_name)
+            if index is not None:
+                counts[index] += quantity
+    return counts
+
+
+def score_of(counts: list[int]) -> int:
+    """Victory points of a set of owned cards."""
+    total = sum(VICTORY_POINTS[card] * counts[card] for card in VICTORY_CARDS)
+    if counts[GARDENS]:
+        total += counts[GARDENS] * (sum(counts) // 10)
+    if counts[FAIRGROUNDS]:
+        total += counts[FAIRGROUNDS] * (sum(1 for quantity in counts if quantity) // 5)
+    return total
@@ -0,0 +1,267 @@
+"""
+Deck tracking for Rhum & Ruin bot.
+Incremental model of the cards we own and of the zone each one is in (draw
+pile, hand, in play, discard), updated from our own decisions and from the
+difference between consecutive views of our hand, so that questions like
+"expected money next hand" cost O(card types) instead of a full rebuild.
+"""
+
+import math
+
+from dopynion.data_model import CardName
+
+from cards import (
+    CARD_INDEX,
+    COPPER,
+    CURSE,
+    CURSEDGOLD,
+    ESTATE,
+    GOLD,
+    MONEY,
+    NB_CARD_TYPES,
+    SILVER,
+    TREASURE_CARDS,
+    card_index,
+    score_of,
+)
+
+HAND_SIZE = 5
+
+BANDIT = CARD_INDEX[CardName.BANDIT]
+BUREAUCRAT = CARD_INDEX[CardName.BUREAUCRAT]
+DISTANTSHORE = CARD_INDEX[CardName.DISTANTSHORE]
+FEAST = CARD_INDEX[CardName.FEAST]
+HIRELING = CARD_INDEX[CardName.HIRELING]
+PORT = CARD_INDEX[CardName.PORT]
+
+# Cards gained by playing an action, with the zone they are gained into
+ACTION_GAINS: dict[int, tuple[int, str]] = {
+    BANDIT: (GOLD, "discard"),
+    BUREAUCRAT: (SILVER, "deck"),
+    DISTANTSHORE: (ESTATE, "discard"),
+}
+
+
+class DeckTracker:
+    """Card ownership and zones of our player during one game.
+
+    Every zone is a counts list indexed like cards.CARDS. The draw pile is
+    only known as a composition, its order being random.
+    """
+
+    __slots__ = ("owned", "draw_pile", "hand", "in_play", "discard", "hirelings", "score")
+
+    def __init__(self):
+        self.owned = [0] * NB_CARD_TYPES
+        self.owned[COPPER] = 7
+        self.owned[ESTATE] = 3
+        self.draw_pile = list(self.owned)
+        self.hand = [0] * NB_CARD_TYPES
+        self.in_play = [0] * NB_CARD_TYPES
+        self.discard = [0] * NB_CARD_TYPES
+        # Hirelings stay in play for the whole game, out of every other zone
+        self.hirelings = 0
+        self.score = score_of(self.owned)
+
+    # Observations
+
+    def observe(self, hand: list[int], score: int | None = None) -> None:
+        """Apply the difference between the last known hand and the one the arbiter sent."""
+        appeared = [0] * NB_CARD_TYPES
+        nb_appeared = 0
+        for card in range(NB_CARD_TYPES):
+            delta = hand[card] - self.hand[card]
+            if delta > 0:
+                appeared[card] = delta
+                nb_appeared += delta
+            elif delta < 0:
+                # Played or spent: only our own turn removes cards from hand without a hook
+                self.in_play[card] -= delta
+                if card == CURSEDGOLD:
+                    self.gain(CURSE)
+            self.hand[card] = hand[card]
+        if nb_appeared:
+            self._draw(appeared, nb_appeared)
+        if score is not None:
+            self._observe_score(score)
+
+    def _draw(self, drawn: list[int], nb_drawn: int) -> None:
+        draw_pile = self.draw_pile
+        if nb_drawn > sum(draw_pile):
+            # The whole draw pile was drawn, then the discard was shuffled into a new one
+            for card in range(NB_CARD_TYPES):
+                taken = min(draw_pile[card], drawn[card])
+                drawn[card] -= taken
+                self.discard[card] += draw_pile[card] - taken
+                draw_pile[card] = self.discard[card]
+                self.discard[card] = 0
+        for card in range(NB_CARD_TYPES):
+            quantity = drawn[card]
+            if not quantity:
+                continue
+            taken = min(draw_pile[card], quantity)
+            draw_pile[card] -= taken
+            # Cards missing from the model were gained straight into our hand or deck
+            self.owned[card] += quantity - taken
+
+    def _observe_score(self, score: int) -> None:
+        # Curses given by the attacks of the other players only show in our score
+        missing_curses = score_of(self.owned) - score
+        if missing_curses > 0:
+            self.owned[CURSE] += missing_curses
+            self.discard[CURSE] += missing_curses
+        self.score = score
+
+    # Our decisions
+
+    def record_decision(self, decision: str) -> None:
+        """Update the model with a decision sent to the arbiter on /play."""
+        verb, _, card_name = decision.strip().partition(" ")
+        verb = verb.upper()
+        if verb == "END_TURN":
+            self.end_turn()
+            return
+        card = card_index(card_name)
+        if card is None:
+            return
+        if verb == "BUY":
+            self.gain(card)
+            if card == PORT:
+                self.gain(card)
+        elif verb == "ACTION":
+            self._take_from_hand(card)
+            if card == FEAST:
+                self.owned[FEAST] -= 1
+            elif card == HIRELING:
+                self.hirelings += 1
+            else:
+                self.in_play[card] += 1
+            if card in ACTION_GAINS:
+                self.gain(*ACTION_GAINS[card])
+
+    def end_turn(self) -> None:
+        """Clean-up phase: hand and cards in play go to the discard."""
+        for card in range(NB_CARD_TYPES):
+            self.discard[card] += self.hand[card] + self.in_play[card]
+            self.hand[card] = 0
+            self.in_play[card] = 0
+
+    def gain(self, card: int, destination: str = "discard") -> None:
+        self.owned[card] += 1
+        if destination == "deck":
+            self.draw_pile[card] += 1
+        elif destination == "hand":
+            self.hand[card] += 1
+        else:
+            self.discard[card] += 1
+
+    def trash(self, card: int) -> None:
+        """A card of our hand was trashed."""
+        self._take_from_hand(card)
+        self.owned[card] -= 1
+
+    def discard_from_hand(self, card: int) -> None:
+        self._take_from_hand(card)
+        self.discard[card] += 1
+
+    def discard_from_draw_pile(self, card: int) -> None:
+        """A card revealed from the draw pile was discarded instead of drawn."""
+        if self.draw_pile[card]:
+            self.draw_pile[card] -= 1
+        else:
+            self.owned[card] += 1
+        self.discard[card] += 1
+
+    def discard_draw_pile(self) -> None:
+        for card in range(NB_CARD_TYPES):
+            self.discard[card] += self.draw_pile[card]
+            self.draw_pile[card] = 0
+
+    def _take_from_hand(self, card: int) -> None:
+        if self.hand[card]:
+            self.hand[card] -= 1
+        elif self.draw_pile[card]:
+            # Drawn since our last view of the hand (clean-up, or an attack during another turn)
+            self.draw_pile[card] -= 1
+        else:
+            self.owned[card] += 1
+
+    # Queries
+
+    @property
+    def nb_cards(self) -> int:
+        return sum(self.owned)
+
+    def draw_probabilities(self) -> list[float]:
+        """Probability of each card type being the next one drawn."""
+        draw_pile = self.draw_pile
+        size = sum(draw_pile)
+        if not size:
+            draw_pile = self._reshuffle_pool()
+            size = sum(draw_pile)
+        if not size:
+            return [0.0] * NB_CARD_TYPES
+        return [quantity / size for quantity in draw_pile]
+
+    def expected_money_next_hand(self, hand_size: int = HAND_SIZE) -> float:
+        """Expected money of the treasures in the hand drawn at the end of this turn."""
+        hand_size += self.hirelings
+        draw_pile = self.draw_pile
+        size = sum(draw_pile)
+        money = sum(MONEY[card] * draw_pile[card] for card in TREASURE_CARDS)
+        if size >= hand_size:
+            return hand_size * money / size
+        # The draw pile runs out, the rest comes from the reshuffled discard
+        pool = self._reshuffle_pool()
+        pool_size = sum(pool)
+        if not pool_size:
+            return float(money)
+        pool_money = sum(MONEY[card] * pool[card] for card in TREASURE_CARDS)
+        return money + min(hand_size - size, pool_size) * pool_money / pool_size
+
+    def likely_next_hands(self, limit: int, hand_size: int = HAND_SIZE) -> list[tuple[float, list[int]]]:
+        """The limit most likely hands drawn at the end of this turn, with their probability."""
+        hands = draw_outcomes(self.draw_pile, self._reshuffle_pool(), hand_size + self.hirelings)
+        hands.sort(key=lambda hand: hand[0], reverse=True)
+        return hands[:limit]
+
+    def _reshuffle_pool(self) -> list[int]:
+        # After the clean-up, the hand and the cards in play are part of the discard
+        return [
+            discard + hand + in_play
+            for discard, hand, in_play in zip(self.discard, self.hand, self.in_play)
+        ]
+
+
+def draw_outcomes(draw_pile: list[int], discard: list[int], nb_cards: int) -> list[tuple[float, list[int]]]:
+    """Every possible composition of the next nb_cards drawn, with its probability.
+
+    The counts lists may group cards by any index (card types, money values).
+    When the draw pile runs out, it is drawn whole and the rest comes from the
+    shuffled discard.
+    """
+    if sum(draw_pile) >= nb_cards:
+        drawn, pool = [0] * len(draw_pile), draw_pile
+    else:
+        drawn, pool = list(draw_pile), discard
+        nb_cards = min(nb_cards - sum(draw_pile), sum(discard))
+    kinds = [kind for kind in range(len(pool)) if pool[kind] > 0]
+    # Cards left in the pool after each kind, to skip impossible branches
+    remaining_after = [sum(pool[kind] for kind in kinds[position + 1:]) for position in range(len(kinds))]
+    total = math.comb(sum(pool[kind] for kind in kinds), nb_cards)
+    outcomes: list[tuple[float, list[int]]] = []
+
+    def visit(position: int, nb_left: int, weight: int) -> None:
+        if not nb_left:
+            outcomes.append((weight / total, list(drawn)))
+            return
+        if position == len(kinds):
+            return
+        kind = kinds[position]
+        for quantity in range(max(0, nb_left - remaining_after[position]), min(pool[kind], nb_left) + 1):
+            drawn[kind] += quantity
+            visit(position + 1, nb_left - quantity, weight * math.comb(pool[kind], quantity))
+            drawn[kind] -= quantity
+
+    visit(0, nb_cards, 1)
+    return outcomes
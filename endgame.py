@@ -0,0 +1,366 @@
+"""
+Endgame solver for Rhum & Ruin bot.
+When few Provinces are left or two piles are empty, /play searches the last
+turns exactly: memoized expectimax over our buys (max nodes) and our next
+hands (chance nodes), maximizing our chance to finish ahead. Chance node
+values are shared across games through a bounded transposition table keyed
+on compact deck, stock and score tuples and on the parameters of the solve,
+and the search only runs when its estimated tree size fits the time budget.
+The search deepens one turn at a time, so that running out of time still
+answers with the best buy of the deepest completed search.
+
+Model: cards only count through their money and victory points, action
+cards being dead draws, and the best opponent gains a fixed number of
+points per turn without touching the stock: its recent rate when the
+opponent tracker has one, a late Big Money average otherwise. Enabled
+unless RHUM_ENDGAME=off.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from dopynion.data_model import Game
+
+from bot_logging import logger
+from buy_policy import END_TURN
+from cards import (
+    CARD_NAMES,
+    COLONY,
+    COST,
+    DUCHY,
+    ESTATE,
+    GOLD,
+    IS_TREASURE,
+    MONEY,
+    NB_CARD_TYPES,
+    PLATINUM,
+    PROVINCE,
+    SILVER,
+    TREASURE_CARDS,
+    VICTORY_POINTS,
+    counts_of,
+)
+from deck_tracker import HAND_SIZE, draw_outcomes
+from game_state import GameState
+from metrics import ARBITER_TIMEOUT_SECONDS, metrics
+from strategy_helpers import count_empty_piles, get_our_hand_counts, get_our_player_index, money_in_hand
+
+ENDGAME_ENV = "RHUM_ENDGAME"
+ENDGAME_BUDGET_ENV = "RHUM_ENDGAME_BUDGET"
+
+# When the endgame starts
+ENDGAME_PROVINCES_LEFT = 3
+ENDGAME_EMPTY_PILES = 2
+# Our turns searched at most, the current one included
+MAX_DEPTH = 4
+DEFAULT_BUDGET_SECONDS = 0.2 * ARBITER_TIMEOUT_SECONDS
+# Search speed used to turn the time budget into a tree size, measured on a laptop
+NODES_PER_SECOND = 100_000
+# The deadline is checked every this many nodes
+DEADLINE_CHECK_INTERVAL = 256
+TRANSPOSITION_TABLE_SIZE = 200_000
+# Points the best opponent scores per turn, a late Big Money average, when not measured
+OPPONENT_POINTS_PER_TURN = 3
+# Score lead worth about a 73% chance to win, for positions the search stops at
+LEAD_SCALE = 4.0
+
+# Cards worth buying in the last turns, victory points first to win ties
+BUY_CHOICES: tuple[int, ...] = (COLONY, PROVINCE, DUCHY, ESTATE, PLATINUM, GOLD, SILVER)
+PROVINCE_CHOICE = BUY_CHOICES.index(PROVINCE)
+# Decks are compressed to counts per money value, the only thing a hand is played for
+MONEY_VALUES: tuple[int, ...] = tuple(sorted({0} | {MONEY[card] for card in TREASURE_CARDS}))
+MONEY_CLASS: tuple[int, ...] = tuple(
+    MONEY_VALUES.index(MONEY[card]) if IS_TREASURE[card] else 0 for card in range(NB_CARD_TYPES)
+)
+
+# Chance node key: draw pile, discard, stock of the choices, our score, opponent score, turns left,
+# then the parameters of the solve: opponent points per turn, hand size and empty piles outside the choices
+NodeKey = tuple[tuple[int, ...], tuple[int, ...], tuple[int, ...], int, int, int, int, int, int]
+
+
+def is_endgame(stock: list[int], empty_piles: int) -> bool:
+    """Whether the solver takes over /play in a game with this stock."""
+    return stock[PROVINCE] <= ENDGAME_PROVINCES_LEFT or empty_piles >= ENDGAME_EMPTY_PILES
+
+
+class SearchTimeout(Exception):
+    """The endgame search ran out of time."""
+
+
+class TranspositionTable:
+    """Bounded LRU table of chance node values."""
+
+    def __init__(self, max_size: int = TRANSPOSITION_TABLE_SIZE):
+        self.max_size = max_size
+        self._values: OrderedDict[NodeKey, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: NodeKey) -> float | None:
+        with self._lock:
+            value = self._values.get(key)
+            if value is not None:
+                self._values.move_to_end(key)
+            return value
+
+    def put(self, key: NodeKey, value: float) -> None:
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_size:
+                self._values.popitem(last=False)
+
+
+def compress(counts: list[int]) -> tuple[int, ...]:
+    """Counts per card type to counts per money value."""
+    classes = [0] * len(MONEY_VALUES)
+    for card, quantity in enumerate(counts):
+        if quantity > 0:
+            classes[MONEY_CLASS[card]] += quantity
+    return tuple(classes)
+
+
+@lru_cache(maxsize=4096)
+def hand_outcomes(
+    draw_pile: tuple[int, ...],
+    discard: tuple[int, ...],
+    hand_size: int,
+) -> tuple[tuple[float, int, tuple[int, ...], tuple[int, ...]], ...]:
+    """Probability, money, then draw pile and discard left, of every next hand."""
+    outcomes = []
+    draws_whole_pile = sum(draw_pile) < hand_size
+    for probability, hand in draw_outcomes(list(draw_pile), list(discard), hand_size):
+        money = sum(MONEY_VALUES[kind] * quantity for kind, quantity in enumerate(hand))
+        if draws_whole_pile:
+            # The discard became the draw pile, the drawn cards beyond the old pile come from it
+            left = tuple(discard[kind] - (hand[kind] - draw_pile[kind]) for kind in range(len(hand)))
+            outcomes.append((probability, money, left, (0,) * len(hand)))
+        else:
+            left = tuple(draw_pile[kind] - hand[kind] for kind in range(len(hand)))
+            outcomes.append((probability, money, left, discard))
+    return tuple(outcomes)
+
+
+class EndgameSolver:
+    """Expectimax over our last turns, within a time budget."""
+
+    def __init__(
+        self,
+        budget: float = DEFAULT_BUDGET_SECONDS,
+        max_depth: int = MAX_DEPTH,
+        opponent_points_per_turn: int = OPPONENT_POINTS_PER_TURN,
+        table: TranspositionTable | None = None,
+    ):
+        self.budget = budget
+        self.max_depth = max_depth
+        self.opponent_points_per_turn = opponent_points_per_turn
+        self.table = table or TranspositionTable()
+        self._local = threading.local()
+
+    # Entry point
+
+    def decide(self, game: Game, game_state: GameState) -> str | None:
+        """Endgame decision for /play, None when not in the endgame or out of budget."""
+        hand = get_our_hand_counts(game, game_state)
+        player_index = get_our_player_index(game, game_state)
+        if not game_state.can_purchase() or not hand or player_index is None:
+            return None
+        stock = counts_of(game.stock)
+        empty_piles = count_empty_piles(stock, game_state)
+        if not is_endgame(stock, empty_piles):
+            return None
+        opponent_scores = [player.score for index, player in enumerate(game.players) if index != player_index]
+        if not opponent_scores:
+            return None
+
+        deck = game_state.deck
+        discard = [deck.discard[card] + deck.hand[card] + deck.in_play[card] for card in range(NB_CARD_TYPES)]
+        # Only our own buys change the stock in the model, and we only buy choice cards.
+        # Choices missing from the game are marked -1, not to count as empty piles.
+        choices_stock = tuple(stock[card] if card in game_state.known_piles else -1 for card in BUY_CHOICES)
+        other_empty_piles = empty_piles - choices_stock.count(0)
+        hand_size = HAND_SIZE + deck.hirelings
+        root = (
+            money_in_hand(hand),
+            compress(deck.draw_pile),
+            compress(discard),
+            choices_stock,
+            game.players[player_index].score,
+            max(opponent_scores),
+        )
+        depth = self.affordable_depth(root[1], root[2], hand_size)
+        if not depth:
+            metrics.count("endgame too large")
+            return None
+
+        start = time.perf_counter()
+        try:
+            choice, value = self.solve(
+                *root, depth, hand_size, other_empty_piles, self.opponent_rate(game_state)
+            )
+        except SearchTimeout:
+            metrics.count("endgame timeout")
+            logger.warning(
+                "⌛ Endgame search out of time at depth %d", depth, extra={"game_id": game_state.game_id}
+            )
+            return None
+        metrics.count("endgame solved" if self._local.depth == depth else "endgame cut short")
+        decision = END_TURN if choice is None else f"BUY {CARD_NAMES[choice].value.upper()}"
+        logger.debug(
+            "♟️ Endgame: %s (win chance %.2f) at depth %d of %d in %.1fms, %d positions in table",
+            decision,
+            value,
+            self._local.depth,
+            depth,
+            1000 * (time.perf_counter() - start),
+            len(self.table),
+            extra={"game_id": game_state.game_id},
+        )
+        return decision
+
+    def in_endgame(self, game: Game, game_state: GameState) -> bool:
+        """Whether /play is in the endgame, decided by the solver unless out of budget."""
+        stock = counts_of(game.stock)
+        return is_endgame(stock, count_empty_piles(stock, game_state))
+
+    def opponent_rate(self, game_state: GameState) -> int:
+        """Points per turn of the leading opponent, as measured in this game when possible."""
+        leader = game_state.opponents.leading_opponent()
+        rate = leader.points_per_turn() if leader is not None else None
+        return self.opponent_points_per_turn if rate is None else max(round(rate), 0)
+
+    def affordable_depth(self, draw_pile: tuple[int, ...], discard: tuple[int, ...], hand_size: int) -> int:
+        """Deepest search whose estimated tree size fits the time budget, 0 if none."""
+        max_nodes = self.budget * NODES_PER_SECOND
+        nb_options = len(BUY_CHOICES) + 1
+        nb_hands = max(len(hand_outcomes(draw_pile, discard, hand_size)), 1)
+        depth = 0
+        while depth < self.max_depth and nb_options * (nb_options * nb_hands) ** depth <= max_nodes:
+            depth += 1
+        return depth
+
+    # Search
+
+    def solve(
+        self,
+        money: int,
+        draw_pile: tuple[int, ...],
+        discard: tuple[int, ...],
+        stock: tuple[int, ...],
+        our_score: int,
+        opponent_score: int,
+        depth: int,
+        hand_size: int = HAND_SIZE,
+        other_empty_piles: int = 0,
+        opponent_points_per_turn: int | None = None,
+    ) -> tuple[int | None, float]:
+        """Best buy of the current turn (None to end it) and its chance to win.
+
+        Searched one more turn at a time up to depth: out of time, the result
+        of the deepest completed search is returned, its depth left in
+        self._local.depth, and SearchTimeout is only raised when none completed.
+        """
+        local = self._local
+        local.deadline = time.perf_counter() + self.budget
+        local.nodes = 0
+        local.hand_size = hand_size
+        local.other_empty_piles = other_empty_piles
+        local.opponent_points = (
+            self.opponent_points_per_turn if opponent_points_per_turn is None else opponent_points_per_turn
+        )
+        local.depth = 0
+        result = None
+        for turns in range(1, depth + 1):
+            try:
+                if time.perf_counter() > local.deadline:
+                    raise SearchTimeout()
+                # Shallower searches fill the table with chance nodes the deeper ones reuse
+                result = self._turn(money, draw_pile, discard, stock, our_score, opponent_score, turns)
+            except SearchTimeout:
+                if result is None:
+                    raise
+                return result
+            local.depth = turns
+        return result
+
+    def _turn(
+        self,
+        money: int,
+        draw_pile: tuple[int, ...],
+        discard: tuple[int, ...],
+        stock: tuple[int, ...],
+        our_score: int,
+        opponent_score: int,
+        turns_left: int,
+    ) -> tuple[int | None, float]:
+        """Max node: our buy with the hand just drawn, its cards being in the discard already."""
+        local = self._local
+        local.nodes += 1
+        if not local.nodes % DEADLINE_CHECK_INTERVAL and time.perf_counter() > local.deadline:
+            raise SearchTimeout()
+        best_choice = None
+        best_value = self._after_turn(draw_pile, discard, stock, our_score, opponent_score, turns_left)
+        for position, card in enumerate(BUY_CHOICES):
+            if stock[position] <= 0 or COST[card] > money:
+                continue
+            new_stock = stock[:position] + (stock[position] - 1,) + stock[position + 1:]
+            new_score = our_score + VICTORY_POINTS[card]
+            if not new_stock[PROVINCE_CHOICE] or local.other_empty_piles + new_stock.count(0) >= 3:
+                # Our turn ends the game, the players after us do not play
+                value = 1.0 if new_score > opponent_score else 0.5 if new_score == opponent_score else 0.0
+            else:
+                new_discard = list(discard)
+                new_discard[MONEY_CLASS[card]] += 1
+                value = self._after_turn(
+                    draw_pile, tuple(new_discard), new_stock, new_score, opponent_score, turns_left
+                )
+            if value > best_value:
+                best_choice, best_value = card, value
+        return best_choice, best_value
+
+    def _after_turn(
+        self,
+        draw_pile: tuple[int, ...],
+        discard: tuple[int, ...],
+        stock: tuple[int, ...],
+        our_score: int,
+        opponent_score: int,
+        turns_left: int,
+    ) -> float:
+        """Chance node: the opponents play, then we draw our next hand."""
+        local = self._local
+        opponent_score += local.opponent_points
+        if turns_left <= 1:
+            return 1 / (1 + math.exp((opponent_score - our_score) / LEAD_SCALE))
+        key = (
+            draw_pile, discard, stock, our_score, opponent_score, turns_left,
+            local.opponent_points, local.hand_size, local.other_empty_piles,
+        )
+        value = self.table.get(key)
+        if value is not None:
+            return value
+        value = 0.0
+        for probability, money, next_draw_pile, next_discard in hand_outcomes(draw_pile, discard, local.hand_size):
+            # The hand is played this turn, and discarded at its end
+            hand_discard = tuple(
+                draw_pile[kind] + discard[kind] - next_draw_pile[kind] for kind in range(len(discard))
+            )
+            value += probability * self._turn(
+                money, next_draw_pile, hand_discard, stock, our_score, opponent_score, turns_left - 1
+            )[1]
+        self.table.put(key, value)
+        return value
+
+
+def endgame_from_env() -> EndgameSolver | None:
+    """Solver used on /play, None when RHUM_ENDGAME=off."""
+    if os.environ.get(ENDGAME_ENV, "on") == "off":
+        return None
+    budget = float(os.environ.get(ENDGAME_BUDGET_ENV, DEFAULT_BUDGET_SECONDS))
+    return EndgameSolver(budget=budget)
@@ -0,0 +1,319 @@
+"""
+Local arbiter stand-in for Rhum & Ruin bot.
+Plays simulated games against the bot through the same HTTP protocol as the
+real arbiter (X-Game-Id header, lifecycle GETs, /play and card-interaction
+POSTs), many games at once, either in-process through the ASGI app or
+against a running server. Reports throughput, tail latency per endpoint and
+every illegal or late answer.
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from cards import CARD_NAMES, NB_CARD_TYPES, card_index
+from metrics import ARBITER_TIMEOUT_SECONDS, Histogram
+from simulator import STRATEGIES, IllegalActionError, SimulatedPlayer, Simulation
+
+# Number of illegal decisions kept as examples in the report
+MAX_ILLEGAL_SAMPLES = 10
+
+
+class LoadReport:
+    """Thread-safe statistics of a load test."""
+
+    def __init__(self):
+        self.latencies: dict[str, Histogram] = {}
+        self.errors: dict[str, int] = {}
+        self.illegal_samples: list[str] = []
+        self.nb_games = 0
+        self.nb_eliminations = 0
+        self.nb_wins = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint: str, seconds: float) -> None:
+        histogram = self.latencies.get(endpoint)
+        if histogram is None:
+            with self._lock:
+                histogram = self.latencies.setdefault(endpoint, Histogram())
+        histogram.observe(seconds)
+
+    def error(self, endpoint: str, reason: str) -> None:
+        key = f"{endpoint}: {reason}"
+        with self._lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def game_over(self, game_id: str, eliminated: bool, won: bool, last_decision: str | None) -> None:
+        with self._lock:
+            self.nb_games += 1
+            self.nb_wins += won
+            if eliminated:
+                self.nb_eliminations += 1
+                if len(self.illegal_samples) < MAX_ILLEGAL_SAMPLES:
+                    self.illegal_samples.append(f"{game_id}: last decision {last_decision!r}")
+
+    @property
+    def nb_requests(self) -> int:
+        return sum(histogram.count for histogram in self.latencies.values())
+
+    @property
+    def ok(self) -> bool:
+        """True when every answer was legal and in time."""
+        return not self.errors and not self.nb_eliminations
+
+    def summary(self) -> str:
+        elapsed = self.elapsed or 1e-9
+        lines = [
+            f"🎲 {self.nb_games} games, {self.nb_requests} requests in {self.elapsed:.2f}s "
+            f"({self.nb_games / elapsed:.1f} games/s, {self.nb_requests / elapsed:.0f} req/s)",
+            f"🏆 bot won {self.nb_wins}/{self.nb_games} games, eliminated in {self.nb_eliminations}",
+        ]
+        for endpoint, histogram in sorted(self.latencies.items()):
+            stats = histogram.summary()
+            lines.append(
+                f"   - {endpoint}: {stats['count']} calls, p50 {stats['p50_ms']:.2f}ms, "
+                f"p95 {stats['p95_ms']:.2f}ms, p99 {stats['p99_ms']:.2f}ms, max {stats['max_ms']:.2f}ms"
+            )
+        for error, count in sorted(self.errors.items()):
+            lines.append(f"❌ {error} ({count})")
+        for sample in self.illegal_samples:
+            lines.append(f"🚫 {sample}")
+        return "\n".join(lines)
+
+
+#####################################################
+# Payloads
+#####################################################
+
+
+def _names(counts: list[int]) -> list[str]:
+    return [CARD_NAMES[card].value for card in range(NB_CARD_TYPES) for _ in range(counts[card])]
+
+
+def _quantities(counts: list[int]) -> dict[str, int]:
+    return {CARD_NAMES[card].value: quantity for card, quantity in enumerate(counts) if quantity}
+
+
+def game_payload(simulation: Simulation, index: int) -> dict:
+    """JSON body of /play, only the current player's hand being visible."""
+    return {
+        "finished": simulation.finished,
+        "players": [
+            {
+                "name": player.name,
+                "hand": {"quantities": _quantities(player.hand)} if position == index else None,
+                "score": player.score(),
+            }
+            for position, player in enumerate(simulation.players)
+        ],
+        "stock": {"quantities": _quantities(simulation.supply)},
+    }
+
+
+#####################################################
+# Remote player
+#####################################################
+
+
+class RemoteBotPlayer(SimulatedPlayer):
+    """Seat of a game played by the bot over HTTP."""
+
+    def __init__(self, client: httpx.Client, report: LoadReport, name: str):
+        self.client = client
+        self.report = report
+        self.name = name
+        self.game_id = ""
+        self.last_decision: str | None = None
+
+    def _call(self, method: str, endpoint: str, payload: dict | None = None):
+        start = time.perf_counter()
+        try:
+            response = self.client.request(method, endpoint, json=payload, headers={"X-Game-Id": self.game_id})
+        except httpx.HTTPError as exc:
+            self.report.error(endpoint, exc.__class__.__name__)
+            raise IllegalActionError(f"{endpoint} failed") from exc
+        elapsed = time.perf_counter() - start
+        self.report.observe(endpoint, elapsed)
+        if elapsed > ARBITER_TIMEOUT_SECONDS:
+            self.report.error(endpoint, "timeout")
+            raise IllegalActionError(f"{endpoint} answered after {elapsed:.3f}s")
+        if response.status_code != 200:
+            self.report.error(endpoint, f"status {response.status_code}")
+            raise IllegalActionError(f"{endpoint} answered {response.status_code}")
+        data = response.json()
+        if not isinstance(data, dict) or data.get("game_id") != self.game_id:
+            self.report.error(endpoint, "wrong game_id")
+            raise IllegalActionError(f"{endpoint} answered for another game")
+        return data.get("decision")
+
+    def _card_decision(self, endpoint: str, payload: dict) -> int:
+        decision = self._call("POST", endpoint, payload)
+        card = card_index(decision) if isinstance(decision, str) else None
+        if card is None:
+            self.report.error(endpoint, "unknown card")
+            raise IllegalActionError(f"{endpoint} answered {decision!r}")
+        return card
+
+    def _bool_decision(self, endpoint: str, payload: dict | None = None) -> bool:
+        decision = self._call("POST", endpoint, payload)
+        if not isinstance(decision, bool):
+            self.report.error(endpoint, "not a boolean")
+            raise IllegalActionError(f"{endpoint} answered {decision!r}")
+        return decision
+
+    # Lifecycle
+
+    def _notify(self, endpoint: str) -> None:
+        # Lifecycle calls expect no decision, failures are only reported
+        try:
+            self._call("GET", endpoint)
+        except IllegalActionError:
+            pass
+
+    def start_game(self, game_id: str) -> None:
+        self.game_id = game_id
+        self._notify("/start_game")
+
+    def start_turn(self) -> None:
+        self._notify("/start_turn")
+
+    def play(self, simulation: Simulation, index: int) -> str:
+        decision = self._call("POST", "/play", game_payload(simulation, index))
+        if not isinstance(decision, str):
+            self.report.error("/play", "not a string")
+            raise IllegalActionError(f"/play answered {decision!r}")
+        self.last_decision = decision
+        return decision
+
+    def end_game(self) -> None:
+        self._notify("/end_game")
+
+    # Card interactions
+
+    def confirm_discard_card_from_hand(self, card: int, hand: list[int]) -> bool:
+        payload = {"card_name": CARD_NAMES[card].value, "hand": _names(hand)}
+        return self._bool_decision("/confirm_discard_card_from_hand", payload)
+
+    def discard_card_from_hand(self, hand: list[int]) -> int:
+        return self._card_decision("/discard_card_from_hand", {"hand": _names(hand)})
+
+    def confirm_trash_card_from_hand(self, card: int, hand: list[int]) -> bool:
+        payload = {"card_name": CARD_NAMES[card].value, "hand": _names(hand)}
+        return self._bool_decision("/confirm_trash_card_from_hand", payload)
+
+    def trash_card_from_hand(self, hand: list[int]) -> int:
+        return self._card_decision("/trash_card_from_hand", {"hand": _names(hand)})
+
+    def confirm_discard_deck(self) -> bool:
+        return self._bool_decision("/confirm_discard_deck")
+
+    def choose_card_to_receive_in_discard(self, possible_cards: list[int]) -> int:
+        payload = {"possible_cards": [CARD_NAMES[card].value for card in possible_cards]}
+        return self._card_decision("/choose_card_to_receive_in_discard", payload)
+
+    def choose_card_to_receive_in_deck(self, possible_cards: list[int]) -> int:
+        payload = {"possible_cards": [CARD_NAMES[card].value for card in possible_cards]}
+        return self._card_decision("/choose_card_to_receive_in_deck", payload)
+
+    def skip_card_reception_in_hand(self, card: int, hand: list[int]) -> bool:
+        payload = {"card_name": CARD_NAMES[card].value, "hand": _names(hand)}
+        return self._bool_decision("/skip_card_reception_in_hand", payload)
+
+    def trash_money_card_for_better_money_card(self, money_in_hand: list[int]) -> int | None:
+        payload = {"money_in_hand": [CARD_NAMES[card].value for card in money_in_hand]}
+        return self._card_decision("/trash_money_card_for_better_money_card", payload)
+
+
+#####################################################
+# Load test
+#####################################################
+
+
+def open_client(url: str | None) -> httpx.Client:
+    """Client for a server URL, or for the bot app in-process when url is None, shared by every game."""
+    if url is not None:
+        return httpx.Client(base_url=url, timeout=ARBITER_TIMEOUT_SECONDS * 5)
+
+    from fastapi.testclient import TestClient
+
+    from BOOT import app
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def play_game(
+    client: httpx.Client,
+    report: LoadReport,
+    game_number: int,
+    opponents: list[str],
+    seed: int,
+    run_id: str,
+) -> None:
+    """Play one game with the bot at a rotating seat."""
+    name = client.get("/name").json()
+    bot = RemoteBotPlayer(client, report, name)
+    players: list[SimulatedPlayer] = [STRATEGIES[opponent]() for opponent in opponents]
+    bot_index = game_number % (len(players) + 1)
+    players.insert(bot_index, bot)
+    simulation = Simulation(players, seed=seed + game_number)
+    simulation.game_id = f"{run_id}-{game_number}"
+    result = simulation.run()
+    report.game_over(
+        simulation.game_id,
+        simulation.players[bot_index].eliminated,
+        bot_index in result.winners,
+        bot.last_decision,
+    )
+
+
+def run_load_test(
+    nb_games: int,
+    concurrency: int,
+    url: str | None = None,
+    opponents: list[str] | None = None,
+    seed: int = 0,
+) -> LoadReport:
+    """Play nb_games games against the bot, concurrency of them at a time."""
+    opponents = opponents or ["big_money"]
+    for opponent in opponents:
+        if opponent not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {opponent!r}")
+    report = LoadReport()
+    run_id = f"fake-{int(time.time() * 1000)}"
+    # One client for the whole run, so that the in-process app starts (lifespan, warm-up) only once
+    with open_client(url) as client:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(play_game, client, report, game_number, opponents, seed, run_id)
+                for game_number in range(nb_games)
+            ]
+            for future in futures:
+                future.result()
+        report.elapsed = time.perf_counter() - start
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the bot with a local fake arbiter")
+    parser.add_argument("--url", default=None, help="bot server URL, in-process ASGI app when omitted")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--opponents", nargs="*", default=["big_money"], help=f"strategies among {sorted(STRATEGIES)}")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for opponent in args.opponents:
+        if opponent not in STRATEGIES:
+            parser.error(f"unknown strategy {opponent!r}")
+
+    report = run_load_test(args.games, args.concurrency, args.url, args.opponents, args.seed)
+    print(report.summary())
+    raise SystemExit(0 if report.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Lean serving path for Rhum & Ruin bot.
+With RHUM_FAST_PATH=on, decisions are answered with JSON bodies assembled
+directly as bytes instead of response models validated and serialized by
+FastAPI, and /play reads its Game payload lazily: the raw body is decoded
+once, by orjson when installed or else by pydantic's Rust parser instead
+of the standard library one, and only the players and the stock the
+strategy reads are built, as plain slotted objects rather than models.
+
+Run as a script, it measures both ways of handling a /play request.
+"""
+
+import argparse
+import json
+import os
+import time
+from functools import lru_cache
+
+import pydantic_core
+from dopynion.data_model import Game
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # Optional, pydantic's encoder is used instead
+    orjson = None
+
+FAST_PATH_ENV = "RHUM_FAST_PATH"
+# Game identifiers whose encoded prefix is kept, about the games played at once
+GAME_ID_CACHE_SIZE = 1024
+
+
+def fast_path_enabled() -> bool:
+    return os.environ.get(FAST_PATH_ENV, "off") == "on"
+
+
+#####################################################
+# JSON encoding
+#####################################################
+
+
+def loads(body: bytes | str):
+    return orjson.loads(body) if orjson is not None else pydantic_core.from_json(body)
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content) if orjson is not None else pydantic_core.to_json(content)
+
+
+@lru_cache(maxsize=GAME_ID_CACHE_SIZE)
+def _game_id_prefix(game_id: str) -> bytes:
+    return b'{"game_id":' + dumps(game_id)
+
+
+@lru_cache(maxsize=None)
+def _decision_suffix(decision: str | bool) -> bytes:
+    # Decisions are a few dozen strings and booleans, all encoded once
+    return b',"decision":' + dumps(decision if isinstance(decision, bool) else str(decision)) + b"}"
+
+
+def decision_body(game_id: str, decision: str | bool) -> bytes:
+    """JSON body of a DopynionResponse*, assembled from encoded parts."""
+    return _game_id_prefix(game_id) + _decision_suffix(decision)
+
+
+def decision_response(game_id: str, decision: str | bool) -> Response:
+    return Response(content=decision_body(game_id, decision), media_type="application/json")
+
+
+#####################################################
+# Lazy Game payload
+#####################################################
+
+
+class CardsView:
+    """Card quantities of a payload, card names kept as plain strings (CardName is a StrEnum)."""
+
+    __slots__ = ("quantities",)
+
+    def __init__(self, quantities: dict[str, int]):
+        self.quantities = quantities
+
+
+class PlayerView:
+    __slots__ = ("name", "hand", "score")
+
+    def __init__(self, name: str, hand: CardsView | None, score: int):
+        self.name = name
+        self.hand = hand
+        self.score = score
+
+
+class GameView:
+    """Attribute-compatible stand-in for the Game model, cheaper to build than models, even unvalidated."""
+
+    __slots__ = ("finished", "players", "stock")
+
+    def __init__(self, finished: bool, players: list[PlayerView], stock: CardsView):
+        self.finished = finished
+        self.players = players
+        self.stock = stock
+
+
+def _cards(data: dict | None) -> CardsView | None:
+    return None if data is None else CardsView(data.get("quantities", {}))
+
+
+def game_from_body(body: bytes) -> GameView:
+    """Game of a /play body, built without validation from the fields the strategy reads."""
+    data = loads(body)
+    players = [PlayerView(player["name"], _cards(player.get("hand")), player["score"]) for player in data["players"]]
+    return GameView(data["finished"], players, _cards(data["stock"]))
+
+
+async def lazy_game(request: Request) -> GameView:
+    """FastAPI dependency reading the /play body with game_from_body."""
+    try:
+        return game_from_body(await request.body())
+    except (ValueError, KeyError, TypeError, AttributeError) as exc:
+        raise HTTPException(status_code=422, detail=f"Invalid Game payload: {exc}") from exc
+
+
+#####################################################
+# Microbenchmark
+#####################################################
+
+
+def sample_play_body(nb_players: int = 4, seed: int = 0) -> bytes:
+    """The /play body of the first turn of a simulated game."""
+    from simulator import BigMoneyPlayer, Simulation
+
+    simulation = Simulation([BigMoneyPlayer() for _ in range(nb_players)], seed=seed)
+    return simulation.game_view(0).model_dump_json().encode()
+
+
+def _per_request_seconds(handle, body: bytes, nb_requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(nb_requests):
+        handle(body)
+    return (time.perf_counter() - start) / nb_requests
+
+
+def benchmark(nb_requests: int = 20_000) -> dict[str, float]:
+    """Microseconds per /play request spent parsing the body and encoding the answer, both ways."""
+    from BOOT import DopynionResponseStr
+
+    def standard(body: bytes) -> Response:
+        # What FastAPI does for `game: Game` and a DopynionResponseStr return annotation
+        Game.model_validate(json.loads(body))
+        response = DopynionResponseStr(game_id="benchmark-game", decision="BUY GOLD")
+        return JSONResponse(DopynionResponseStr.model_validate(response).model_dump(mode="json"))
+
+    def fast(body: bytes) -> Response:
+        game_from_body(body)
+        return decision_response("benchmark-game", "BUY GOLD")
+
+    body = sample_play_body()
+    results = {}
+    for label, handle in (("standard", standard), ("fast path", fast)):
+        _per_request_seconds(handle, body, nb_requests // 10)  # Warm up
+        results[label] = 1e6 * _per_request_seconds(handle, body, nb_requests)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-request cost of the standard and lean serving paths")
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+    results = benchmark(args.requests)
+    print(f"JSON codec: {'orjson' if orjson is not None else 'pydantic_core'}")
+    for label, microseconds in results.items():
+        print(f"{label:>10}: {microseconds:7.1f} µs per /play request")
+    print(f"gain: {results['standard'] - results['fast path']:.1f} µs ({results['standard'] / results['fast path']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,87 @@
 """
 Game state management for Rhum & Ruin bot.
 Handles per-game state tracking for multiple simultaneous games.
+
+Two storage backends, chosen with RHUM_STATE_BACKEND:
+- memory (default): states live in the process, for a single worker
+- sqlite: states are pickled in a SQLite database in WAL mode (RHUM_STATE_DB),
+  shared by every worker of `uvicorn BOOT:app --workers N`
+
+Within a process, the requests of one game are handled one at a time and
+in arrival order through GameLocks, while other games run concurrently.
+Across the workers of the sqlite backend, each session leases its game.
 """
 
+import asyncio
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+
+from bot_logging import logger
+from deck_tracker import DeckTracker
+from opponent_tracker import OpponentTracker
+
+# Bounds of the game state store, so that a bot running a whole tournament keeps flat memory
+MAX_GAME_STATES = 1000
+GAME_STATE_TTL_SECONDS = 2 * 60 * 60
+
+STATE_BACKEND_ENV = "RHUM_STATE_BACKEND"
+STATE_DB_ENV = "RHUM_STATE_DB"
+DEFAULT_STATE_DB = "game_states.sqlite3"
+# Expired and extra states are evicted from the database every this many writes
+SQLITE_EVICTION_INTERVAL = 100
+# A session holds its game for at most this long, the lease of a crashed worker then expires
+SQLITE_LEASE_SECONDS = 10.0
+# Wait between two attempts to take the lease of a game held by another worker
+SQLITE_LEASE_POLL_SECONDS = (0.001, 0.02)
+
+
 class GameState:
     """Class to track the state of a specific game."""
     
     def __init__(self, game_id: str):
         self.game_id = game_id
         self.purchases_remaining_this_turn = 1
+        self.turn = 0
+        # Position of our player in game.players, resolved on the first /play
+        self.our_player_index: int | None = None
+        # Piles seen in the stock, which omits the piles once they are empty
+        self.known_piles: set[int] = set()
+        # Cards we own and where they are, updated incrementally on each /play
+        self.deck = DeckTracker()
+        # What the other players did, inferred from the /play snapshots
+        self.opponents = OpponentTracker()
         # Future: Add other game-specific state variables here
         # self.actions_remaining_this_turn = 1
         # self.money_available = 0
-        # self.cards_bought_this_game = []
     
     def reset_turn(self):
         """Reset turn-specific counters."""
         self.purchases_remaining_this_turn = 1
-        print(f"🔄 Turn reset for game {self.game_id}: purchases = {self.purchases_remaining_this_turn}")
+        self.turn += 1
+        logger.debug(
+            "🔄 Turn reset for game %s: purchases = %d",
+            self.game_id,
+            self.purchases_remaining_this_turn,
+            extra={"game_id": self.game_id},
+        )
     
     def use_purchase(self):
         """Consume one purchase and return if successful."""
         if self.purchases_remaining_this_turn > 0:
             self.purchases_remaining_this_turn -= 1
-            print(f"🛒 Purchase used for game {self.game_id}: {self.purchases_remaining_this_turn} remaining")
+            logger.debug(
+                "🛒 Purchase used for game %s: %d remaining",
+                self.game_id,
+                self.purchases_remaining_this_turn,
+                extra={"game_id": self.game_id},
+            )
             return True
         return False
     
@@ -32,13 +90,315 @@ class GameState:
         return self.purchases_remaining_this_turn > 0
 
 
-# Dictionary to store game states by game_id
-game_states: dict[str, GameState] = {}
+class GameStateStore:
+    """Bounded storage of game states by game_id.
+
+    States are released explicitly at the end of a game, evicted after
+    staying idle for ttl seconds (abandoned games), and the least recently
+    used ones are evicted when more than max_size games are stored.
+    """
+
+    # Sessions never wait on storage, so they may run on the event loop
+    blocking = False
+
+    def __init__(
+        self,
+        max_size: int = MAX_GAME_STATES,
+        ttl: float = GAME_STATE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        # Ordered from least to most recently used, with the last access time
+        self._states: OrderedDict[str, tuple[GameState, float]] = OrderedDict()
+        # Optional journal.GameJournal told about every change, to survive restarts
+        self.journal = None
+        # Sessions of different games run on several threads at once
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self._states
+
+    @property
+    def size(self) -> int:
+        """Number of game states currently stored."""
+        return len(self._states)
+
+    def get(self, game_id: str) -> GameState:
+        """Get or create the state of a game, marking it as recently used."""
+        with self._lock:
+            now = self.clock()
+            entry = self._states.get(game_id)
+            if entry is None:
+                game_state = GameState(game_id)
+                logger.debug("🆕 Created new game state for game %s", game_id, extra={"game_id": game_id})
+            else:
+                game_state = entry[0]
+                self._states.move_to_end(game_id)
+            self._states[game_id] = (game_state, now)
+            self._evict(now)
+            return game_state
+
+    @contextmanager
+    def session(self, game_id: str) -> Iterator[GameState]:
+        """Game state to read and update, the object itself being stored."""
+        game_state = self.get(game_id)
+        yield game_state
+        if self.journal is not None:
+            self.journal.record_state(game_state)
+
+    def release(self, game_id: str) -> bool:
+        """Forget the state of a finished game, return whether it was stored."""
+        with self._lock:
+            if self.journal is not None:
+                self.journal.record_release(game_id)
+            return self._states.pop(game_id, None) is not None
+
+    def restore(self, game_states: list[GameState]) -> None:
+        """Store game states recovered after a restart, as just used."""
+        with self._lock:
+            now = self.clock()
+            for game_state in game_states:
+                self._states[game_state.game_id] = (game_state, now)
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        # Least recently used states come first, so expired ones are at the front
+        while self._states:
+            game_id, (_, last_access) = next(iter(self._states.items()))
+            if now - last_access < self.ttl and len(self._states) <= self.max_size:
+                break
+            del self._states[game_id]
+            if self.journal is not None:
+                self.journal.record_release(game_id)
+            logger.info("🧹 Evicted game state for game %s (%d games stored)", game_id, len(self._states))
+
+
+class GameLocks:
+    """One asyncio lock per game with requests in flight.
+
+    asyncio locks are fair, so the requests of a game run in arrival order.
+    A lock is dropped once no request holds or awaits it. Meant for the
+    event loop thread only.
+    """
+
+    def __init__(self):
+        self._locks: dict[str, tuple[asyncio.Lock, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, game_id: str) -> AsyncIterator[None]:
+        lock, users = self._locks.get(game_id) or (asyncio.Lock(), 0)
+        self._locks[game_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[game_id]
+            if users == 1:
+                del self._locks[game_id]
+            else:
+                self._locks[game_id] = (lock, users - 1)
+
+
+class GameStateConflictError(Exception):
+    """Raised when two requests updated the same game at the same time."""
+
+
+class SQLiteGameStateStore:
+    """Game states shared between processes through a SQLite database.
+
+    A session first takes a lease on its game, waiting while a session of
+    another worker holds it, so that the requests of a game are serialized
+    across processes while other games are never blocked by a slow decision.
+    The state is then read without locking and written back only if its
+    version did not change in between, which only fails when a lease expired.
+    """
+
+    # Sessions wait on other workers and on the database, so they run on the strategy threads
+    blocking = True
+
+    def __init__(
+        self,
+        path: str = DEFAULT_STATE_DB,
+        max_size: int = MAX_GAME_STATES,
+        ttl: float = GAME_STATE_TTL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        # Wall clock, shared by every process using the database
+        self.clock = clock
+        self._local = threading.local()
+        self._nb_writes = 0
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS game_states ("
+            "game_id TEXT PRIMARY KEY, version INTEGER NOT NULL, "
+            "last_access REAL NOT NULL, state BLOB NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS game_states_last_access ON game_states (last_access)")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS game_leases ("
+            "game_id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, in autocommit mode: every statement is its own transaction
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, game_id: str) -> bool:
+        row = self._connection().execute("SELECT 1 FROM game_states WHERE game_id = ?", (game_id,)).fetchone()
+        return row is not None
+
+    @property
+    def size(self) -> int:
+        """Number of game states currently stored."""
+        return self._connection().execute("SELECT COUNT(*) FROM game_states").fetchone()[0]
+
+    def get(self, game_id: str) -> GameState:
+        """Copy of the state of a game, changes to it are only stored through session()."""
+        with self.session(game_id) as game_state:
+            return game_state
+
+    @contextmanager
+    def session(self, game_id: str) -> Iterator[GameState]:
+        """Game state to read and update, written back atomically at the end of the block."""
+        connection = self._connection()
+        with self._lease(connection, game_id):
+            row = connection.execute(
+                "SELECT version, state FROM game_states WHERE game_id = ?", (game_id,)
+            ).fetchone()
+            if row is None:
+                version = 0
+                game_state = GameState(game_id)
+                logger.debug("🆕 Created new game state for game %s", game_id, extra={"game_id": game_id})
+            else:
+                version = row[0]
+                game_state = pickle.loads(row[1])
+            yield game_state
+            self._write(connection, game_id, game_state, version)
+
+    @contextmanager
+    def _lease(self, connection: sqlite3.Connection, game_id: str) -> Iterator[None]:
+        """Hold a game against the sessions of the other workers, reentrant within a thread."""
+        leases = self._local.__dict__.setdefault("leases", {})
+        if game_id in leases:
+            leases[game_id] += 1
+            try:
+                yield
+            finally:
+                leases[game_id] -= 1
+            return
+        owner = uuid.uuid4().hex
+        delay, max_delay = SQLITE_LEASE_POLL_SECONDS
+        while True:
+            now = time.time()
+            acquired = connection.execute(
+                "INSERT INTO game_leases (game_id, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT (game_id) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                "WHERE game_leases.expires < ?",
+                (game_id, owner, now + SQLITE_LEASE_SECONDS, now),
+            ).rowcount
+            if acquired:
+                break
+            time.sleep(delay)
+            delay = min(2 * delay, max_delay)
+        leases[game_id] = 1
+        try:
+            yield
+        finally:
+            del leases[game_id]
+            connection.execute("DELETE FROM game_leases WHERE game_id = ? AND owner = ?", (game_id, owner))
+
+    def _write(self, connection: sqlite3.Connection, game_id: str, game_state: GameState, version: int) -> None:
+        state = pickle.dumps(game_state, pickle.HIGHEST_PROTOCOL)
+        now = self.clock()
+        if version == 0:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO game_states (game_id, version, last_access, state) VALUES (?, 1, ?, ?)",
+                (game_id, now, state),
+            )
+        else:
+            cursor = connection.execute(
+                "UPDATE game_states SET version = version + 1, last_access = ?, state = ? "
+                "WHERE game_id = ? AND version = ?",
+                (now, state, game_id, version),
+            )
+        if cursor.rowcount != 1:
+            raise GameStateConflictError(f"Game {game_id} was updated by another request")
+        self._nb_writes += 1
+        if self._nb_writes % SQLITE_EVICTION_INTERVAL == 0:
+            self._evict(connection, now)
+
+    def release(self, game_id: str) -> bool:
+        """Forget the state of a finished game, return whether it was stored."""
+        return self._connection().execute("DELETE FROM game_states WHERE game_id = ?", (game_id,)).rowcount > 0
+
+    def evict(self) -> None:
+        """Remove the expired states, then the least recently used ones over max_size."""
+        self._evict(self._connection(), self.clock())
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        expired = connection.execute("DELETE FROM game_states WHERE last_access <= ?", (now - self.ttl,)).rowcount
+        extra = connection.execute(
+            "DELETE FROM game_states WHERE game_id IN "
+            "(SELECT game_id FROM game_states ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_size,),
+        ).rowcount
+        if expired or extra:
+            logger.info("🧹 Evicted %d expired and %d extra game states", expired, extra)
+
+
+def create_game_state_store() -> GameStateStore | SQLiteGameStateStore:
+    """Storage backend selected through the environment."""
+    backend = os.environ.get(STATE_BACKEND_ENV, "memory").lower()
+    if backend == "memory":
+        return GameStateStore()
+    if backend == "sqlite":
+        return SQLiteGameStateStore(os.environ.get(STATE_DB_ENV, DEFAULT_STATE_DB))
+    raise ValueError(f"Unknown {STATE_BACKEND_ENV} {backend!r}, expected memory or sqlite")
+
+
+# Store of game states by game_id
+game_states = create_game_state_store()
 
 
 def get_game_state(game_id: str) -> GameState:
     """Get or create game state for a specific game."""
-    if game_id not in game_states:
-        game_states[game_id] = GameState(game_id)
-        print(f"🆕 Created new game state for game {game_id}")
-    return game_states[game_id]
\ No newline at end of file
+    return game_states.get(game_id)
+
+
+# Locks of the games with requests in flight, in this process
+game_locks = GameLocks()
+
+
+def game_lock(game_id: str):
+    """Async context manager handling a request alone among those of its game."""
+    return game_locks.hold(game_id)
+
+
+def game_state_session(game_id: str):
+    """Context manager giving the state of a game and storing its updates."""
+    return game_states.session(game_id)
+
+
+def release_game_state(game_id: str) -> bool:
+    """Release the game state of a finished game."""
+    return game_states.release(game_id)
@@ -0,0 +1,243 @@
+"""
+Crash-safe game state journal for Rhum & Ruin bot.
+Append-only binary journal of the in-memory game states, written in batches
+by a background thread, compacted into periodic snapshots, and replayed on
+startup so that a restarted bot resumes every live game where it was.
+
+Each record holds the compact state of one game after a request changed it
+(or its release), so replaying is reading records in order, the last one of
+a game winning. Enabled by setting RHUM_JOURNAL_DIR.
+"""
+
+import atexit
+import os
+import pickle
+import queue
+import struct
+import threading
+import time
+from pathlib import Path
+
+from bot_logging import logger
+from cards import NB_CARD_TYPES
+from game_state import GameState, GameStateStore
+
+JOURNAL_DIR_ENV = "RHUM_JOURNAL_DIR"
+JOURNAL_FILE = "journal.bin"
+SNAPSHOT_FILE = "snapshot.bin"
+FLUSH_INTERVAL_SECONDS = 0.05
+SNAPSHOT_INTERVAL_SECONDS = 60.0
+
+STATE_RECORD = 1
+RELEASE_RECORD = 2
+
+# Record header: type, game id length, payload length
+HEADER = struct.Struct("<BHH")
+# Game state: turn, purchases left, our player index (-1 unknown), known piles
+# bit mask, hirelings, score, then the five deck zones as one byte per card type,
+# followed by the pickled opponent tracker
+STATE = struct.Struct(f"<HBbQBh{5 * NB_CARD_TYPES}B")
+
+
+def encode_state(game_state: GameState) -> bytes:
+    deck = game_state.deck
+    known_piles = 0
+    for card in game_state.known_piles:
+        known_piles |= 1 << card
+    player_index = game_state.our_player_index
+    return STATE.pack(
+        game_state.turn,
+        game_state.purchases_remaining_this_turn,
+        -1 if player_index is None else player_index,
+        known_piles,
+        deck.hirelings,
+        deck.score,
+        *deck.owned, *deck.draw_pile, *deck.hand, *deck.in_play, *deck.discard,
+    ) + pickle.dumps(game_state.opponents, pickle.HIGHEST_PROTOCOL)
+
+
+def decode_state(game_id: str, payload: bytes) -> GameState:
+    turn, purchases, player_index, known_piles, hirelings, score, *zones = STATE.unpack_from(payload)
+    game_state = GameState(game_id)
+    game_state.turn = turn
+    game_state.purchases_remaining_this_turn = purchases
+    game_state.our_player_index = None if player_index < 0 else player_index
+    game_state.known_piles = {card for card in range(NB_CARD_TYPES) if known_piles >> card & 1}
+    deck = game_state.deck
+    deck.hirelings = hirelings
+    deck.score = score
+    for position, zone in enumerate(("owned", "draw_pile", "hand", "in_play", "discard")):
+        setattr(deck, zone, zones[position * NB_CARD_TYPES:(position + 1) * NB_CARD_TYPES])
+    if len(payload) > STATE.size:
+        game_state.opponents = pickle.loads(payload[STATE.size:])
+    return game_state
+
+
+def encode_record(record_type: int, game_id: str, payload: bytes = b"") -> bytes:
+    encoded_id = game_id.encode()
+    return HEADER.pack(record_type, len(encoded_id), len(payload)) + encoded_id + payload
+
+
+def apply_records(data: bytes, states: dict[str, bytes]) -> int:
+    """Apply journal or snapshot records to the state payloads by game, return the bytes read."""
+    position = 0
+    while position + HEADER.size <= len(data):
+        record_type, id_length, payload_length = HEADER.unpack_from(data, position)
+        start = position + HEADER.size
+        end = start + id_length + payload_length
+        if end > len(data):
+            # Torn write at the end of the journal, the record never completed
+            break
+        game_id = data[start:start + id_length].decode()
+        if record_type == STATE_RECORD:
+            states[game_id] = data[start + id_length:end]
+        else:
+            states.pop(game_id, None)
+        position = end
+    return position
+
+
+class GameJournal:
+    """Batched journal writer, snapshots included, fed by the request handlers."""
+
+    def __init__(
+        self,
+        directory: Path,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+        snapshot_interval: float = SNAPSHOT_INTERVAL_SECONDS,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        # Last payload journaled per game, to skip requests that changed nothing
+        self._last_payloads: dict[str, bytes] = {}
+        # Live states as of the last write, the content of the next snapshot
+        self._live: dict[str, bytes] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._file = None
+
+    @property
+    def journal_path(self) -> Path:
+        return self.directory / JOURNAL_FILE
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.directory / SNAPSHOT_FILE
+
+    # Request side: only encodes and queues
+
+    def record_state(self, game_state: GameState) -> None:
+        payload = encode_state(game_state)
+        if self._last_payloads.get(game_state.game_id) == payload:
+            return
+        self._last_payloads[game_state.game_id] = payload
+        self._queue.put(encode_record(STATE_RECORD, game_state.game_id, payload))
+
+    def record_release(self, game_id: str) -> None:
+        self._last_payloads.pop(game_id, None)
+        self._queue.put(encode_record(RELEASE_RECORD, game_id))
+
+    # Startup
+
+    def replay(self) -> list[GameState]:
+        """Game states from the last snapshot and the journal written after it."""
+        start = time.perf_counter()
+        self._live = {}
+        if self.snapshot_path.exists():
+            apply_records(self.snapshot_path.read_bytes(), self._live)
+        if self.journal_path.exists():
+            data = self.journal_path.read_bytes()
+            valid_length = apply_records(data, self._live)
+            if valid_length < len(data):
+                logger.warning("✂️ Dropped %d bytes of incomplete journal record", len(data) - valid_length)
+                os.truncate(self.journal_path, valid_length)
+        self._last_payloads = dict(self._live)
+        game_states = [decode_state(game_id, payload) for game_id, payload in self._live.items()]
+        logger.info(
+            "📼 Replayed %d games from the journal in %.1fms",
+            len(game_states),
+            1000 * (time.perf_counter() - start),
+        )
+        return game_states
+
+    # Background writer
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._file = self.journal_path.open("ab")
+        self._thread = threading.Thread(target=self._run, name="game-journal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def close(self) -> None:
+        """Write the queued records and stop the background writer."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+        self._file = None
+
+    def _run(self) -> None:
+        last_snapshot = time.monotonic()
+        while not self._stop.is_set():
+            self._stop.wait(self.flush_interval)
+            self.flush()
+            if time.monotonic() - last_snapshot >= self.snapshot_interval:
+                self.snapshot()
+                last_snapshot = time.monotonic()
+        self.flush()
+
+    def flush(self) -> None:
+        """Write every queued record at once, then make it durable."""
+        if self._file is None:
+            return
+        records = []
+        while True:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not records:
+            return
+        data = b"".join(records)
+        apply_records(data, self._live)
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def snapshot(self) -> None:
+        """Write the live states to a new snapshot and start an empty journal."""
+        self.flush()
+        temporary_path = self.snapshot_path.with_suffix(".tmp")
+        with temporary_path.open("wb") as snapshot_file:
+            snapshot_file.write(b"".join(
+                encode_record(STATE_RECORD, game_id, payload) for game_id, payload in self._live.items()
+            ))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary_path, self.snapshot_path)
+        self._file.close()
+        self._file = self.journal_path.open("wb")
+        logger.info("📸 Snapshot of %d games written", len(self._live))
+
+
+def attach_journal(store: GameStateStore, directory: Path) -> GameJournal:
+    """Restore the journaled games into the store, then journal its changes."""
+    journal = GameJournal(directory)
+    store.restore(journal.replay())
+    store.journal = journal
+    journal.start()
+    return journal
+
+
+def attach_journal_from_env(store: GameStateStore) -> GameJournal | None:
+    directory = os.environ.get(JOURNAL_DIR_ENV)
+    if not directory or not isinstance(store, GameStateStore):
+        return None
+    return attach_journal(store, Path(directory))
@@ -0,0 +1,296 @@
+"""
+Monte Carlo lookahead for Rhum & Ruin bot.
+Optional search mode of /play: every legal buy, END_TURN included, is scored
+by fast randomized playouts of our tracked deck, run on a worker pool until a
+hard deadline so that /play always answers before the arbiter's timeout.
+When too few playouts complete in time, the buy policy decides instead.
+
+Playouts are solitaire: from the next turn on, our deck buys with the Big
+Money policy for a few turns, at most one action played per turn, and the
+candidate reaching the best average score wins. Enabled by setting
+RHUM_PLAY_MODE=lookahead.
+"""
+
+import os
+import random
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from dopynion.data_model import Game
+
+from bot_logging import logger
+from buy_policy import BIG_MONEY_POLICY, END_TURN, BuyPolicy
+from cards import (
+    CARD_NAMES,
+    CARDS,
+    COPPER,
+    COST,
+    IS_ACTION,
+    MONEY,
+    NB_CARD_TYPES,
+    PROVINCE,
+    card_index,
+    counts_of,
+    score_of,
+)
+from game_state import GameState
+from metrics import ARBITER_TIMEOUT_SECONDS, metrics
+from strategy import choose_play
+from strategy_helpers import count_empty_piles, get_our_hand_counts, money_in_hand
+
+PLAY_MODE_ENV = "RHUM_PLAY_MODE"
+BUDGET_ENV = "RHUM_LOOKAHEAD_BUDGET"
+WORKERS_ENV = "RHUM_LOOKAHEAD_WORKERS"
+POOL_ENV = "RHUM_LOOKAHEAD_POOL"
+
+# Search time of one decision, leaving the rest of the timeout to the network
+DEFAULT_BUDGET_SECONDS = 0.3 * ARBITER_TIMEOUT_SECONDS
+# Time given to the workers to hand their results back after the deadline
+RESULT_GRACE_SECONDS = 0.02
+# Turns played by each playout after the current one
+PLAYOUT_TURNS = 15
+# Below this many playouts for one candidate, the search is not trusted
+MIN_PLAYOUTS_PER_CANDIDATE = 8
+HAND_SIZE = 5
+
+
+class Position:
+    """What a playout starts from, plain lists to be cheap to send to a worker."""
+
+    __slots__ = ("owned", "draw_pile", "discard", "stock", "piles", "hirelings", "turn")
+
+    def __init__(
+        self,
+        owned: list[int],
+        draw_pile: list[int],
+        discard: list[int],
+        stock: list[int],
+        piles: tuple[int, ...],
+        hirelings: int,
+        turn: int,
+    ):
+        self.owned = owned
+        # Cards of the draw pile and of the discard, one entry per card
+        self.draw_pile = draw_pile
+        self.discard = discard
+        self.stock = stock
+        self.piles = piles
+        self.hirelings = hirelings
+        self.turn = turn
+
+    @classmethod
+    def from_game(cls, game: Game, game_state: GameState) -> "Position":
+        """Position at the end of our current turn, before its buy."""
+        deck = game_state.deck
+        stock = counts_of(game.stock)
+        count_empty_piles(stock, game_state)
+        # The hand and the cards in play are discarded at the end of the turn
+        discard = [deck.discard[card] + deck.hand[card] + deck.in_play[card] for card in range(NB_CARD_TYPES)]
+        return cls(
+            list(deck.owned),
+            _expand(deck.draw_pile),
+            _expand(discard),
+            stock,
+            tuple(sorted(game_state.known_piles)),
+            deck.hirelings,
+            game_state.turn,
+        )
+
+
+def _expand(counts: list[int]) -> list[int]:
+    return [card for card, quantity in enumerate(counts) for _ in range(max(quantity, 0))]
+
+
+#####################################################
+# Playouts (run in the workers)
+#####################################################
+
+
+# Preference between the actions of a hand, lowest first: most cards drawn, then most money
+_ACTION_RANK: tuple[tuple[int, int], ...] = tuple((-card.plus_cards, -card.plus_money) for card in CARDS)
+_decision_cards: dict[str, int | None] = {END_TURN: None}
+
+
+def _decision_card(decision: str) -> int | None:
+    card = _decision_cards.get(decision)
+    if card is None and decision not in _decision_cards:
+        card = _decision_cards[decision] = card_index(decision.partition(" ")[2])
+    return card
+
+
+def playout(rng: random.Random, position: Position, candidate: int | None, policy: BuyPolicy) -> int:
+    """Our score after buying the candidate now and following the policy for a few turns."""
+    stock = list(position.stock)
+    owned = list(position.owned)
+    draw_pile = list(position.draw_pile)
+    discard = list(position.discard)
+    rng.shuffle(draw_pile)
+    if candidate is not None:
+        stock[candidate] -= 1
+        owned[candidate] += 1
+        discard.append(candidate)
+    piles = position.piles
+    hand: list[int] = []
+
+    def draw(nb_cards: int) -> None:
+        nonlocal draw_pile, discard
+        for _ in range(nb_cards):
+            if not draw_pile:
+                if not discard:
+                    return
+                draw_pile, discard = discard, draw_pile
+                rng.shuffle(draw_pile)
+            hand.append(draw_pile.pop())
+
+    turn = position.turn
+    for _ in range(PLAYOUT_TURNS):
+        empty_piles = sum(1 for card in piles if not stock[card])
+        if not stock[PROVINCE] or empty_piles >= 3:
+            break
+        turn += 1
+        hand.clear()
+        draw(HAND_SIZE + position.hirelings)
+        money = 0
+        actions = [card for card in hand if IS_ACTION[card]]
+        if actions:
+            card = min(actions, key=_ACTION_RANK.__getitem__)
+            hand.remove(card)
+            discard.append(card)
+            draw(CARDS[card].plus_cards)
+            money += CARDS[card].plus_money
+        money += sum(MONEY[card] for card in hand)
+        card = _decision_card(policy.decide(stock, money, hand.count(COPPER), 1, empty_piles, turn))
+        if card is not None:
+            stock[card] -= 1
+            owned[card] += 1
+            discard.append(card)
+        discard.extend(hand)
+    return score_of(owned)
+
+
+def run_playouts(
+    position: Position,
+    candidates: tuple[int | None, ...],
+    deadline: float,
+    seed: int,
+    policy: BuyPolicy = BIG_MONEY_POLICY,
+) -> tuple[list[int], list[int]]:
+    """Total score and number of playouts per candidate, candidates in turn, until the deadline."""
+    rng = random.Random(seed)
+    totals = [0] * len(candidates)
+    counts = [0] * len(candidates)
+    # The deadline is wall-clock time, the only clock shared with the parent process
+    while True:
+        for position_in_candidates, candidate in enumerate(candidates):
+            if time.time() >= deadline:
+                return totals, counts
+            totals[position_in_candidates] += playout(rng, position, candidate, policy)
+            counts[position_in_candidates] += 1
+
+
+#####################################################
+# Search
+#####################################################
+
+
+class Lookahead:
+    """Playout search of the best buy, on a worker pool and within a time budget."""
+
+    def __init__(
+        self,
+        budget: float = DEFAULT_BUDGET_SECONDS,
+        nb_workers: int | None = None,
+        executor: Executor | None = None,
+        use_processes: bool = True,
+    ):
+        self.budget = budget
+        self.nb_workers = nb_workers or os.cpu_count() or 1
+        self._executor = executor
+        self.use_processes = use_processes
+        self._rng = random.Random()
+
+    @property
+    def executor(self) -> Executor:
+        # Created on first use, so that importing BOOT never forks
+        if self._executor is None:
+            pool = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self._executor = pool(max_workers=self.nb_workers)
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def candidates(self, game: Game, game_state: GameState) -> tuple[int | None, ...]:
+        """END_TURN (None) and every card we can afford in the stock."""
+        hand = get_our_hand_counts(game, game_state)
+        if not game_state.can_purchase() or not hand:
+            return ()
+        money = money_in_hand(hand)
+        stock = counts_of(game.stock)
+        return (None,) + tuple(card for card in range(NB_CARD_TYPES) if stock[card] and COST[card] <= money)
+
+    def decide(self, game: Game, game_state: GameState) -> str:
+        """Best candidate by average playout score, or the buy policy's decision without enough playouts."""
+        extra = {"game_id": game_state.game_id}
+        candidates = self.candidates(game, game_state)
+        if len(candidates) <= 1:
+            return choose_play(game, game_state)
+        start = time.perf_counter()
+        position = Position.from_game(game, game_state)
+        deadline = time.time() + self.budget
+        futures = [
+            self.executor.submit(run_playouts, position, candidates, deadline, self._rng.getrandbits(32))
+            for _ in range(self.nb_workers)
+        ]
+        done, not_done = wait(futures, timeout=self.budget + RESULT_GRACE_SECONDS)
+        for future in not_done:
+            future.cancel()
+        totals = [0] * len(candidates)
+        counts = [0] * len(candidates)
+        for future in done:
+            if future.exception() is not None:
+                logger.warning("⚠️ Playout worker failed: %s", future.exception(), extra=extra)
+                continue
+            worker_totals, worker_counts = future.result()
+            for position_in_candidates in range(len(candidates)):
+                totals[position_in_candidates] += worker_totals[position_in_candidates]
+                counts[position_in_candidates] += worker_counts[position_in_candidates]
+
+        nb_playouts = sum(counts)
+        fallback = min(counts) < MIN_PLAYOUTS_PER_CANDIDATE
+        metrics.observe_search(nb_playouts, fallback)
+        if fallback:
+            logger.warning(
+                "⌛ Lookahead budget exhausted after %d playouts, falling back to the buy policy",
+                nb_playouts,
+                extra=extra,
+            )
+            return choose_play(game, game_state)
+
+        averages = [total / count for total, count in zip(totals, counts)]
+        best = max(range(len(candidates)), key=averages.__getitem__)
+        card = candidates[best]
+        decision = END_TURN if card is None else f"BUY {CARD_NAMES[card].value.upper()}"
+        logger.debug(
+            "🔮 Lookahead: %s (average score %.2f) after %d playouts in %.1fms",
+            decision,
+            averages[best],
+            nb_playouts,
+            1000 * (time.perf_counter() - start),
+            extra=extra,
+        )
+        return decision
+
+
+def lookahead_from_env() -> Lookahead | None:
+    """Search used on /play, None unless RHUM_PLAY_MODE=lookahead."""
+    if os.environ.get(PLAY_MODE_ENV, "policy") != "lookahead":
+        return None
+    nb_workers = os.environ.get(WORKERS_ENV)
+    return Lookahead(
+        budget=float(os.environ.get(BUDGET_ENV, DEFAULT_BUDGET_SECONDS)),
+        nb_workers=int(nb_workers) if nb_workers else None,
+        use_processes=os.environ.get(POOL_ENV, "process") == "process",
+    )
@@ -0,0 +1,201 @@
+"""
+Request metrics for Rhum & Ruin bot.
+Low-overhead latency histograms per route and per request phase (parsing,
+strategy), plus counters per decision and per event and playouts per
+searched decision, with percentiles computed locally for the /metrics
+endpoint.
+"""
+
+import bisect
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Answering later than this is an illegal action for the arbiter
+ARBITER_TIMEOUT_SECONDS = float(os.environ.get("RHUM_ARBITER_TIMEOUT", "1.0"))
+# Share of the timeout from which a request is counted as close to it
+NEAR_TIMEOUT_RATIO = 0.5
+
+# Histogram buckets, from 10 µs to about 30 s, each one 25% wider than the previous
+BUCKET_BOUNDS: tuple[float, ...] = tuple(10e-6 * 1.25**i for i in range(68))
+
+# Path and start time of the request being handled, set by MetricsMiddleware
+request_start: ContextVar[tuple[str, float] | None] = ContextVar("request_start", default=None)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, O(log buckets) per observation."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.near_timeout = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        bucket = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            if seconds >= ARBITER_TIMEOUT_SECONDS * NEAR_TIMEOUT_RATIO:
+                self.near_timeout += 1
+
+    def percentile(self, ratio: float) -> float:
+        """Upper bound of the bucket holding the given share of the observations."""
+        if not self.count:
+            return 0.0
+        rank = ratio * self.count
+        seen = 0
+        for bucket, quantity in enumerate(self.counts):
+            seen += quantity
+            if seen >= rank and quantity:
+                return min(BUCKET_BOUNDS[bucket], self.max) if bucket < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def summary(self) -> dict:
+        """Count, mean, percentiles and max, in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": 1000 * self.total / self.count if self.count else 0.0,
+            "p50_ms": 1000 * self.percentile(0.50),
+            "p95_ms": 1000 * self.percentile(0.95),
+            "p99_ms": 1000 * self.percentile(0.99),
+            "max_ms": 1000 * self.max,
+            "near_timeout": self.near_timeout,
+        }
+
+
+class SearchStats:
+    """Playouts completed per searched /play decision."""
+
+    def __init__(self):
+        self.decisions = 0
+        self.playouts = 0
+        self.min_playouts: int | None = None
+        self.max_playouts = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def observe(self, nb_playouts: int, fallback: bool) -> None:
+        with self._lock:
+            self.decisions += 1
+            self.playouts += nb_playouts
+            if self.min_playouts is None or nb_playouts < self.min_playouts:
+                self.min_playouts = nb_playouts
+            if nb_playouts > self.max_playouts:
+                self.max_playouts = nb_playouts
+            self.fallbacks += fallback
+
+    def summary(self) -> dict:
+        return {
+            "decisions": self.decisions,
+            "mean_playouts": self.playouts / self.decisions if self.decisions else 0.0,
+            "min_playouts": self.min_playouts or 0,
+            "max_playouts": self.max_playouts,
+            "fallbacks": self.fallbacks,
+        }
+
+
+class Metrics:
+    """Registry of every histogram and counter of the bot."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.routes: dict[str, Histogram] = {}
+        self.phases: dict[str, Histogram] = {}
+        self.decisions: dict[str, int] = {}
+        self.counters: dict[str, int] = {}
+        self.search = SearchStats()
+        self._lock = threading.Lock()
+
+    def _histogram(self, histograms: dict[str, Histogram], name: str) -> Histogram:
+        histogram = histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = histograms.setdefault(name, Histogram())
+        return histogram
+
+    def observe_request(self, route: str, seconds: float) -> None:
+        self._histogram(self.routes, route).observe(seconds)
+
+    def observe_phase(self, phase: str, seconds: float) -> None:
+        self._histogram(self.phases, phase).observe(seconds)
+
+    def mark_parsed(self) -> None:
+        """Record the time spent between the request arrival and the handler (body parsing)."""
+        current = request_start.get()
+        if current is not None:
+            path, start = current
+            self.observe_phase(f"{path} parse", time.perf_counter() - start)
+
+    @contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_phase(phase, time.perf_counter() - start)
+
+    def count_decision(self, decision: str) -> None:
+        with self._lock:
+            self.decisions[decision] = self.decisions.get(decision, 0) + 1
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + 1
+
+    def observe_search(self, nb_playouts: int, fallback: bool) -> None:
+        self.search.observe(nb_playouts, fallback)
+
+    def reset(self) -> None:
+        """Forget every observation so far, such as the requests of the warm-up."""
+        with self._lock:
+            self.routes = {}
+            self.phases = {}
+            self.decisions = {}
+            self.counters = {}
+            self.search = SearchStats()
+
+    def snapshot(self) -> dict:
+        return {
+            "uptime_seconds": time.time() - self.started,
+            "arbiter_timeout_seconds": ARBITER_TIMEOUT_SECONDS,
+            "routes": {route: histogram.summary() for route, histogram in sorted(self.routes.items())},
+            "phases": {phase: histogram.summary() for phase, histogram in sorted(self.phases.items())},
+            "decisions": dict(sorted(self.decisions.items())),
+            "counters": dict(sorted(self.counters.items())),
+            "search": self.search.summary(),
+        }
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by route template."""
+
+    def __init__(self, app, excluded_paths: tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.excluded_paths = excluded_paths
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        token = request_start.set((scope["path"], start))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_start.reset(token)
+            # The router stores the matched route in the scope, unknown paths share one entry
+            route = scope.get("route")
+            metrics.observe_request(getattr(route, "path", "unmatched"), time.perf_counter() - start)
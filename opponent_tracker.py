@@ -0,0 +1,147 @@
+"""
+Opponent tracking for Rhum & Ruin bot.
+Every /play shows each player's score and the stock. Diffing the first
+snapshot of our turn with the last one of our previous turn tells what the
+other players did meanwhile: the cards they took from the stock, their
+score changes, and the curses we received (Witch). Discards asked of us
+outside our turn reveal Militia attacks.
+
+Taken cards are attributed to an opponent when the snapshots allow it: all
+of them with a single opponent, otherwise victory cards by matching score
+changes, the rest being kept as gains of the opponents as a whole. State
+is counts lists plus a bounded score history per opponent, so that each
+/play only costs one diff. A tracker is part of the GameState of its game,
+stored and shared between workers with the rest of the state.
+"""
+
+from collections import deque
+
+from dopynion.data_model import Game
+
+from cards import COPPER, CURSE, ESTATE, NB_CARD_TYPES, VICTORY_CARDS, VICTORY_POINTS, counts_of
+
+# Turns of score history kept per opponent, for a recent scoring rate
+SCORE_HISTORY_TURNS = 6
+# Cards giving points, most points first, to break a score change down greedily
+SCORING_CARDS: tuple[int, ...] = tuple(
+    sorted((card for card in VICTORY_CARDS if VICTORY_POINTS[card] > 0), key=lambda card: -VICTORY_POINTS[card])
+)
+
+
+class OpponentModel:
+    """What we know of one opponent: cards gained since the start and recent scores."""
+
+    __slots__ = ("name", "gained", "scores")
+
+    def __init__(self, name: str, score: int):
+        self.name = name
+        self.gained = [0] * NB_CARD_TYPES
+        # Score at the start of each of our turns, oldest first
+        self.scores: deque[int] = deque([score], maxlen=SCORE_HISTORY_TURNS + 1)
+
+    @property
+    def score(self) -> int:
+        return self.scores[-1]
+
+    def points_per_turn(self) -> float | None:
+        """Average points scored per round over the history, None before two snapshots."""
+        if len(self.scores) < 2:
+            return None
+        return (self.scores[-1] - self.scores[0]) / (len(self.scores) - 1)
+
+    def estimated_deck(self) -> list[int]:
+        """Starting deck plus the cards attributed to this opponent, trashing ignored."""
+        deck = list(self.gained)
+        deck[COPPER] += 7
+        deck[ESTATE] += 3
+        return deck
+
+
+class OpponentTracker:
+    """Opponents of one game, updated from the snapshots of the /play requests."""
+
+    def __init__(self):
+        # By position in game.players, None for ours
+        self.opponents: list[OpponentModel | None] = []
+        # Cards taken by the opponents that could not be attributed to one of them
+        self.shared_gains = [0] * NB_CARD_TYPES
+        self.curses_received = 0
+        # Rounds in which an opponent gave us curses, however many
+        self.witch_attacks = 0
+        # Rounds in which an opponent made us discard
+        self.militia_attacks = 0
+        self._turn: int | None = None
+        self._stock: list[int] | None = None
+        self._our_score = 0
+        self._our_turn_over = True
+        self._attacked_this_round = False
+
+    def observe(self, game: Game, player_index: int, turn: int) -> None:
+        """Take the snapshot of a /play, diffed with the previous one on the first /play of a turn."""
+        stock = counts_of(game.stock)
+        players = game.players
+        if len(self.opponents) != len(players) or any(
+            model is not None and model.name != player.name for model, player in zip(self.opponents, players)
+        ):
+            # First snapshot of the game, or players left it
+            self.opponents = [
+                None if index == player_index else OpponentModel(player.name, player.score)
+                for index, player in enumerate(players)
+            ]
+        elif turn != self._turn and self._stock is not None:
+            self._diff(stock, game, player_index)
+        self._turn = turn
+        self._stock = stock
+        self._our_score = players[player_index].score
+        self._our_turn_over = False
+        self._attacked_this_round = False
+
+    def record_buy(self, card: int) -> None:
+        """Our buy, not to be taken for an opponent's when no later snapshot of the turn shows it."""
+        if self._stock is not None and self._stock[card]:
+            self._stock[card] -= 1
+
+    def end_turn(self) -> None:
+        self._our_turn_over = True
+
+    def observe_discard(self) -> None:
+        """A discard was asked of us, an attack when it happens outside our turn."""
+        if self._our_turn_over and not self._attacked_this_round:
+            self.militia_attacks += 1
+            self._attacked_this_round = True
+
+    def leading_opponent(self) -> OpponentModel | None:
+        return max((model for model in self.opponents if model is not None), key=lambda model: model.score, default=None)
+
+    def _diff(self, stock: list[int], game: Game, player_index: int) -> None:
+        taken = [max(before - after, 0) for before, after in zip(self._stock, stock)]
+        # Our score only changes between our turns when we receive curses
+        received = min(taken[CURSE], max(self._our_score - game.players[player_index].score, 0))
+        if received:
+            self.curses_received += received
+            self.witch_attacks += 1
+            taken[CURSE] -= received
+
+        changes = []
+        for model, player in zip(self.opponents, game.players):
+            if model is not None:
+                changes.append((model, player.score - model.score))
+                model.scores.append(player.score)
+        if len(changes) == 1:
+            model = changes[0][0]
+            for card, quantity in enumerate(taken):
+                model.gained[card] += quantity
+            return
+        for model, change in changes:
+            for card in SCORING_CARDS:
+                while change >= VICTORY_POINTS[card] and taken[card]:
+                    taken[card] -= 1
+                    model.gained[card] += 1
+                    change -= VICTORY_POINTS[card]
+            if change < 0 and taken[CURSE]:
+                cursed = min(-change, taken[CURSE])
+                taken[CURSE] -= cursed
+                model.gained[CURSE] += cursed
+        for card, quantity in enumerate(taken):
+            self.shared_gains[card] += quantity
+
@@ -0,0 +1,1014 @@
+"""
+In-process game simulator for Rhum & Ruin bot.
+Implements the rules from the README (supply piles, deck/hand/discard/trash
+cycling, the 3 phases and the end conditions) on compact, index-based player
+states, and calls strategies directly instead of going through the arbiter.
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+
+from dopynion.data_model import CardName, Cards, Game, Player
+
+from buy_policy import BIG_MONEY_POLICY, BuyPolicy
+from card_priority import card_priority
+from cards import (
+    ACTION_CARDS,
+    CARD_INDEX,
+    CARD_NAMES,
+    CARDS,
+    COLONY,
+    COPPER,
+    COST,
+    CURSE,
+    CURSEDGOLD,
+    DUCHY,
+    ESTATE,
+    GOLD,
+    IS_ACTION,
+    IS_TREASURE,
+    IS_VICTORY,
+    KINGDOM_CARDS,
+    MONEY,
+    NB_CARD_TYPES,
+    PLATINUM,
+    PROVINCE,
+    SILVER,
+    TREASURE_CARDS,
+    VICTORY_CARDS,
+    VICTORY_POINTS,
+    card_index,
+    score_of,
+)
+from game_state import GameState
+from strategy import choose_play, update_deck_tracker
+
+MAX_NB_PLAYERS = 4
+MAX_TURNS = 150
+HAND_SIZE = 5
+KINGDOM_SIZE = 10
+KINGDOM_PILE_SIZE = 10
+MAX_DECISIONS_PER_TURN = 100
+ELIMINATED_SCORE = -10000
+
+ADVENTURER = CARD_INDEX[CardName.ADVENTURER]
+ARTIFICER = CARD_INDEX[CardName.ARTIFICER]
+BANDIT = CARD_INDEX[CardName.BANDIT]
+BUREAUCRAT = CARD_INDEX[CardName.BUREAUCRAT]
+CELLAR = CARD_INDEX[CardName.CELLAR]
+CHANCELLOR = CARD_INDEX[CardName.CHANCELLOR]
+CHAPEL = CARD_INDEX[CardName.CHAPEL]
+COUNCILROOM = CARD_INDEX[CardName.COUNCILROOM]
+DISTANTSHORE = CARD_INDEX[CardName.DISTANTSHORE]
+FARMINGVILLAGE = CARD_INDEX[CardName.FARMINGVILLAGE]
+FEAST = CARD_INDEX[CardName.FEAST]
+FORTUNETELLER = CARD_INDEX[CardName.FORTUNETELLER]
+HARVEST = CARD_INDEX[CardName.HARVEST]
+HIRELING = CARD_INDEX[CardName.HIRELING]
+LIBRARY = CARD_INDEX[CardName.LIBRARY]
+MAGNATE = CARD_INDEX[CardName.MAGNATE]
+MAGPIE = CARD_INDEX[CardName.MAGPIE]
+MARQUIS = CARD_INDEX[CardName.MARQUIS]
+MILITIA = CARD_INDEX[CardName.MILITIA]
+MINE = CARD_INDEX[CardName.MINE]
+MONEYLENDER = CARD_INDEX[CardName.MONEYLENDER]
+POACHER = CARD_INDEX[CardName.POACHER]
+PORT = CARD_INDEX[CardName.PORT]
+REMAKE = CARD_INDEX[CardName.REMAKE]
+REMODEL = CARD_INDEX[CardName.REMODEL]
+SMITHY = CARD_INDEX[CardName.SMITHY]
+SWAP = CARD_INDEX[CardName.SWAP]
+WITCH = CARD_INDEX[CardName.WITCH]
+WORKSHOP = CARD_INDEX[CardName.WORKSHOP]
+
+# Treasures are spent cheapest first, Cursed Gold last (same order as the arbiter)
+PAYMENT_ORDER: tuple[int, ...] = tuple(
+    sorted(TREASURE_CARDS, key=lambda card: (card == CURSEDGOLD, MONEY[card]))
+)
+
+
+class IllegalActionError(Exception):
+    """Raised when a player sends a decision the arbiter would reject."""
+
+
+#####################################################
+# Player state
+#####################################################
+
+
+class PlayerState:
+    """Compact, array-backed state of one simulated player."""
+
+    __slots__ = (
+        "name", "deck", "hand", "discard", "in_play", "hirelings",
+        "actions", "buys", "money", "buy_phase", "eliminated",
+    )
+
+    def __init__(self, name: str):
+        self.name = name
+        # Draw pile as card indices, the next card to draw is the last one
+        self.deck: list[int] = [COPPER] * 7 + [ESTATE] * 3
+        # Every other zone is a counts list indexed like cards.CARDS
+        self.hand = [0] * NB_CARD_TYPES
+        self.discard = [0] * NB_CARD_TYPES
+        self.in_play = [0] * NB_CARD_TYPES
+        self.hirelings = 0
+        self.actions = 0
+        self.buys = 0
+        self.money = 0
+        self.buy_phase = False
+        self.eliminated = False
+
+    def owned(self) -> list[int]:
+        """Count every card the player owns, whatever the zone."""
+        counts = [
+            hand + discard + in_play
+            for hand, discard, in_play in zip(self.hand, self.discard, self.in_play)
+        ]
+        for card in self.deck:
+            counts[card] += 1
+        counts[HIRELING] += self.hirelings
+        return counts
+
+    def hand_money(self) -> int:
+        """Money the treasures in hand would produce."""
+        hand = self.hand
+        return sum(MONEY[card] * hand[card] for card in TREASURE_CARDS)
+
+    def score(self) -> int:
+        """Victory points of the player, as counted by the arbiter."""
+        if self.eliminated:
+            return ELIMINATED_SCORE
+        return score_of(self.owned())
+
+
+def counts_of_cards(cards: list[int]) -> list[int]:
+    counts = [0] * NB_CARD_TYPES
+    for card in cards:
+        counts[card] += 1
+    return counts
+
+
+def worst_card(hand: list[int]) -> int:
+    """Pick the least useful card of a hand: curses and victory cards, then the cheapest."""
+    return min(
+        (card for card, quantity in enumerate(hand) if quantity),
+        key=lambda card: (not IS_VICTORY[card] or IS_ACTION[card], VICTORY_POINTS[card], COST[card]),
+    )
+
+
+#####################################################
+# Strategies
+#####################################################
+
+
+class SimulatedPlayer:
+    """Strategy plugged into the simulator, mirroring the arbiter's calls to a bot.
+
+    Card-interaction hooks receive and return card indices, and hands are
+    counts lists indexed like cards.CARDS.
+    """
+
+    name = "Simulated player"
+
+    def start_game(self, game_id: str) -> None:
+        """Called once before the first turn, like /start_game."""
+
+    def start_turn(self) -> None:
+        """Called at the beginning of each of our turns, like /start_turn."""
+
+    def play(self, simulation: "Simulation", index: int) -> str:
+        """Return "ACTION <card>", "BUY <card>" or "END_TURN", like /play."""
+        return "END_TURN"
+
+    def end_game(self) -> None:
+        """Called once the game is over, like /end_game."""
+
+    def confirm_discard_card_from_hand(self, card: int, hand: list[int]) -> bool:
+        return False
+
+    def discard_card_from_hand(self, hand: list[int]) -> int:
+        return worst_card(hand)
+
+    def confirm_trash_card_from_hand(self, card: int, hand: list[int]) -> bool:
+        return False
+
+    def trash_card_from_hand(self, hand: list[int]) -> int:
+        return worst_card(hand)
+
+    def confirm_discard_deck(self) -> bool:
+        return False
+
+    def choose_card_to_receive_in_discard(self, possible_cards: list[int]) -> int:
+        return max(possible_cards, key=COST.__getitem__)
+
+    def choose_card_to_receive_in_deck(self, possible_cards: list[int]) -> int:
+        return max(possible_cards, key=COST.__getitem__)
+
+    def skip_card_reception_in_hand(self, card: int, hand: list[int]) -> bool:
+        return False
+
+    def trash_money_card_for_better_money_card(self, money_in_hand: list[int]) -> int | None:
+        return None
+
+
+class BigMoneyPlayer(SimulatedPlayer):
+    """Classic "Big Money" baseline: buys only treasures and victory cards."""
+
+    name = "Big Money"
+
+    def play(self, simulation: "Simulation", index: int) -> str:
+        player = simulation.players[index]
+        if not player.buys:
+            return "END_TURN"
+        money = player.money + player.hand_money()
+        provinces_left = simulation.supply[PROVINCE]
+        if money >= 8:
+            wanted = (PROVINCE, GOLD)
+        elif money >= 6:
+            wanted = (DUCHY, GOLD) if provinces_left <= 4 else (GOLD,)
+        elif money >= 5:
+            wanted = (DUCHY, SILVER) if provinces_left <= 5 else (SILVER,)
+        elif money >= 3:
+            wanted = (ESTATE, SILVER) if provinces_left <= 2 else (SILVER,)
+        elif money >= 2 and provinces_left <= 3:
+            wanted = (ESTATE,)
+        else:
+            wanted = ()
+        for card in wanted:
+            if simulation.supply[card]:
+                return f"BUY {CARD_NAMES[card].value}"
+        return "END_TURN"
+
+
+class SmithyBigMoneyPlayer(BigMoneyPlayer):
+    """Big Money plus a Smithy for every dozen cards, a strong simple baseline."""
+
+    name = "Smithy Big Money"
+
+    def play(self, simulation: "Simulation", index: int) -> str:
+        player = simulation.players[index]
+        if not player.buy_phase and player.hand[SMITHY]:
+            return "ACTION smithy"
+        money = player.money + player.hand_money()
+        if player.buys and 4 <= money <= 5 and simulation.supply[SMITHY]:
+            owned = player.owned()
+            if owned[SMITHY] < 1 + sum(owned) // 12:
+                return "BUY smithy"
+        return super().play(simulation, index)
+
+
+class RhumAndRuinPlayer(SimulatedPlayer):
+    """Our bot's strategy, called directly as BOOT.py does on /play."""
+
+    name = "Rhum & Ruin"
+
+    def __init__(self, policy: BuyPolicy | None = None):
+        self.game_state = GameState("simulation")
+        # Our own player is found by name, so variants keep it as a prefix
+        self.policy = policy
+        if policy is not None:
+            self.name = f"Rhum & Ruin ({policy.name})"
+
+    def start_game(self, game_id: str) -> None:
+        self.game_state = GameState(game_id)
+
+    def start_turn(self) -> None:
+        self.game_state.reset_turn()
+
+    def play(self, simulation: "Simulation", index: int) -> str:
+        game = simulation.game_view(index)
+        update_deck_tracker(game, self.game_state)
+        decision = choose_play(game, self.game_state, self.policy)
+        if decision.startswith("BUY"):
+            self.game_state.use_purchase()
+        self.game_state.deck.record_decision(decision)
+        return decision
+
+    # Card interactions, chosen from the card priorities as BOOT.py does
+
+    def discard_card_from_hand(self, hand: list[int]) -> int:
+        priority = card_priority(self.game_state)
+        card = priority.first_held(priority.discard_order, hand)
+        self.game_state.deck.discard_from_hand(card)
+        return card
+
+    def confirm_trash_card_from_hand(self, card: int, hand: list[int]) -> bool:
+        confirmed = card_priority(self.game_state).confirm_trash(card, self.game_state.deck)
+        if confirmed:
+            self.game_state.deck.trash(card)
+        return confirmed
+
+    def trash_card_from_hand(self, hand: list[int]) -> int:
+        priority = card_priority(self.game_state)
+        card = priority.first_held(priority.trash_order, hand)
+        self.game_state.deck.trash(card)
+        return card
+
+    def choose_card_to_receive_in_discard(self, possible_cards: list[int]) -> int:
+        return self._receive(possible_cards, "discard")
+
+    def choose_card_to_receive_in_deck(self, possible_cards: list[int]) -> int:
+        return self._receive(possible_cards, "deck")
+
+    def _receive(self, possible_cards: list[int], destination: str) -> int:
+        priority = card_priority(self.game_state)
+        card = priority.first_held(priority.gain_order, counts_of_cards(possible_cards))
+        self.game_state.deck.gain(card, destination)
+        return card
+
+    def trash_money_card_for_better_money_card(self, money_in_hand: list[int]) -> int | None:
+        priority = card_priority(self.game_state)
+        card = priority.first_held(priority.upgrade_order, counts_of_cards(money_in_hand))
+        self.game_state.deck.trash(card)
+        return card
+
+
+STRATEGIES: dict[str, Callable[[], SimulatedPlayer]] = {
+    "rhum_and_ruin": RhumAndRuinPlayer,
+    "big_money": BigMoneyPlayer,
+    "smithy_big_money": SmithyBigMoneyPlayer,
+    "big_money_table": lambda: RhumAndRuinPlayer(BIG_MONEY_POLICY),
+}
+
+
+#####################################################
+# Game engine
+#####################################################
+
+
+class GameResult:
+    """Outcome of one simulated game."""
+
+    def __init__(self, seed: int | None, names: list[str], scores: list[int], turns: int):
+        self.seed = seed
+        self.names = names
+        self.scores = scores
+        self.turns = turns
+
+    @property
+    def winners(self) -> list[int]:
+        """Indices of the players sharing the best score."""
+        best = max(self.scores)
+        return [index for index, score in enumerate(self.scores) if score == best]
+
+    def __repr__(self) -> str:
+        return f"GameResult(seed={self.seed}, scores={dict(zip(self.names, self.scores))}, turns={self.turns})"
+
+
+class Simulation:
+    """One game between simulated players."""
+
+    def __init__(
+        self,
+        players: list[SimulatedPlayer],
+        seed: int | None = None,
+        kingdom: list[int] | None = None,
+        max_turns: int = MAX_TURNS,
+    ):
+        if not 2 <= len(players) <= MAX_NB_PLAYERS:
+            raise ValueError(f"A game needs 2 to {MAX_NB_PLAYERS} players, got {len(players)}")
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.game_id = f"sim-{seed}"
+        self.max_turns = max_turns
+        self.strategies = players
+        self.players = [PlayerState(strategy.name) for strategy in players]
+        self.supply = [0] * NB_CARD_TYPES
+        self.trash = [0] * NB_CARD_TYPES
+        self.turn = 0
+        self._setup_supply(kingdom)
+        self.piles: tuple[int, ...] = tuple(card for card in range(NB_CARD_TYPES) if self.supply[card])
+        for player in self.players:
+            self.rng.shuffle(player.deck)
+            self.draw(player, HAND_SIZE)
+
+    def _setup_supply(self, kingdom: list[int] | None) -> None:
+        nb_players = len(self.players)
+        victory_quantity = 8 if nb_players <= 2 else 12
+        supply = self.supply
+        supply[COPPER] = 60 - 7 * nb_players
+        supply[SILVER] = 40
+        supply[GOLD] = 30
+        supply[PLATINUM] = 10
+        for card in (ESTATE, DUCHY, PROVINCE, COLONY):
+            supply[card] = victory_quantity
+        supply[CURSE] = 10 * (nb_players - 1)
+        if kingdom is None:
+            kingdom = self.rng.sample(KINGDOM_CARDS, KINGDOM_SIZE)
+        for card in kingdom:
+            supply[card] = victory_quantity if IS_VICTORY[card] else KINGDOM_PILE_SIZE
+
+    @property
+    def nb_empty_piles(self) -> int:
+        supply = self.supply
+        return sum(1 for card in self.piles if not supply[card])
+
+    @property
+    def finished(self) -> bool:
+        return (
+            not self.supply[PROVINCE]
+            or self.nb_empty_piles >= 3
+            or self.turn >= self.max_turns
+            or all(player.eliminated for player in self.players)
+        )
+
+    def game_view(self, index: int) -> Game:
+        """Build the payload the arbiter would POST to /play for this player."""
+        players = [
+            Player.model_construct(
+                name=player.name,
+                hand=_cards(player.hand) if position == index else None,
+                score=player.score(),
+            )
+            for position, player in enumerate(self.players)
+        ]
+        return Game.model_construct(finished=self.finished, players=players, stock=_cards(self.supply))
+
+    # Card movements
+
+    def take_one_card_from_deck(self, player: PlayerState) -> int | None:
+        """Pop the next card of the deck, shuffling the discard in when needed."""
+        if not player.deck:
+            deck = player.deck
+            discard = player.discard
+            for card in range(NB_CARD_TYPES):
+                if discard[card]:
+                    deck.extend([card] * discard[card])
+                    discard[card] = 0
+            if not deck:
+                return None
+            self.rng.shuffle(deck)
+        return player.deck.pop()
+
+    def draw(self, player: PlayerState, nb_cards: int) -> None:
+        hand = player.hand
+        for _ in range(nb_cards):
+            card = self.take_one_card_from_deck(player)
+            if card is None:
+                return
+            hand[card] += 1
+
+    def gain(self, player: PlayerState, card: int, destination: str = "discard") -> bool:
+        """Move a card from the supply to one of the player's zones."""
+        if not self.supply[card]:
+            return False
+        self.supply[card] -= 1
+        if destination == "deck":
+            player.deck.append(card)
+        elif destination == "hand":
+            player.hand[card] += 1
+        else:
+            player.discard[card] += 1
+        return True
+
+    def trash_from_hand(self, player: PlayerState, card: int) -> None:
+        if not player.hand[card]:
+            raise IllegalActionError(f"{CARD_NAMES[card]} not in hand")
+        player.hand[card] -= 1
+        self.trash[card] += 1
+
+    def discard_from_hand(self, player: PlayerState, card: int) -> None:
+        if not player.hand[card]:
+            raise IllegalActionError(f"{CARD_NAMES[card]} not in hand")
+        player.hand[card] -= 1
+        player.discard[card] += 1
+
+    def possible_cards(self, condition: Callable[[int], bool]) -> list[int]:
+        supply = self.supply
+        return [card for card in self.piles if supply[card] and condition(card)]
+
+    # Turn phases
+
+    def start_turn(self, index: int) -> None:
+        player = self.players[index]
+        player.actions = 1
+        player.buys = 1
+        player.money = 0
+        player.buy_phase = False
+        self.draw(player, player.hirelings)
+        self._check_for_buy_phase(player)
+        self.strategies[index].start_turn()
+
+    def _check_for_buy_phase(self, player: PlayerState) -> None:
+        if not player.actions or not any(player.hand[card] for card in ACTION_CARDS):
+            player.buy_phase = True
+
+    def play_action(self, index: int, card: int) -> None:
+        player = self.players[index]
+        if player.buy_phase:
+            raise IllegalActionError("Tried action during buy phase")
+        if not IS_ACTION[card] or not player.hand[card]:
+            raise IllegalActionError(f"Invalid action, {CARD_NAMES[card]} not in hand")
+        player.actions -= 1
+        player.hand[card] -= 1
+        player.in_play[card] += 1
+        info = CARDS[card]
+        self.draw(player, info.plus_cards)
+        player.actions += info.plus_actions
+        player.buys += info.plus_buys
+        player.money += info.plus_money
+        effect = _ACTION_EFFECTS.get(card)
+        if effect is not None:
+            effect(self, index)
+        self._check_for_buy_phase(player)
+
+    def buy(self, index: int, card: int) -> None:
+        player = self.players[index]
+        if not player.buys:
+            raise IllegalActionError("No more buy available")
+        if not self.supply[card]:
+            raise IllegalActionError(f"Invalid buy, no {CARD_NAMES[card]} in stock")
+        cost = COST[card]
+        if player.money + player.hand_money() < cost:
+            raise IllegalActionError("Invalid buy, not enough money")
+        self._pay(player, cost)
+        player.money -= cost
+        self.gain(player, card)
+        if card == PORT:
+            self.gain(player, card)
+        player.buys -= 1
+        player.buy_phase = True
+
+    def _pay(self, player: PlayerState, cost: int) -> None:
+        hand = player.hand
+        for card in PAYMENT_ORDER:
+            while player.money < cost and hand[card]:
+                hand[card] -= 1
+                player.in_play[card] += 1
+                player.money += MONEY[card]
+                if card == CURSEDGOLD:
+                    self.gain(player, CURSE)
+
+    def end_turn(self, index: int) -> None:
+        player = self.players[index]
+        hand = player.hand
+        in_play = player.in_play
+        discard = player.discard
+        for card in range(NB_CARD_TYPES):
+            quantity = hand[card] + in_play[card]
+            if quantity:
+                discard[card] += quantity
+                hand[card] = 0
+                in_play[card] = 0
+        player.actions = player.buys = player.money = 0
+        self.draw(player, HAND_SIZE)
+
+    def apply(self, index: int, decision: str) -> bool:
+        """Apply one /play decision, return False once the turn is over."""
+        verb, _, argument = decision.strip().partition(" ")
+        verb = verb.upper()
+        if verb == "END_TURN":
+            return False
+        card = card_index(argument.strip())
+        if card is None:
+            raise IllegalActionError(f"Invalid decision {decision!r}")
+        if verb == "BUY":
+            self.buy(index, card)
+        elif verb == "ACTION":
+            self.play_action(index, card)
+        else:
+            raise IllegalActionError(f"Invalid decision {decision!r}")
+        return True
+
+    def eliminate(self, index: int) -> None:
+        self.players[index].eliminated = True
+
+    def play_turn(self, index: int) -> None:
+        strategy = self.strategies[index]
+        self.start_turn(index)
+        try:
+            for _ in range(MAX_DECISIONS_PER_TURN):
+                if not self.apply(index, strategy.play(self, index)):
+                    break
+        except IllegalActionError:
+            self.eliminate(index)
+        self.end_turn(index)
+
+    def run(self) -> GameResult:
+        """Play the game to the end and return its result."""
+        for strategy in self.strategies:
+            strategy.start_game(self.game_id)
+        while not self.finished:
+            for index, player in enumerate(self.players):
+                if player.eliminated:
+                    continue
+                self.play_turn(index)
+                # The current turn ends the game, not the current round
+                if self.finished:
+                    break
+            self.turn += 1
+        for strategy in self.strategies:
+            strategy.end_game()
+        return GameResult(
+            self.seed,
+            [player.name for player in self.players],
+            [player.score() for player in self.players],
+            self.turn,
+        )
+
+    # Attacks
+
+    def for_each_other_player(self, index: int, attack: Callable[[int], None]) -> None:
+        """Apply an attack to every other player, eliminating those answering illegally."""
+        for other_index, other_player in enumerate(self.players):
+            if other_index == index or other_player.eliminated:
+                continue
+            try:
+                attack(other_index)
+            except IllegalActionError:
+                self.eliminate(other_index)
+
+
+def _cards(counts: list[int]) -> Cards:
+    return Cards.model_construct(
+        quantities={CARD_NAMES[card]: quantity for card, quantity in enumerate(counts) if quantity}
+    )
+
+
+#####################################################
+# Card effects (on top of the +cards/+actions/+buys/+money of cards.CARDS)
+#####################################################
+
+
+def _adventurer(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    revealed = []
+    nb_kept_cards = 0
+    while nb_kept_cards < 2:
+        card = simulation.take_one_card_from_deck(player)
+        if card is None:
+            break
+        if IS_TREASURE[card]:
+            player.hand[card] += 1
+            nb_kept_cards += 1
+        else:
+            revealed.append(card)
+    for card in revealed:
+        player.discard[card] += 1
+
+
+def _discard_any(simulation: Simulation, index: int) -> int:
+    """Offer to discard every card of the hand, return how many were discarded."""
+    player = simulation.players[index]
+    strategy = simulation.strategies[index]
+    nb_discarded_cards = 0
+    for card in range(NB_CARD_TYPES):
+        for _ in range(player.hand[card]):
+            if strategy.confirm_discard_card_from_hand(card, player.hand):
+                simulation.discard_from_hand(player, card)
+                nb_discarded_cards += 1
+    return nb_discarded_cards
+
+
+def _artificer(simulation: Simulation, index: int) -> None:
+    nb_discarded_cards = _discard_any(simulation, index)
+    possible_cards = simulation.possible_cards(lambda card: COST[card] == nb_discarded_cards)
+    if possible_cards:
+        card = simulation.strategies[index].choose_card_to_receive_in_deck(possible_cards)
+        _check_choice(card, possible_cards)
+        simulation.gain(simulation.players[index], card, "deck")
+
+
+def _bandit(simulation: Simulation, index: int) -> None:
+    simulation.gain(simulation.players[index], GOLD)
+
+    def attack(other_index: int) -> None:
+        other = simulation.players[other_index]
+        drawn = [
+            card for _ in range(2)
+            if (card := simulation.take_one_card_from_deck(other)) is not None
+        ]
+        trashable = [card for card in drawn if IS_TREASURE[card] and card != COPPER]
+        if trashable:
+            trashed = min(trashable, key=MONEY.__getitem__)
+            drawn.remove(trashed)
+            simulation.trash[trashed] += 1
+        for card in drawn:
+            other.discard[card] += 1
+
+    simulation.for_each_other_player(index, attack)
+
+
+def _bureaucrat(simulation: Simulation, index: int) -> None:
+    simulation.gain(simulation.players[index], SILVER, "deck")
+
+    def attack(other_index: int) -> None:
+        other = simulation.players[other_index]
+        for card in VICTORY_CARDS:
+            if other.hand[card]:
+                other.hand[card] -= 1
+                other.deck.append(card)
+                return
+
+    simulation.for_each_other_player(index, attack)
+
+
+def _cellar(simulation: Simulation, index: int) -> None:
+    nb_discarded_cards = _discard_any(simulation, index)
+    simulation.draw(simulation.players[index], nb_discarded_cards)
+
+
+def _chancellor(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    if simulation.strategies[index].confirm_discard_deck():
+        for card in player.deck:
+            player.discard[card] += 1
+        player.deck.clear()
+
+
+def _chapel(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    strategy = simulation.strategies[index]
+    nb_trashed_cards = 0
+    for card in range(NB_CARD_TYPES):
+        for _ in range(player.hand[card]):
+            if nb_trashed_cards >= 4:
+                return
+            if strategy.confirm_trash_card_from_hand(card, player.hand):
+                simulation.trash_from_hand(player, card)
+                nb_trashed_cards += 1
+
+
+def _council_room(simulation: Simulation, index: int) -> None:
+    simulation.for_each_other_player(
+        index, lambda other_index: simulation.draw(simulation.players[other_index], 1)
+    )
+
+
+def _distant_shore(simulation: Simulation, index: int) -> None:
+    simulation.gain(simulation.players[index], ESTATE)
+
+
+def _farming_village(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    revealed = []
+    while (card := simulation.take_one_card_from_deck(player)) is not None:
+        if IS_TREASURE[card] or IS_ACTION[card]:
+            player.hand[card] += 1
+            break
+        revealed.append(card)
+    for card in revealed:
+        player.discard[card] += 1
+
+
+def _feast(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    player.in_play[FEAST] -= 1
+    simulation.trash[FEAST] += 1
+    _receive_in_discard(simulation, index, lambda card: COST[card] <= 5)
+
+
+def _fortune_teller(simulation: Simulation, index: int) -> None:
+    def attack(other_index: int) -> None:
+        other = simulation.players[other_index]
+        revealed = []
+        while (card := simulation.take_one_card_from_deck(other)) is not None:
+            if IS_VICTORY[card]:
+                other.deck.append(card)
+                break
+            revealed.append(card)
+        for card in revealed:
+            other.discard[card] += 1
+
+    simulation.for_each_other_player(index, attack)
+
+
+def _card_types(card: int) -> set[str]:
+    """Types of a card as Harvest counts them, a Curse being its own type."""
+    if card == CURSE:
+        return {"curse"}
+    flags = (("treasure", IS_TREASURE), ("action", IS_ACTION), ("victory", IS_VICTORY))
+    return {card_type for card_type, is_type in flags if is_type[card]}
+
+
+def _harvest(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    revealed = []
+    while len(revealed) < 4 and (card := simulation.take_one_card_from_deck(player)) is not None:
+        revealed.append(card)
+    card_types = set()
+    for card in revealed:
+        player.discard[card] += 1
+        card_types |= _card_types(card)
+    simulation.draw(player, min(len(card_types), 4))
+
+
+def _hireling(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    player.in_play[HIRELING] -= 1
+    player.hirelings += 1
+
+
+def _library(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    strategy = simulation.strategies[index]
+    skipped = []
+    while sum(player.hand) < 7:
+        card = simulation.take_one_card_from_deck(player)
+        if card is None:
+            break
+        if IS_ACTION[card] and strategy.skip_card_reception_in_hand(card, player.hand):
+            skipped.append(card)
+        else:
+            player.hand[card] += 1
+    for card in skipped:
+        player.discard[card] += 1
+
+
+def _magnate(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    simulation.draw(player, sum(player.hand[card] for card in TREASURE_CARDS))
+
+
+def _magpie(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    card = simulation.take_one_card_from_deck(player)
+    if card is None:
+        return
+    if IS_TREASURE[card]:
+        player.hand[card] += 1
+        simulation.gain(player, MAGPIE)
+    else:
+        player.deck.append(card)
+
+
+def _discard_down_to(simulation: Simulation, index: int, hand_size: int) -> None:
+    player = simulation.players[index]
+    strategy = simulation.strategies[index]
+    while sum(player.hand) > hand_size:
+        simulation.discard_from_hand(player, strategy.discard_card_from_hand(player.hand))
+
+
+def _marquis(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    simulation.draw(player, sum(player.hand))
+    _discard_down_to(simulation, index, 10)
+
+
+def _militia(simulation: Simulation, index: int) -> None:
+    simulation.for_each_other_player(
+        index, lambda other_index: _discard_down_to(simulation, other_index, 3)
+    )
+
+
+def _mine(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    money_in_hand = [card for card in TREASURE_CARDS if player.hand[card]]
+    if not money_in_hand:
+        return
+    trashed = simulation.strategies[index].trash_money_card_for_better_money_card(money_in_hand)
+    if trashed is None:
+        return
+    _check_choice(trashed, money_in_hand)
+    simulation.trash_from_hand(player, trashed)
+    possible_cards = simulation.possible_cards(
+        lambda card: IS_TREASURE[card] and COST[card] <= COST[trashed] + 3
+    )
+    if possible_cards:
+        simulation.gain(player, max(possible_cards, key=MONEY.__getitem__), "hand")
+
+
+def _moneylender(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    if player.hand[COPPER] and simulation.strategies[index].confirm_trash_card_from_hand(COPPER, player.hand):
+        simulation.trash_from_hand(player, COPPER)
+        player.money += 3
+
+
+def _poacher(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    strategy = simulation.strategies[index]
+    for _ in range(simulation.nb_empty_piles):
+        if not any(player.hand):
+            break
+        simulation.discard_from_hand(player, strategy.discard_card_from_hand(player.hand))
+
+
+def _receive_in_discard(simulation: Simulation, index: int, condition: Callable[[int], bool]) -> None:
+    possible_cards = simulation.possible_cards(condition)
+    if possible_cards:
+        card = simulation.strategies[index].choose_card_to_receive_in_discard(possible_cards)
+        _check_choice(card, possible_cards)
+        simulation.gain(simulation.players[index], card)
+
+
+def _remake(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    for _ in range(2):
+        if not any(player.hand):
+            return
+        trashed = simulation.strategies[index].trash_card_from_hand(player.hand)
+        simulation.trash_from_hand(player, trashed)
+        _receive_in_discard(simulation, index, lambda card: COST[card] == COST[trashed] + 1)
+
+
+def _remodel(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    if not any(player.hand):
+        return
+    trashed = simulation.strategies[index].trash_card_from_hand(player.hand)
+    simulation.trash_from_hand(player, trashed)
+    _receive_in_discard(simulation, index, lambda card: COST[card] <= COST[trashed] + 2)
+
+
+def _swap(simulation: Simulation, index: int) -> None:
+    player = simulation.players[index]
+    strategy = simulation.strategies[index]
+    for swapped in ACTION_CARDS:
+        if player.hand[swapped] and strategy.confirm_trash_card_from_hand(swapped, player.hand):
+            player.hand[swapped] -= 1
+            simulation.supply[swapped] += 1
+            _receive_in_discard(
+                simulation, index,
+                lambda card: IS_ACTION[card] and COST[card] <= 5 and card != swapped,
+            )
+            return
+
+
+def _witch(simulation: Simulation, index: int) -> None:
+    simulation.for_each_other_player(
+        index, lambda other_index: simulation.gain(simulation.players[other_index], CURSE)
+    )
+
+
+def _workshop(simulation: Simulation, index: int) -> None:
+    _receive_in_discard(simulation, index, lambda card: COST[card] <= 4)
+
+
+def _check_choice(card: int, possible_cards: list[int]) -> None:
+    if card not in possible_cards:
+        raise IllegalActionError(f"{CARD_NAMES[card]} is not a possible choice")
+
+
+_ACTION_EFFECTS: dict[int, Callable[[Simulation, int], None]] = {
+    ADVENTURER: _adventurer,
+    ARTIFICER: _artificer,
+    BANDIT: _bandit,
+    BUREAUCRAT: _bureaucrat,
+    CELLAR: _cellar,
+    CHANCELLOR: _chancellor,
+    CHAPEL: _chapel,
+    COUNCILROOM: _council_room,
+    DISTANTSHORE: _distant_shore,
+    FARMINGVILLAGE: _farming_village,
+    FEAST: _feast,
+    FORTUNETELLER: _fortune_teller,
+    HARVEST: _harvest,
+    HIRELING: _hireling,
+    LIBRARY: _library,
+    MAGNATE: _magnate,
+    MAGPIE: _magpie,
+    MARQUIS: _marquis,
+    MILITIA: _militia,
+    MINE: _mine,
+    MONEYLENDER: _moneylender,
+    POACHER: _poacher,
+    REMAKE: _remake,
+    REMODEL: _remodel,
+    SWAP: _swap,
+    WITCH: _witch,
+    WORKSHOP: _workshop,
+}
+
+
+#####################################################
+# Command line
+#####################################################
+
+
+def run_games(strategy_names: list[str], nb_games: int, seed: int = 0) -> list[GameResult]:
+    """Play nb_games games between fresh instances of the named strategies."""
+    results = []
+    for game_number in range(nb_games):
+        players = [STRATEGIES[strategy_name]() for strategy_name in strategy_names]
+        results.append(Simulation(players, seed=seed + game_number).run())
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate Dopynion games locally")
+    parser.add_argument("players", nargs="*", help=f"strategies among {sorted(STRATEGIES)}")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    players = args.players or ["rhum_and_ruin", "big_money"]
+    for strategy_name in players:
+        if strategy_name not in STRATEGIES:
+            parser.error(f"unknown strategy {strategy_name!r}")
+
+    start = time.perf_counter()
+    results = run_games(players, args.games, args.seed)
+    elapsed = time.perf_counter() - start
+
+    print(f"🎲 {args.games} games in {elapsed:.2f}s ({args.games / elapsed:.0f} games/s)")
+    for position, strategy_name in enumerate(players):
+        wins = sum(position in result.winners for result in results)
+        average_score = sum(result.scores[position] for result in results) / len(results)
+        print(f"   - {strategy_name} #{position}: {wins / len(results):.1%} wins, average score {average_score:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Speculative /play decisions for Rhum & Ruin bot.
+Once our turn ends, a background thread decides the next /play for the most
+likely next hands, given our tracked deck and the last stock we saw, while
+the other players take their turns. The next /play is then usually a cache
+lookup instead of a search.
+
+Entries are keyed by a hash of what a buy decision reads: our hand and deck
+zones, turn, purchases left, and of the stock only the Provinces left, the
+empty piles and which affordable piles remain. The other players' buys and
+scores between two of our turns thus keep the entries valid, unless they
+empty a pile or take a Province. Each game keeps the entries of its last
+speculation only. The endgame is not speculated: its /play is left to the
+solver, the only decision reading the scores.
+"""
+
+import copy
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from dopynion.data_model import Cards, Game, Player
+
+from bot_logging import logger
+from cards import CARD_NAMES, COST, NB_CARD_TYPES, PROVINCE, counts_of
+from game_state import MAX_GAME_STATES, GameState
+from metrics import metrics
+from strategy import update_deck_tracker
+from strategy_helpers import count_empty_piles, get_our_hand_counts, get_our_player_index, money_in_hand
+
+SPECULATION_ENV = "RHUM_SPECULATION"
+# Hands decided in advance after each of our turns
+NB_SPECULATED_HANDS = 8
+
+Decide = Callable[[Game, GameState], str]
+
+
+def speculation_key(game: Game, game_state: GameState) -> int | None:
+    """Hash of what the /play decision depends on, None when our hand is unknown."""
+    hand = get_our_hand_counts(game, game_state)
+    if not hand:
+        return None
+    stock = counts_of(game.stock)
+    money = money_in_hand(hand)
+    deck = game_state.deck
+    return hash((
+        tuple(hand),
+        stock[PROVINCE],
+        count_empty_piles(stock, game_state),
+        tuple(card for card in range(NB_CARD_TYPES) if stock[card] and COST[card] <= money),
+        tuple(deck.owned),
+        tuple(deck.draw_pile),
+        tuple(deck.discard),
+        tuple(deck.in_play),
+        deck.hirelings,
+        game_state.turn,
+        game_state.purchases_remaining_this_turn,
+    ))
+
+
+def with_hand(game: Game, player_index: int, hand: list[int]) -> Game:
+    """Copy of a /play payload where our player holds another hand."""
+    players = list(game.players)
+    player = players[player_index]
+    players[player_index] = Player.model_construct(
+        name=player.name,
+        hand=Cards.model_construct(
+            quantities={CARD_NAMES[card]: quantity for card, quantity in enumerate(hand) if quantity}
+        ),
+        score=player.score,
+    )
+    return Game.model_construct(finished=game.finished, players=players, stock=game.stock)
+
+
+class Speculator:
+    """Per-game caches of decisions computed in advance, filled by a background thread."""
+
+    def __init__(
+        self,
+        decide: Decide,
+        nb_hands: int = NB_SPECULATED_HANDS,
+        max_games: int = MAX_GAME_STATES,
+        executor: Executor | None = None,
+    ):
+        self.decide = decide
+        self.nb_hands = nb_hands
+        self.max_games = max_games
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculation")
+        self._caches: OrderedDict[str, dict[int, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, game: Game, game_state: GameState) -> str | None:
+        """Decision computed in advance for this request, if any."""
+        # Only the first /play of a turn is speculated, later ones are cheap
+        if not game_state.can_purchase():
+            return None
+        with self._lock:
+            cache = self._caches.get(game_state.game_id)
+        if cache is None:
+            return None
+        decision = cache.get(speculation_key(game, game_state))
+        metrics.count("speculation hit" if decision is not None else "speculation miss")
+        return decision
+
+    def schedule(self, game: Game, game_state: GameState) -> None:
+        """Speculate on our next turn from a copy of the state, once the current one is over."""
+        player_index = get_our_player_index(game, game_state)
+        if player_index is None:
+            return
+        cache: dict[int, str] = {}
+        with self._lock:
+            # Replaces the entries of the previous turn, now stale
+            self._caches[game_state.game_id] = cache
+            self._caches.move_to_end(game_state.game_id)
+            while len(self._caches) > self.max_games:
+                self._caches.popitem(last=False)
+        self.executor.submit(self._speculate, game, copy.deepcopy(game_state), player_index, cache)
+
+    def forget(self, game_id: str) -> None:
+        with self._lock:
+            self._caches.pop(game_id, None)
+
+    def _speculate(self, game: Game, game_state: GameState, player_index: int, cache: dict[int, str]) -> None:
+        """Fill the cache, most likely hand first, so that a late /play still finds the first entries."""
+        game_id = game_state.game_id
+        try:
+            for _probability, hand in game_state.deck.likely_next_hands(self.nb_hands):
+                with self._lock:
+                    if self._caches.get(game_id) is not cache:
+                        # A newer turn or the end of the game made this speculation useless
+                        return
+                next_game = with_hand(game, player_index, hand)
+                next_state = copy.deepcopy(game_state)
+                next_state.reset_turn()
+                update_deck_tracker(next_game, next_state)
+                key = speculation_key(next_game, next_state)
+                if key is not None:
+                    cache[key] = self.decide(next_game, next_state)
+        except Exception as exc:
+            logger.warning(
+                "⚠️ Speculation failed: %s %s",
+                exc.__class__.__name__,
+                exc,
+                extra={"game_id": game_id},
+            )
+            return
+        logger.debug("🔭 %d decisions speculated for our next turn", len(cache), extra={"game_id": game_id})
+
+
+def speculator_from_env(decide: Decide, searching: bool) -> Speculator | None:
+    """Speculator of /play, by default only when decisions are a search worth saving."""
+    setting = os.environ.get(SPECULATION_ENV, "auto")
+    if setting == "on" or (setting == "auto" and searching):
+        return Speculator(decide)
+    return None
@@ -4,46 +4,93 @@ Contains the core decision-making functions.
 """
 
 from dopynion.data_model import Game
+
+from bot_logging import logger
+from buy_policy import END_TURN, BuyPolicy, active_policy
+from cards import COPPER, ESTATE, counts_of
 from game_state import GameState
 from strategy_helpers import (
-    count_copper_in_hand,
-    is_estate_available_in_stock,
-    get_player_hand_as_list,
+    count_empty_piles,
+    get_our_hand_counts,
+    get_our_player,
+    is_card_available,
+    money_in_hand,
 )
 
 
+def update_deck_tracker(game: Game, game_state: GameState) -> None:
+    """Feed the deck tracker with our hand and score from a /play request."""
+    our_player = get_our_player(game, game_state)
+    if our_player is not None:
+        game_state.deck.observe(counts_of(our_player.hand), our_player.score)
+
+
 def should_buy_estate(game: Game, game_state: GameState) -> bool:
     """Determine if we should buy an Estate card based on our strategy."""
-    print("\n" + "="*50)
-    print("🤔 EVALUATING ESTATE PURCHASE STRATEGY")
-    print("="*50)
+    extra = {"game_id": game_state.game_id}
+    logger.debug("🤔 EVALUATING ESTATE PURCHASE STRATEGY", extra=extra)
     
     # Check if we have any purchases remaining this turn
     if not game_state.can_purchase():
-        print(f"❌ Cannot buy Estate: No purchases remaining this turn ({game_state.purchases_remaining_this_turn})")
-        print("="*50 + "\n")
+        logger.debug(
+            "❌ Cannot buy Estate: No purchases remaining this turn (%d)",
+            game_state.purchases_remaining_this_turn,
+            extra=extra,
+        )
         return False
     
-    # Get our hand as a list
-    our_hand = get_player_hand_as_list(game)
-    if not our_hand:  # Empty hand means something went wrong
-        print("❌ Cannot buy Estate: No hand found")
-        print("="*50 + "\n")
+    # Get our hand as card counts
+    our_hand = get_our_hand_counts(game, game_state)
+    if not our_hand or not any(our_hand):  # Empty hand means something went wrong
+        logger.debug("❌ Cannot buy Estate: No hand found", extra=extra)
         return False
     
     # Check if we have at least 2 Copper cards
-    copper_count = count_copper_in_hand(our_hand)
+    copper_count = our_hand[COPPER]
     if copper_count < 2:
-        print(f"❌ Cannot buy Estate: Need 2+ Copper, but only have {copper_count}")
-        print("="*50 + "\n")
+        logger.debug("❌ Cannot buy Estate: Need 2+ Copper, but only have %d", copper_count, extra=extra)
         return False
     
     # Check if Estate is available in stock
-    if not is_estate_available_in_stock(game.stock):
-        print("❌ Cannot buy Estate: No Estate available in stock")
-        print("="*50 + "\n")
+    if not is_card_available(counts_of(game.stock), ESTATE):
+        logger.debug("❌ Cannot buy Estate: No Estate available in stock", extra=extra)
         return False
     
-    print(f"✅ ALL CONDITIONS MET! Will buy Estate (purchases remaining: {game_state.purchases_remaining_this_turn})")
-    print("="*50 + "\n")
-    return True
\ No newline at end of file
+    logger.debug(
+        "✅ ALL CONDITIONS MET! Will buy Estate (purchases remaining: %d)",
+        game_state.purchases_remaining_this_turn,
+        extra=extra,
+    )
+    return True
+
+
+# What a buy decision depends on: stock, money and Copper in hand, buys left, empty piles and turn
+BuySituation = tuple[list[int], int, int, int, int, int]
+
+
+def buy_situation(game: Game, game_state: GameState) -> BuySituation | None:
+    """Arguments of BuyPolicy.decide for a /play, None when we cannot buy anything."""
+    if not game_state.can_purchase():
+        return None
+    our_hand = get_our_hand_counts(game, game_state)
+    if not our_hand:
+        return None
+    stock = counts_of(game.stock)
+    return (
+        stock,
+        money_in_hand(our_hand),
+        our_hand[COPPER],
+        game_state.purchases_remaining_this_turn,
+        count_empty_piles(stock, game_state),
+        game_state.turn,
+    )
+
+
+def choose_play(game: Game, game_state: GameState, policy: BuyPolicy | None = None) -> str:
+    """Decision to send back on /play, looked up in the compiled buy policy."""
+    situation = buy_situation(game, game_state)
+    if situation is None:
+        return END_TURN
+    decision = (policy or active_policy).decide(*situation)
+    logger.debug("📋 Policy decision: %s", decision, extra={"game_id": game_state.game_id})
+    return decision
@@ -1,15 +1,104 @@
 """
 Helper functions for Rhum & Ruin strategy.
 Contains utility functions for game analysis and card counting.
+
+Hands and stocks are handled as counts lists indexed like cards.CARDS, so
+that every check is a list lookup. The list-based helpers are kept for code
+still working on CardName lists.
 """
 
-from dopynion.data_model import CardName, Cards, Game
+from dopynion.data_model import CardName, Cards, Game, Player
+
+from bot_logging import logger
+from cards import IS_ACTION, MONEY, TREASURE_CARDS, counts_of
+from game_state import GameState
+
+OUR_PLAYER_NAME = "Rhum & Ruin"
+
+
+#####################################################
+# Our player
+#####################################################
+
+
+def find_our_player_index(game: Game) -> int | None:
+    """Scan the players for ours, whose hand is the only visible one during our turn."""
+    for index, player in enumerate(game.players):
+        if OUR_PLAYER_NAME in player.name and player.hand is not None:
+            return index
+    return None
+
+
+def get_our_player_index(game: Game, game_state: GameState) -> int | None:
+    """Index of our player, resolved once per game and cached in the game state."""
+    index = game_state.our_player_index
+    if index is not None and index < len(game.players):
+        player = game.players[index]
+        if player.hand is not None and OUR_PLAYER_NAME in player.name:
+            return index
+    index = find_our_player_index(game)
+    if index is not None:
+        logger.debug("🎮 Our player is at index %d", index, extra={"game_id": game_state.game_id})
+        game_state.our_player_index = index
+    return index
+
+
+def get_our_player(game: Game, game_state: GameState | None = None) -> Player | None:
+    """Get our player, through the cached index when a game state is given."""
+    if game_state is None:
+        index = find_our_player_index(game)
+    else:
+        index = get_our_player_index(game, game_state)
+    return None if index is None else game.players[index]
+
+
+def get_our_hand_counts(game: Game, game_state: GameState) -> list[int] | None:
+    """Our hand as a counts list, None when our player is not found."""
+    our_player = get_our_player(game, game_state)
+    if our_player is None:
+        logger.debug("❌ Our player '%s' not found or has no hand!", OUR_PLAYER_NAME)
+        return None
+    return counts_of(our_player.hand)
+
+
+#####################################################
+# Counts lists
+#####################################################
+
+
+def money_in_hand(hand: list[int]) -> int:
+    """Money the treasures of a hand produce."""
+    return sum(MONEY[card] * hand[card] for card in TREASURE_CARDS if hand[card])
+
+
+def has_action_card(hand: list[int]) -> bool:
+    """Check if a hand holds at least one action card."""
+    return any(quantity and IS_ACTION[card] for card, quantity in enumerate(hand))
+
+
+def is_card_available(stock: list[int], card: int) -> bool:
+    """Check if a card is left in the stock."""
+    return stock[card] > 0
+
+
+def count_empty_piles(stock: list[int], game_state: GameState) -> int:
+    """Number of piles emptied since the beginning of the game."""
+    known_piles = game_state.known_piles
+    for card, quantity in enumerate(stock):
+        if quantity:
+            known_piles.add(card)
+    return sum(1 for card in known_piles if not stock[card])
+
+
+#####################################################
+# CardName lists
+#####################################################
 
 
 def count_copper_in_hand(hand: list[CardName]) -> int:
     """Count the number of Copper cards in the given hand."""
     copper_count = hand.count(CardName.COPPER)
-    print(f"🪙 Copper count in hand: {copper_count} (total cards: {len(hand)})")
+    logger.debug("🪙 Copper count in hand: %d (total cards: %d)", copper_count, len(hand))
     return copper_count
 
 
@@ -17,24 +106,19 @@ def is_estate_available_in_stock(stock: Cards) -> bool:
     """Check if Estate cards are available in the stock."""
     estate_quantity = stock.quantities.get(CardName.ESTATE, 0)
     available = estate_quantity > 0
-    print(f"🏘️ Estate availability in stock: {estate_quantity} cards available -> {available}")
+    logger.debug("🏘️ Estate availability in stock: %d cards available -> %s", estate_quantity, available)
     return available
 
 
 def get_player_hand_as_list(game: Game) -> list[CardName]:
     """Get our player's hand as a list of CardName.
     Since we receive the /play request, it's our turn and our hand should be the active one."""
-    print(f"🎮 Looking for player 'Rhum & Ruin' among {len(game.players)} players")
-    
-    for player in game.players:
-        print(f"   - Player: {player.name}, hand: {player.hand}")
-        if "Rhum & Ruin" in player.name and player.hand is not None:
-            # Convert Cards (quantities) to list of CardName
-            hand_list = []
-            for card_name, quantity in player.hand.quantities.items():
-                hand_list.extend([card_name] * quantity)
-            print(f"✅ Found our player! Hand: {hand_list}")
-            return hand_list
-    
-    print("❌ Our player 'Rhum & Ruin' not found or has no hand!")
-    return []
\ No newline at end of file
+    our_player = get_our_player(game)
+    if our_player is None:
+        logger.debug("❌ Our player '%s' not found or has no hand!", OUR_PLAYER_NAME)
+        return []
+    hand_list = []
+    for card_name, quantity in our_player.hand.quantities.items():
+        hand_list.extend([card_name] * quantity)
+    logger.debug("✅ Found our player! Hand: %s", hand_list)
+    return hand_list
@@ -0,0 +1,4 @@
+import os
+
+# Importing BOOT starts the bot, whose table cache must not be written outside of the test directories
+os.environ["RHUM_CACHE_DIR"] = "off"
@@ -0,0 +1,89 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from batch_simulator import BATCH_CARDS, COLUMN, BatchSimulation, estate_copper_policies, head_to_head  # noqa: E402
+from buy_policy import BIG_MONEY_POLICY, END_TURN, RHUM_AND_RUIN_POLICY, BuyPolicy, BuyRule  # noqa: E402
+from cards import CARD_NAMES, NB_CARD_TYPES, PROVINCE  # noqa: E402
+from simulator import BigMoneyPlayer, Simulation  # noqa: E402
+
+ENGINE_POLICY = BuyPolicy("Engine", [
+    BuyRule("province", min_money=8),
+    BuyRule("laboratory", min_money=5, max_money=5),
+    BuyRule("festival", min_money=6, max_money=6),
+    BuyRule("market", min_money=7, max_money=7),
+    BuyRule("smithy", min_money=4, max_money=4),
+    BuyRule("village", min_money=3, max_money=3),
+    BuyRule("woodcutter", min_money=2, max_money=2),
+])
+
+
+class TestBatchSimulation:
+    """Tests for the vectorized batch simulator."""
+
+    def test_same_seed_same_games(self):
+        """Test a seed replays the same batch."""
+        first = BatchSimulation([BIG_MONEY_POLICY, RHUM_AND_RUIN_POLICY], 50, seed=4).run()
+        second = BatchSimulation([BIG_MONEY_POLICY, RHUM_AND_RUIN_POLICY], 50, seed=4).run()
+        assert (first.scores == second.scores).all()
+        assert (first.turns == second.turns).all()
+
+    def test_cards_are_conserved(self):
+        """Test actions, buys and reshuffles neither create nor lose cards."""
+        simulation = BatchSimulation([ENGINE_POLICY, BIG_MONEY_POLICY], 200, seed=1)
+        initial_supply = simulation.supply.sum(axis=1)
+        for _ in range(15):
+            for seat in range(2):
+                simulation.play_turn(seat)
+        owned_cards = 0
+        for player in simulation.players:
+            assert (player.draw_pile + player.hand + player.discard == player.owned).all()
+            assert (player.hand.sum(axis=1) == 5).all()
+            owned_cards = owned_cards + player.owned.sum(axis=1)
+        assert (simulation.supply.sum(axis=1) + owned_cards == initial_supply + 20).all()
+        assert simulation.players[0].owned[:, COLUMN[PROVINCE]].sum() > 0
+
+    def test_decisions_match_compiled_policy(self):
+        """Test the vectorized rules decide as the compiled lookup tables do."""
+        for policy in (BIG_MONEY_POLICY, RHUM_AND_RUIN_POLICY):
+            simulation = BatchSimulation([policy, policy], 500, seed=2)
+            rng = np.random.default_rng(0)
+            simulation.supply = rng.integers(0, 3, size=simulation.supply.shape).astype(simulation.supply.dtype)
+            money = rng.integers(0, 13, size=500)
+            coppers = rng.integers(0, 5, size=500)
+            buys = rng.integers(1, 3, size=500)
+            simulation.turn = 7
+            choices = simulation.decide(list(policy.rules), np.arange(500), money, coppers, buys)
+            for row in range(500):
+                stock = [0] * NB_CARD_TYPES
+                for column, card in enumerate(BATCH_CARDS):
+                    stock[card] = int(simulation.supply[row, column])
+                empty_piles = int((simulation.supply[row] == 0).sum())
+                decision = policy.decide(stock, int(money[row]), int(coppers[row]), int(buys[row]), empty_piles, 8)
+                column = choices[row]
+                expected = f"BUY {CARD_NAMES[BATCH_CARDS[column]].value.upper()}" if column >= 0 else END_TURN
+                assert decision == expected
+
+    def test_matches_simulator(self):
+        """Test Big Money scores the same on average as in the per-game simulator."""
+        batch = BatchSimulation([BIG_MONEY_POLICY, BIG_MONEY_POLICY], 4000, seed=5).run()
+        games = [Simulation([BigMoneyPlayer(), BigMoneyPlayer()], seed=seed).run() for seed in range(300)]
+        for seat in range(2):
+            average_score = sum(game.scores[seat] for game in games) / len(games)
+            assert abs(batch.average_scores()[seat] - average_score) < 2
+        assert abs(batch.turns.mean() - sum(game.turns for game in games) / len(games)) < 1.5
+
+    def test_estate_copper_sweep(self):
+        """Test the Copper needed for an Estate is swept, fewer Estates scoring less against Big Money."""
+        policies = estate_copper_policies([2, 5])
+        assert [policy.rules[0].min_coppers for policy in policies] == [2, 5]
+        (win_rate, average_score), (_, fewer_estates_score) = [
+            head_to_head(policy, BIG_MONEY_POLICY, 200) for policy in policies
+        ]
+        assert win_rate < 0.05
+        assert average_score > fewer_estates_score > 3
+
+    def test_unsupported_card(self):
+        """Test a policy buying a card the batches do not simulate is refused."""
+        with pytest.raises(ValueError):
+            BatchSimulation([BuyPolicy("Witch", [BuyRule("witch")]), BIG_MONEY_POLICY], 10)
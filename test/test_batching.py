@@ -0,0 +1,160 @@
+import random
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import batching
+import BOOT
+from batching import DecisionBatcher, policy_evaluator
+from buy_policy import BIG_MONEY_POLICY
+from cards import NB_CARD_TYPES, PROVINCE
+from endgame import EndgameSolver
+from game_state import GameState
+from lookahead import Lookahead
+from metrics import metrics
+from simulator import BigMoneyPlayer, RhumAndRuinPlayer, Simulation
+
+
+def random_situations(nb_situations: int) -> list[tuple]:
+    rng = random.Random(7)
+    situations = []
+    for _ in range(nb_situations):
+        stock = [rng.choice((0, 8)) for _ in range(NB_CARD_TYPES)]
+        stock[PROVINCE] = rng.randint(0, 14)
+        situations.append(
+            (stock, rng.randint(0, 20), rng.randint(0, 5), rng.randint(0, 3), rng.randint(0, 4), rng.randint(1, 50))
+        )
+    return situations
+
+
+def decide_together(batcher: DecisionBatcher, situations: list[tuple]) -> list[str]:
+    """Decide every situation on its own thread, all of them announced before the first one asks."""
+    decisions = [None] * len(situations)
+    ready = threading.Barrier(len(situations))
+
+    def play(index: int) -> None:
+        with batcher.expecting():
+            ready.wait()
+            decisions[index] = batcher.decide(situations[index])
+
+    threads = [threading.Thread(target=play, args=(index,)) for index in range(len(situations))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return decisions
+
+
+class TestPolicyEvaluator:
+    """Tests for the vectorized evaluation of the buy policy."""
+
+    def test_same_decisions_as_the_policy(self):
+        """Test a batch gets the decisions of one lookup per situation, with and without NumPy."""
+        situations = random_situations(500)
+        expected = [BIG_MONEY_POLICY.decide(*situation) for situation in situations]
+        assert policy_evaluator(BIG_MONEY_POLICY)(situations) == expected
+
+    def test_without_numpy(self, monkeypatch):
+        """Test the fallback looks the decisions up one by one."""
+        monkeypatch.setattr(batching, "np", None)
+        situations = random_situations(50)
+        assert policy_evaluator(BIG_MONEY_POLICY)(situations) == [
+            BIG_MONEY_POLICY.decide(*situation) for situation in situations
+        ]
+
+
+class TestDecisionBatcher:
+    """Tests for the batches of concurrent decisions."""
+
+    def test_lone_decision_is_not_delayed(self):
+        """Test a decision with no other request in flight is evaluated at once."""
+        batcher = DecisionBatcher(policy_evaluator(BIG_MONEY_POLICY), window=1.0)
+        situation = random_situations(1)[0]
+        start = time.perf_counter()
+        with batcher.expecting():
+            decision = batcher.decide(situation)
+        assert time.perf_counter() - start < 0.1
+        assert decision == BIG_MONEY_POLICY.decide(*situation)
+
+    def test_concurrent_decisions_share_a_batch(self):
+        """Test the requests in flight are evaluated in one batch, without waiting out the window."""
+        batch_sizes = []
+        evaluate = policy_evaluator(BIG_MONEY_POLICY)
+
+        def recording_evaluate(situations):
+            batch_sizes.append(len(situations))
+            return evaluate(situations)
+
+        batcher = DecisionBatcher(recording_evaluate, window=1.0)
+        situations = random_situations(8)
+        start = time.perf_counter()
+        decisions = decide_together(batcher, situations)
+        assert time.perf_counter() - start < 0.5
+        assert batch_sizes == [8]
+        assert decisions == [BIG_MONEY_POLICY.decide(*situation) for situation in situations]
+
+    def test_errors_reach_every_request(self):
+        """Test a failed evaluation raises in each request of the batch."""
+
+        def failing_evaluate(situations):
+            raise RuntimeError("evaluator down")
+
+        batcher = DecisionBatcher(failing_evaluate, window=1.0)
+        errors = []
+
+        def play() -> None:
+            with batcher.expecting():
+                try:
+                    batcher.decide(random_situations(1)[0])
+                except RuntimeError as error:
+                    errors.append(error)
+
+        threads = [threading.Thread(target=play) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        assert len(errors) == 3
+        with pytest.raises(RuntimeError):
+            batcher.decide(random_situations(1)[0])
+
+
+class TestBatchedPlay:
+    """Tests for /play answered through the batcher."""
+
+    def test_play_decision_unchanged(self, monkeypatch):
+        """Test /play decides the same with the batcher in between."""
+        headers = {"X-Game-Id": "batched_game", "Content-Type": "application/json"}
+        body = Simulation([RhumAndRuinPlayer(), BigMoneyPlayer()], seed=2).game_view(0).model_dump_json()
+        with TestClient(BOOT.app) as client:
+            client.get("/start_turn", headers=headers)
+            expected = client.post("/play", content=body, headers=headers).json()["decision"]
+            client.get("/end_game", headers=headers)
+
+            batcher = DecisionBatcher(policy_evaluator(BOOT.active_policy))
+            monkeypatch.setattr(BOOT, "batcher", batcher)
+            batches_before = metrics.counters.get("batch of 1", 0)
+            client.get("/start_turn", headers=headers)
+            assert client.post("/play", content=body, headers=headers).json()["decision"] == expected
+            assert metrics.counters.get("batch of 1", 0) == batches_before + 1
+            client.get("/end_game", headers=headers)
+
+    def test_searched_decisions_are_not_expected(self, monkeypatch):
+        """Test the batch leader is only told about the /play requests whose decision it will evaluate."""
+        batcher = DecisionBatcher(policy_evaluator(BOOT.active_policy))
+        monkeypatch.setattr(BOOT, "batcher", batcher)
+        monkeypatch.setattr(BOOT, "lookahead", None)
+        monkeypatch.setattr(BOOT, "endgame", EndgameSolver())
+        simulation = Simulation([RhumAndRuinPlayer(), BigMoneyPlayer()], seed=2)
+        game_state = GameState("batched_game")
+        with BOOT.expecting_decision(simulation.game_view(0), game_state):
+            assert batcher._expected == 1
+        simulation.supply[PROVINCE] = 2
+        with BOOT.expecting_decision(simulation.game_view(0), game_state):
+            assert batcher._expected == 0
+        monkeypatch.setattr(BOOT, "lookahead", Lookahead())
+        simulation.supply[PROVINCE] = 8
+        with BOOT.expecting_decision(simulation.game_view(0), game_state):
+            assert batcher._expected == 0
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+import BOOT
+import game_state
+from fast_path import sample_play_body
+from game_state import SQLiteGameStateStore
+
+
+async def timed_get(client: httpx.AsyncClient, path: str, game_id: str) -> float:
+    await client.get(path, headers={"X-Game-Id": game_id})
+    return time.perf_counter()
+
+
+class TestRequestPipeline:
+    """Tests for the async handlers, serialized per game."""
+
+    def test_slow_play_only_delays_its_own_game(self, monkeypatch):
+        """Test a slow /play runs off the event loop and before the next request of its game."""
+
+        def slow_decision(game, game_state) -> str:
+            time.sleep(0.3)
+            return "END_TURN"
+
+        monkeypatch.setattr(BOOT, "decide_play", slow_decision)
+
+        async def main() -> tuple[float, float]:
+            transport = httpx.ASGITransport(app=BOOT.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bot") as client:
+                play = asyncio.create_task(
+                    client.post(
+                        "/play",
+                        content=sample_play_body(),
+                        headers={"X-Game-Id": "slow", "Content-Type": "application/json"},
+                    )
+                )
+                await asyncio.sleep(0.05)
+                same_game, other_game = await asyncio.gather(
+                    timed_get(client, "/start_turn", "slow"),
+                    timed_get(client, "/start_turn", "fast"),
+                )
+                assert (await play).json()["decision"] == "END_TURN"
+                return same_game, other_game
+
+        start = time.perf_counter()
+        same_game, other_game = asyncio.run(main())
+        assert other_game - start < 0.2
+        assert same_game - start >= 0.3
+        BOOT.release_game_state("slow")
+        BOOT.release_game_state("fast")
+
+    def test_leased_game_only_delays_its_own_game(self, monkeypatch, tmp_path):
+        """Test requests waiting for a game leased by another sqlite worker leave the other games served."""
+        path = str(tmp_path / "states.sqlite3")
+        store = SQLiteGameStateStore(path)
+        monkeypatch.setattr(game_state, "game_states", store)
+        monkeypatch.setattr(BOOT, "game_states", store)
+        other_worker = SQLiteGameStateStore(path)
+        leased = threading.Event()
+
+        def hold_the_lease() -> None:
+            with other_worker.session("leased"):
+                leased.set()
+                time.sleep(0.4)
+
+        holder = threading.Thread(target=hold_the_lease)
+        holder.start()
+        leased.wait()
+
+        async def main() -> tuple[list[float], float]:
+            transport = httpx.ASGITransport(app=BOOT.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bot") as client:
+                *same_game, other_game = await asyncio.gather(
+                    timed_get(client, "/start_turn", "leased"),
+                    timed_get(client, "/start_turn", "leased"),
+                    timed_get(client, "/start_turn", "free"),
+                )
+                return same_game, other_game
+
+        start = time.perf_counter()
+        same_game, other_game = asyncio.run(main())
+        holder.join()
+        assert other_game - start < 0.2
+        assert min(same_game) - start >= 0.3
+        assert store.get("leased").turn == 2
+        assert store.get("free").turn == 1
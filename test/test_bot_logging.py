@@ -0,0 +1,76 @@
+import io
+import logging
+
+import pytest
+
+import bot_logging
+from bot_logging import logger, set_level, setup_logging, shutdown_logging, trace_game, untrace_game
+
+
+class ListHandler(logging.Handler):
+    """Handler keeping the records it receives."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def records():
+    handler = ListHandler()
+    logger.addHandler(handler)
+    set_level("INFO")
+    yield handler.records
+    logger.removeHandler(handler)
+    untrace_game("traced_game")
+
+
+class TestLevels:
+    """Tests for the level gating of the bot logger."""
+
+    def test_debug_is_dropped_in_production(self, records):
+        """Test debug records are not even created at INFO level."""
+        assert not logger.isEnabledFor(logging.DEBUG)
+        logger.debug("hidden %s", "message", extra={"game_id": "some_game"})
+        logger.info("shown")
+        assert [record.getMessage() for record in records] == ["shown"]
+
+    def test_traced_game_logs_debug(self, records):
+        """Test debug records of a traced game go through, other games stay quiet."""
+        trace_game("traced_game")
+        logger.debug("traced", extra={"game_id": "traced_game"})
+        logger.debug("not traced", extra={"game_id": "other_game"})
+        assert [record.getMessage() for record in records] == ["traced"]
+
+    def test_bound_game_id(self, records):
+        """Test records without explicit game id use the one bound to the request."""
+        trace_game("traced_game")
+        token = bot_logging.current_game_id.set("traced_game")
+        try:
+            logger.debug("from a helper")
+        finally:
+            bot_logging.current_game_id.reset(token)
+        assert [record.getMessage() for record in records] == ["from a helper"]
+
+    def test_untrace_restores_level(self, records):
+        """Test the logger goes back to its base level once no game is traced."""
+        trace_game("traced_game")
+        untrace_game("traced_game")
+        assert not logger.isEnabledFor(logging.DEBUG)
+
+
+class TestBackgroundWriter:
+    """Tests for the queue-backed writer."""
+
+    def test_records_reach_the_stream(self):
+        """Test queued records are written once the writer is flushed."""
+        shutdown_logging()
+        stream = io.StringIO()
+        setup_logging(stream)
+        set_level("INFO")
+        logger.info("🚀 GAME STARTED - Game ID: %s", "game_1")
+        shutdown_logging()
+        assert "GAME STARTED - Game ID: game_1" in stream.getvalue()
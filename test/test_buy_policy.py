@@ -0,0 +1,131 @@
+import itertools
+
+import numpy as np
+import pytest
+from dopynion.data_model import CardName, Cards, Game, Player
+
+from buy_policy import (
+    BIG_MONEY_POLICY,
+    END_TURN,
+    RHUM_AND_RUIN_POLICY,
+    BuyPolicy,
+    BuyRule,
+    cell_index,
+    cell_indices,
+)
+from cards import DUCHY, GOLD, NB_CARD_TYPES, PROVINCE
+from game_state import GameState
+from simulator import STRATEGIES, BigMoneyPlayer, Simulation
+from strategy import choose_play, should_buy_estate
+
+
+def full_stock() -> list[int]:
+    return [8] * NB_CARD_TYPES
+
+
+class TestBuyPolicy:
+    """Tests for the compiled buy policies."""
+
+    def test_first_matching_rule_wins(self):
+        """Test rules are tried in order and END_TURN is the default."""
+        policy = BuyPolicy("test", [BuyRule("gold"), BuyRule("silver")])
+        stock = full_stock()
+        assert policy.decide(stock, money=7, coppers=0, buys=1, empty_piles=0, turn=1) == "BUY GOLD"
+        assert policy.decide(stock, money=4, coppers=0, buys=1, empty_piles=0, turn=1) == "BUY SILVER"
+        assert policy.decide(stock, money=2, coppers=0, buys=1, empty_piles=0, turn=1) == END_TURN
+        assert policy.decide(stock, money=7, coppers=0, buys=0, empty_piles=0, turn=1) == END_TURN
+
+    def test_conditions(self):
+        """Test Province, empty pile and turn conditions select the right cells."""
+        policy = BuyPolicy("test", [
+            BuyRule("duchy", max_provinces_left=4),
+            BuyRule("estate", min_empty_piles=2),
+            BuyRule("silver", min_turn=10),
+        ])
+        stock = full_stock()
+        assert policy.decide(stock, money=5, coppers=0, buys=1, empty_piles=0, turn=1) == END_TURN
+        assert policy.decide(stock, money=5, coppers=0, buys=1, empty_piles=2, turn=1) == "BUY ESTATE"
+        assert policy.decide(stock, money=5, coppers=0, buys=1, empty_piles=0, turn=12) == "BUY SILVER"
+        stock[PROVINCE] = 3
+        assert policy.decide(stock, money=5, coppers=0, buys=1, empty_piles=0, turn=1) == "BUY DUCHY"
+
+    def test_copper_condition(self):
+        """Test a rule requiring Copper in hand only matches with enough of them, whatever the money."""
+        policy = BuyPolicy("test", [BuyRule("estate", min_coppers=2)])
+        stock = full_stock()
+        assert policy.decide(stock, money=6, coppers=1, buys=1, empty_piles=0, turn=1) == END_TURN
+        assert policy.decide(stock, money=2, coppers=2, buys=1, empty_piles=0, turn=1) == "BUY ESTATE"
+        assert policy.decide(stock, money=7, coppers=5, buys=1, empty_piles=0, turn=1) == "BUY ESTATE"
+        with pytest.raises(ValueError):
+            BuyRule("estate", min_coppers=6)
+
+    def test_unavailable_cards_are_skipped(self):
+        """Test an emptied pile compiles a new table falling through to the next rule."""
+        stock = full_stock()
+        stock[GOLD] = 0
+        assert BIG_MONEY_POLICY.decide(stock, money=6, coppers=0, buys=1, empty_piles=1, turn=3) == END_TURN
+        stock[GOLD] = 1
+        assert BIG_MONEY_POLICY.decide(stock, money=6, coppers=0, buys=1, empty_piles=1, turn=3) == "BUY GOLD"
+
+    def test_tables_are_cached(self):
+        """Test the same available cards reuse the compiled table."""
+        stock = full_stock()
+        assert BIG_MONEY_POLICY.table_for(stock) is BIG_MONEY_POLICY.table_for(full_stock())
+        stock[DUCHY] = 0
+        assert BIG_MONEY_POLICY.table_for(stock) is not BIG_MONEY_POLICY.table_for(full_stock())
+
+    def test_cell_indices_match_cell_index(self):
+        """Test the vectorized cell positions are those of one cell_index per situation."""
+        situations = list(itertools.product(range(18), range(4), range(1, 4), range(15), range(4), (1, 4, 5, 39, 60)))
+        expected = [cell_index(*situation) for situation in situations]
+        assert cell_indices(*np.array(situations).T).tolist() == expected
+
+    def test_unknown_card(self):
+        """Test a rule on an unknown card is refused."""
+        with pytest.raises(ValueError):
+            BuyRule("treasure_map")
+
+    def test_table_matches_big_money(self):
+        """Test the compiled Big Money plays the same games as the hand-written one."""
+        for seed in range(5):
+            reference = Simulation([BigMoneyPlayer(), BigMoneyPlayer()], seed=seed).run()
+            compiled = Simulation([STRATEGIES["big_money_table"](), BigMoneyPlayer()], seed=seed).run()
+            assert compiled.scores == reference.scores
+
+
+class TestChoosePlay:
+    """Tests for the /play decision."""
+
+    def test_buys_estate_with_two_coppers(self):
+        """Test the default policy buys an Estate with 2 Copper."""
+        players = [Player(name="Rhum & Ruin", hand=Cards(quantities={CardName.COPPER: 2}), score=3)]
+        game = Game(finished=False, players=players, stock=Cards(quantities={CardName.ESTATE: 8}))
+        assert choose_play(game, GameState("test_game")) == "BUY ESTATE"
+
+    def test_ends_turn_without_purchase(self):
+        """Test the turn ends once the purchase is used."""
+        players = [Player(name="Rhum & Ruin", hand=Cards(quantities={CardName.COPPER: 5}), score=3)]
+        game = Game(finished=False, players=players, stock=Cards(quantities={CardName.ESTATE: 8}))
+        game_state = GameState("test_game")
+        game_state.use_purchase()
+        assert choose_play(game, game_state) == END_TURN
+
+    def test_same_decisions_as_should_buy_estate(self):
+        """Test the Rhum & Ruin policy buys an Estate exactly when should_buy_estate says so."""
+        for coppers, silvers, golds, estates in itertools.product(range(4), range(3), range(2), range(2)):
+            quantities = {
+                CardName.COPPER: coppers, CardName.SILVER: silvers, CardName.GOLD: golds, CardName.ESTATE: estates,
+            }
+            hand = Cards(quantities={card: quantity for card, quantity in quantities.items() if quantity})
+            for estates_in_stock, provinces_in_stock, purchases_used in itertools.product((0, 1, 8), (1, 8), (0, 1)):
+                stock = {CardName.ESTATE: estates_in_stock, CardName.PROVINCE: provinces_in_stock}
+                game = Game(
+                    finished=False,
+                    players=[Player(name="Rhum & Ruin", hand=hand, score=3)],
+                    stock=Cards(quantities={card: quantity for card, quantity in stock.items() if quantity}),
+                )
+                game_state = GameState("test_game")
+                for _ in range(purchases_used):
+                    game_state.use_purchase()
+                expected = "BUY ESTATE" if should_buy_estate(game, game_state) else END_TURN
+                assert choose_play(game, game_state, RHUM_AND_RUIN_POLICY) == expected, (quantities, stock)
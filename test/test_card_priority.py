@@ -0,0 +1,113 @@
+from dopynion.data_model import CardName
+from fastapi.testclient import TestClient
+
+from BOOT import app
+from card_priority import EARLY, LATE, MID, game_phase, priority_for
+from cards import CARD_INDEX, COPPER, CURSE, ESTATE, GOLD, NB_CARD_TYPES, PROVINCE, SILVER
+from deck_tracker import DeckTracker
+
+CHAPEL = CARD_INDEX[CardName.CHAPEL]
+LABORATORY = CARD_INDEX[CardName.LABORATORY]
+MONEYLENDER = CARD_INDEX[CardName.MONEYLENDER]
+SWAP = CARD_INDEX[CardName.SWAP]
+
+BASE_PILES = frozenset(range(10))
+KINGDOM = BASE_PILES | {CHAPEL, CARD_INDEX[CardName.REMODEL]}
+
+
+def counts(*cards: int) -> list[int]:
+    hand = [0] * NB_CARD_TYPES
+    for card in cards:
+        hand[card] += 1
+    return hand
+
+
+class TestCardPriority:
+    """Tests for the card orderings of a kingdom and a game phase."""
+
+    def test_game_phases(self):
+        """Test the phase follows the turn number."""
+        assert [game_phase(turn) for turn in (1, 10, 20)] == [EARLY, MID, LATE]
+
+    def test_discard_dead_cards_first(self):
+        """Test Militia discards curses and victory cards before any money."""
+        priority = priority_for(KINGDOM, MID)
+        hand = counts(COPPER, GOLD, ESTATE, CURSE, SILVER)
+        discarded = []
+        for _ in range(2):
+            card = priority.first_held(priority.discard_order, hand)
+            hand[card] -= 1
+            discarded.append(card)
+        assert discarded == [CURSE, ESTATE]
+
+    def test_remodel_gold_into_province_late(self):
+        """Test Remodel trashes junk early and turns Gold into a Province late."""
+        hand = counts(COPPER, GOLD, ESTATE)
+        early = priority_for(KINGDOM, EARLY)
+        late = priority_for(KINGDOM, LATE)
+        assert early.first_held(early.trash_order, hand) == ESTATE
+        assert late.first_held(late.trash_order, hand) == GOLD
+        assert late.first_held(late.gain_order, counts(GOLD, PROVINCE)) == PROVINCE
+
+    def test_chapel_trashes_junk_only(self):
+        """Test Chapel trashes curses and early Estates, and Coppers once the deck has other money."""
+        early = priority_for(KINGDOM, EARLY)
+        starting_deck = counts(*[COPPER] * 7, *[ESTATE] * 3)
+        assert early.confirm_chapel(CURSE, starting_deck)
+        assert early.confirm_chapel(ESTATE, starting_deck)
+        assert not early.confirm_chapel(COPPER, starting_deck)
+        assert early.confirm_chapel(COPPER, counts(*[COPPER] * 7, SILVER, SILVER, GOLD))
+        assert not early.confirm_chapel(SILVER, starting_deck)
+        assert not priority_for(KINGDOM, LATE).confirm_chapel(ESTATE, starting_deck)
+        deck = DeckTracker()
+        deck.record_decision("ACTION chapel")
+        assert not early.confirm_trash(COPPER, deck)
+        assert not early.confirm_trash(CHAPEL, deck)
+
+    def test_moneylender_trashes_copper(self):
+        """Test Moneylender always trashes a Copper for its money, even from a starting deck."""
+        deck = DeckTracker()
+        deck.hand = counts(MONEYLENDER, COPPER, COPPER, ESTATE)
+        deck.record_decision("ACTION moneylender")
+        for phase in (EARLY, LATE):
+            assert priority_for(KINGDOM | {MONEYLENDER}, phase).confirm_trash(COPPER, deck)
+
+    def test_swap_trades_for_a_better_action(self):
+        """Test Swap gives back an action for a better one of the kingdom, and keeps the best one."""
+        kingdom = BASE_PILES | {CHAPEL, SWAP, LABORATORY}
+        priority = priority_for(kingdom, MID)
+        deck = DeckTracker()
+        deck.hand = counts(SWAP, CHAPEL, LABORATORY, COPPER)
+        deck.record_decision("ACTION swap")
+        assert priority.confirm_trash(CHAPEL, deck)
+        assert not priority.confirm_trash(LABORATORY, deck)
+        assert not priority.confirm_trash(COPPER, deck)
+
+    def test_same_tables_for_the_same_game_setting(self):
+        """Test the orderings are built once per kingdom and phase."""
+        assert priority_for(KINGDOM, MID) is priority_for(frozenset(KINGDOM), MID)
+
+
+class TestCardEndpoints:
+    """Tests for the card-interaction endpoints answering from the card priorities."""
+
+    def test_endpoints_pick_from_the_priorities(self):
+        """Test the endpoints no longer answer with the first card given."""
+        headers = {"X-Game-Id": "card_priority_game"}
+        with TestClient(app) as client:
+            client.get("/start_game", headers=headers)
+            hand = [CardName.GOLD, CardName.COPPER, CardName.ESTATE]
+            response = client.post("/discard_card_from_hand", json={"hand": hand}, headers=headers)
+            assert response.json()["decision"] == CardName.ESTATE
+            possible_cards = [CardName.COPPER, CardName.SILVER, CardName.GOLD]
+            response = client.post(
+                "/choose_card_to_receive_in_discard", json={"possible_cards": possible_cards}, headers=headers
+            )
+            assert response.json()["decision"] == CardName.GOLD
+            response = client.post(
+                "/confirm_trash_card_from_hand",
+                json={"card_name": CardName.GOLD, "hand": [CardName.GOLD]},
+                headers=headers,
+            )
+            assert response.json()["decision"] is False
+            client.get("/end_game", headers=headers)
@@ -0,0 +1,125 @@
+import pytest
+from dopynion.data_model import CardName
+
+from cards import CARD_INDEX, COPPER, CURSE, ESTATE, NB_CARD_TYPES, SILVER, counts_of
+from deck_tracker import DeckTracker
+from simulator import BigMoneyPlayer, Simulation, SmithyBigMoneyPlayer
+
+PORT = CARD_INDEX[CardName.PORT]
+SMITHY = CARD_INDEX[CardName.SMITHY]
+WITCH = CARD_INDEX[CardName.WITCH]
+
+
+def hand_of(**quantities: int) -> list[int]:
+    hand = [0] * NB_CARD_TYPES
+    for card_name, quantity in quantities.items():
+        hand[CARD_INDEX[card_name]] = quantity
+    return hand
+
+
+class TrackedPlayer(SmithyBigMoneyPlayer):
+    """Smithy Big Money comparing a deck tracker with the real zones of the simulator."""
+
+    def start_game(self, game_id):
+        self.deck = DeckTracker()
+        self.mismatches = 0
+
+    def play(self, simulation, index):
+        our_player = simulation.game_view(index).players[index]
+        self.deck.observe(counts_of(our_player.hand), our_player.score)
+        player = simulation.players[index]
+        draw_pile = [0] * NB_CARD_TYPES
+        for card in player.deck:
+            draw_pile[card] += 1
+        if (self.deck.owned, self.deck.draw_pile, self.deck.discard) != (player.owned(), draw_pile, player.discard):
+            self.mismatches += 1
+        decision = super().play(simulation, index)
+        self.deck.record_decision(decision)
+        return decision
+
+
+class WitchPlayer(BigMoneyPlayer):
+    """Big Money with two Witches, cursing the other players."""
+
+    def play(self, simulation, index):
+        player = simulation.players[index]
+        if not player.buy_phase and player.hand[WITCH]:
+            return "ACTION witch"
+        money = player.money + player.hand_money()
+        if player.buys and 5 <= money <= 6 and simulation.supply[WITCH] and player.owned()[WITCH] < 2:
+            return "BUY witch"
+        return super().play(simulation, index)
+
+
+class TestDeckTracker:
+    """Tests for the incremental deck model."""
+
+    def test_first_hand_is_drawn_from_starting_deck(self):
+        """Test observing the first hand moves it out of the draw pile."""
+        deck = DeckTracker()
+        deck.observe(hand_of(copper=3, estate=2))
+        assert deck.draw_pile[COPPER] == 4
+        assert deck.draw_pile[ESTATE] == 1
+        assert deck.expected_money_next_hand() == pytest.approx(4.0)
+
+    def test_buy_and_end_turn(self):
+        """Test bought and played cards end in the discard at the end of the turn."""
+        deck = DeckTracker()
+        deck.observe(hand_of(copper=3, estate=2))
+        deck.record_decision("BUY SILVER")
+        deck.observe(hand_of(estate=2))
+        deck.record_decision("END_TURN")
+        assert deck.owned[SILVER] == 1
+        assert deck.discard[SILVER] == 1
+        assert deck.discard[COPPER] == 3
+        assert sum(deck.hand) == 0
+
+    def test_port_is_gained_twice(self):
+        """Test buying a Port gives two of them."""
+        deck = DeckTracker()
+        deck.record_decision("BUY port")
+        assert deck.owned[PORT] == 2
+
+    def test_curses_are_inferred_from_score(self):
+        """Test a score below the model adds the missing Curses."""
+        deck = DeckTracker()
+        deck.observe(hand_of(copper=5), score=1)
+        assert deck.owned[CURSE] == 2
+
+    def test_reshuffle(self):
+        """Test drawing more than the draw pile shuffles the discard in."""
+        deck = DeckTracker()
+        deck.observe(hand_of(copper=3, estate=2))
+        deck.record_decision("END_TURN")
+        deck.observe(hand_of(copper=4, estate=1))
+        deck.record_decision("END_TURN")
+        assert sum(deck.draw_pile) == 0
+        deck.observe(hand_of(copper=2, estate=3))
+        assert deck.draw_pile[COPPER] == 5
+        assert deck.draw_pile[ESTATE] == 0
+
+    def test_likely_next_hands(self):
+        """Test next hands come from the draw pile, then from the reshuffled discard."""
+        deck = DeckTracker()
+        hands = deck.likely_next_hands(limit=10)
+        assert sum(probability for probability, _ in hands) == pytest.approx(1.0)
+        assert hands[0][1] in (hand_of(copper=3, estate=2), hand_of(copper=4, estate=1))
+        assert hands[0][0] == pytest.approx(5 / 12)
+        deck.observe(hand_of(copper=3, estate=2))
+        deck.record_decision("END_TURN")
+        deck.observe(hand_of(copper=4, estate=1))
+        deck.record_decision("END_TURN")
+        deck.draw_pile[COPPER] = 2
+        deck.discard[COPPER] -= 2
+        # Both Coppers of the draw pile, then 3 of the 5 Coppers and 3 Estates of the discard
+        hands = deck.likely_next_hands(limit=10)
+        assert [hand for _, hand in hands][0] == hand_of(copper=4, estate=1)
+        assert all(hand[COPPER] >= 2 for _, hand in hands)
+        assert sum(probability for probability, _ in hands) == pytest.approx(1.0)
+
+    def test_matches_simulation(self):
+        """Test the tracked zones stay equal to the simulator's, attacks and actions included."""
+        for seed in range(10):
+            tracked = TrackedPlayer()
+            Simulation([tracked, WitchPlayer()], seed=seed, kingdom=[SMITHY, WITCH]).run()
+            assert tracked.mismatches == 0
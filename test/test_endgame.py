@@ -0,0 +1,107 @@
+import pytest
+from dopynion.data_model import CardName, Cards, Game, Player
+
+from cards import COPPER, ESTATE, GOLD, NB_CARD_TYPES, PROVINCE, SILVER
+from endgame import EndgameSolver, SearchTimeout, TranspositionTable, compress
+from game_state import GameState
+from strategy import update_deck_tracker
+
+# Stock of the choices: Colony, Province, Duchy, Estate, Platinum, Gold, Silver
+LAST_PROVINCE = (8, 1, 8, 8, 10, 20, 30)
+
+
+def deck(quantities: dict[int, int]) -> tuple[int, ...]:
+    counts = [0] * NB_CARD_TYPES
+    for card, quantity in quantities.items():
+        counts[card] = quantity
+    return compress(counts)
+
+
+DRAW_PILE = deck({COPPER: 7, ESTATE: 3, SILVER: 4, GOLD: 3})
+EMPTY_DISCARD = deck({})
+
+
+def play_request(provinces_left: int) -> tuple[Game, GameState]:
+    players = [
+        Player(name="Rhum & Ruin", hand=Cards(quantities={CardName.GOLD: 2, CardName.SILVER: 1}), score=20),
+        Player(name="Big Money", hand=None, score=22),
+    ]
+    stock = {CardName.COPPER: 40, CardName.SILVER: 30, CardName.GOLD: 20, CardName.ESTATE: 8,
+             CardName.DUCHY: 8, CardName.PROVINCE: provinces_left}
+    game = Game(finished=False, players=players, stock=Cards(quantities=stock))
+    game_state = GameState("endgame_game")
+    game_state.reset_turn()
+    update_deck_tracker(game, game_state)
+    return game, game_state
+
+
+class TestEndgameSolver:
+    """Tests for the expectimax search of the last turns."""
+
+    def test_takes_the_last_province_when_ahead(self):
+        """Test ending the game on a win is a sure win."""
+        solver = EndgameSolver(budget=5)
+        choice, value = solver.solve(8, DRAW_PILE, EMPTY_DISCARD, LAST_PROVINCE, 30, 28, depth=2)
+        assert choice == PROVINCE
+        assert value == 1.0
+
+    def test_leaves_the_last_province_when_behind(self):
+        """Test the search never ends the game on a loss."""
+        solver = EndgameSolver(budget=5)
+        choice, value = solver.solve(8, DRAW_PILE, EMPTY_DISCARD, LAST_PROVINCE, 20, 28, depth=2)
+        assert choice != PROVINCE
+        assert 0.0 < value < 1.0
+
+    def test_table_keyed_on_the_solve_parameters(self):
+        """Test positions solved with other empty piles or hand size are not reused."""
+        position = (5, DRAW_PILE, EMPTY_DISCARD, (8, 4, 8, 8, 10, 20, 30), 20, 24)
+        for parameters in ({"other_empty_piles": 2}, {"hand_size": 6}):
+            expected = EndgameSolver(budget=5).solve(*position, depth=3, **parameters)
+            solver = EndgameSolver(budget=5)
+            solver.solve(*position, depth=3)
+            assert solver.solve(*position, depth=3, **parameters) == expected
+
+    def test_timeout_keeps_the_last_completed_depth(self):
+        """Test a search out of time at one depth answers with the result of the depth before."""
+        position = (8, DRAW_PILE, EMPTY_DISCARD, (8, 4, 8, 8, 10, 20, 30), 20, 24)
+        expected = EndgameSolver(budget=5).solve(*position, depth=2)
+        solver = EndgameSolver(budget=5)
+        search_turn = solver._turn
+
+        def out_of_time_at_depth_3(*args):
+            if args[-1] == 3:
+                raise SearchTimeout()
+            return search_turn(*args)
+
+        solver._turn = out_of_time_at_depth_3
+        assert solver.solve(*position, depth=4) == expected
+        assert solver._local.depth == 2
+
+    def test_only_in_the_endgame(self):
+        """Test /play switches to the solver once few Provinces are left."""
+        solver = EndgameSolver(budget=0.5)
+        assert solver.decide(*play_request(provinces_left=8)) is None
+        decision = solver.decide(*play_request(provinces_left=2))
+        assert decision in {"END_TURN", "BUY PROVINCE", "BUY DUCHY", "BUY GOLD", "BUY SILVER", "BUY ESTATE"}
+
+    def test_out_of_budget(self):
+        """Test a search running past its deadline is abandoned."""
+        solver = EndgameSolver(budget=1e-9)
+        with pytest.raises(SearchTimeout):
+            solver.solve(8, DRAW_PILE, EMPTY_DISCARD, (8, 4, 8, 8, 10, 20, 30), 20, 20, depth=4)
+        assert EndgameSolver(budget=0.0).decide(*play_request(provinces_left=2)) is None
+
+
+class TestTranspositionTable:
+    """Tests for the bounded table of searched positions."""
+
+    def test_least_recently_used_is_evicted(self):
+        """Test the table keeps its size bound, evicting the least recently used position."""
+        table = TranspositionTable(max_size=2)
+        table.put("first", 0.1)
+        table.put("second", 0.2)
+        assert table.get("first") == 0.1
+        table.put("third", 0.3)
+        assert len(table) == 2
+        assert table.get("second") is None
+        assert table.get("first") == 0.1
@@ -0,0 +1,64 @@
+import pytest
+from fastapi import FastAPI, Header
+from fastapi.testclient import TestClient
+
+import BOOT
+from fake_arbiter import LoadReport, RemoteBotPlayer, run_load_test
+from simulator import BigMoneyPlayer, IllegalActionError, Simulation
+
+cheating_app = FastAPI()
+
+
+@cheating_app.get("/start_game")
+@cheating_app.get("/start_turn")
+@cheating_app.get("/end_game")
+def cheating_lifecycle(x_game_id: str = Header()) -> dict:
+    return {"game_id": x_game_id, "decision": "OK"}
+
+
+@cheating_app.post("/play")
+def cheating_play(x_game_id: str = Header()) -> dict:
+    return {"game_id": x_game_id, "decision": "BUY PROVINCE"}
+
+
+class TestFakeArbiter:
+    """Tests for the local arbiter stand-in."""
+
+    def test_bot_plays_legal_games(self):
+        """Test the bot answers every request of concurrent games legally."""
+        report = run_load_test(nb_games=4, concurrency=2, opponents=["big_money"], seed=3)
+        assert report.nb_games == 4
+        assert report.ok, report.summary()
+        assert report.latencies["/play"].count > 0
+        assert report.latencies["/start_turn"].count > 0
+
+    def test_app_runs_once_per_load_test(self, monkeypatch):
+        """Test the games of a load test share one client, the bot lifespan running once."""
+        lifespans = []
+        monkeypatch.setattr(BOOT.startup, "save_tables", lambda: lifespans.append(True))
+        report = run_load_test(nb_games=3, concurrency=2, opponents=["big_money"], seed=4)
+        assert report.nb_games == 3
+        assert len(lifespans) == 1
+
+    def test_illegal_decision_is_reported(self):
+        """Test a bot buying what it cannot afford is eliminated and reported."""
+        report = LoadReport()
+        with TestClient(cheating_app) as client:
+            bot = RemoteBotPlayer(client, report, "Cheater")
+            simulation = Simulation([bot, BigMoneyPlayer()], seed=1)
+            simulation.game_id = "cheating_game"
+            simulation.run()
+        report.game_over(simulation.game_id, simulation.players[0].eliminated, False, bot.last_decision)
+        assert report.nb_eliminations == 1
+        assert not report.ok
+        assert "BUY PROVINCE" in report.illegal_samples[0]
+
+    def test_missing_route_is_an_error(self):
+        """Test a card interaction the bot does not implement counts as an error."""
+        report = LoadReport()
+        with TestClient(cheating_app) as client:
+            bot = RemoteBotPlayer(client, report, "Cheater")
+            bot.game_id = "cheating_game"
+            with pytest.raises(IllegalActionError):
+                bot.confirm_discard_deck()
+        assert report.errors == {"/confirm_discard_deck: status 404": 1}
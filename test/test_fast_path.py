@@ -0,0 +1,76 @@
+import json
+from typing import Annotated
+
+from dopynion.data_model import CardName, Cards, Game, Player
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+import fast_path
+from BOOT import DopynionResponseCardName, DopynionResponseStr
+from fast_path import GameView, decision_body, game_from_body, lazy_game, sample_play_body
+from game_state import GameState
+from strategy import choose_play, update_deck_tracker
+
+
+def decide(game) -> str:
+    game_state = GameState("fast_path_game")
+    game_state.reset_turn()
+    update_deck_tracker(game, game_state)
+    return choose_play(game, game_state)
+
+
+class TestDecisionBody:
+    """Tests for the responses assembled as bytes."""
+
+    def test_same_json_as_the_response_models(self):
+        """Test the bodies decode like the serialized response models."""
+        assert json.loads(decision_body("game-1", "BUY GOLD")) == json.loads(
+            DopynionResponseStr(game_id="game-1", decision="BUY GOLD").model_dump_json()
+        )
+        assert json.loads(decision_body("game-1", CardName.ESTATE)) == json.loads(
+            DopynionResponseCardName(game_id="game-1", decision=CardName.ESTATE).model_dump_json()
+        )
+        assert json.loads(decision_body("game-1", True)) == {"game_id": "game-1", "decision": True}
+
+    def test_game_id_is_escaped(self):
+        """Test a game identifier needing escapes still gives valid JSON."""
+        assert json.loads(decision_body('a "quoted" \\ id', "OK"))["game_id"] == 'a "quoted" \\ id'
+
+
+class TestLazyGame:
+    """Tests for the /play payload read without validation."""
+
+    def test_same_decision_as_the_validated_game(self):
+        """Test the strategy decides the same on the lazy payload and on the validated one."""
+        players = [
+            Player(name="Rhum & Ruin", hand=Cards(quantities={CardName.COPPER: 2, CardName.SILVER: 1}), score=3),
+            Player(name="Big Money", hand=None, score=3),
+        ]
+        stock = Cards(quantities={CardName.PROVINCE: 8, CardName.GOLD: 30, CardName.ESTATE: 8, CardName.SILVER: 40})
+        body = Game(finished=False, players=players, stock=stock).model_dump_json().encode()
+        lazy = game_from_body(body)
+        assert lazy.players[1].hand is None
+        assert lazy.stock.quantities["province"] == 8
+        decision = decide(lazy)
+        assert decision.startswith("BUY")
+        assert decision == decide(Game.model_validate_json(body))
+
+    def test_invalid_payload_is_rejected(self):
+        """Test a malformed body is answered with a 422, as with validation."""
+        app = FastAPI()
+
+        @app.post("/play")
+        def play(game: Annotated[GameView, Depends(lazy_game)]) -> dict:
+            return {"players": len(game.players)}
+
+        with TestClient(app) as client:
+            assert client.post("/play", content=sample_play_body()).status_code == 200
+            assert client.post("/play", content=b'{"finished": false}').status_code == 422
+            assert client.post("/play", content=b"not json").status_code == 422
+
+    def test_without_orjson(self, monkeypatch):
+        """Test the fallback codec reads and writes the same JSON."""
+        monkeypatch.setattr(fast_path, "orjson", None)
+        body = sample_play_body()
+        assert len(game_from_body(body).players) == 4
+        assert fast_path.dumps({"decision": "OK"}) == b'{"decision":"OK"}'
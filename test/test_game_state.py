@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from cards import SILVER
+from game_state import GameLocks, GameStateConflictError, SQLiteGameStateStore
+
+
+class FakeClock:
+    """Clock moved by hand."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSQLiteGameStateStore:
+    """Tests for the game state store shared between worker processes."""
+
+    def test_updates_are_shared(self, tmp_path):
+        """Test an update made through one worker is seen by another one."""
+        path = str(tmp_path / "states.sqlite3")
+        first_worker = SQLiteGameStateStore(path)
+        second_worker = SQLiteGameStateStore(path)
+        with first_worker.session("game_1") as game_state:
+            game_state.reset_turn()
+            game_state.use_purchase()
+            game_state.deck.record_decision("BUY SILVER")
+        game_state = second_worker.get("game_1")
+        assert game_state.turn == 1
+        assert not game_state.can_purchase()
+        assert game_state.deck.owned[SILVER] == 1
+        assert second_worker.size == 1
+
+    def test_get_does_not_store_changes(self, tmp_path):
+        """Test changes made outside of a session are not written back."""
+        store = SQLiteGameStateStore(str(tmp_path / "states.sqlite3"))
+        store.get("game_1").use_purchase()
+        assert store.get("game_1").can_purchase()
+
+    def test_failed_session_is_discarded(self, tmp_path):
+        """Test an exception in a session leaves the stored state unchanged."""
+        store = SQLiteGameStateStore(str(tmp_path / "states.sqlite3"))
+        with pytest.raises(RuntimeError):
+            with store.session("game_1") as game_state:
+                game_state.use_purchase()
+                raise RuntimeError("strategy failed")
+        assert store.get("game_1").can_purchase()
+
+    def test_concurrent_update_is_refused(self, tmp_path):
+        """Test two sessions updating the same game cannot both win."""
+        store = SQLiteGameStateStore(str(tmp_path / "states.sqlite3"))
+        store.get("game_1")
+        with pytest.raises(GameStateConflictError):
+            with store.session("game_1") as first:
+                with store.session("game_1") as second:
+                    second.use_purchase()
+                first.reset_turn()
+        assert not store.get("game_1").can_purchase()
+
+    def test_concurrent_sessions_of_two_workers(self, tmp_path):
+        """Test sessions of the same game in two workers run one after the other, both updates kept."""
+        path = str(tmp_path / "states.sqlite3")
+        workers = [SQLiteGameStateStore(path), SQLiteGameStateStore(path)]
+        workers[0].get("game_1")
+        first_holds_the_game = threading.Event()
+        errors = []
+
+        def buy_silver(worker: SQLiteGameStateStore, slow: bool) -> None:
+            try:
+                with worker.session("game_1") as game_state:
+                    if slow:
+                        first_holds_the_game.set()
+                        time.sleep(0.1)
+                    game_state.deck.record_decision("BUY SILVER")
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=buy_silver, args=(workers[0], True))]
+        threads.append(threading.Thread(target=buy_silver, args=(workers[1], False)))
+        threads[0].start()
+        first_holds_the_game.wait()
+        threads[1].start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        assert workers[1].get("game_1").deck.owned[SILVER] == 2
+
+    def test_release_and_eviction(self, tmp_path):
+        """Test released, expired and least recently used games are removed."""
+        clock = FakeClock()
+        store = SQLiteGameStateStore(str(tmp_path / "states.sqlite3"), max_size=2, ttl=10, clock=clock)
+        store.get("finished_game")
+        assert store.release("finished_game")
+        assert not store.release("finished_game")
+        store.get("idle_game")
+        clock.now += 20
+        store.get("game_1")
+        clock.now += 1
+        store.get("game_2")
+        clock.now += 1
+        store.get("game_3")
+        store.evict()
+        assert "idle_game" not in store
+        assert "game_1" not in store
+        assert "game_2" in store and "game_3" in store
+
+
+class TestGameLocks:
+    """Tests for the per-game ordering of concurrent requests."""
+
+    def test_requests_of_a_game_in_arrival_order(self):
+        """Test a game's requests run one at a time in order, other games meanwhile."""
+        locks = GameLocks()
+        events = []
+
+        async def request(game_id: str, name: str, delay: float) -> None:
+            async with locks.hold(game_id):
+                events.append(f"{name} start")
+                await asyncio.sleep(delay)
+                events.append(f"{name} end")
+
+        async def main() -> None:
+            await asyncio.gather(
+                request("a", "play a", 0.05),
+                request("a", "start_turn a", 0),
+                request("b", "start_turn b", 0),
+            )
+
+        asyncio.run(main())
+        assert events == [
+            "play a start",
+            "start_turn b start",
+            "start_turn b end",
+            "play a end",
+            "start_turn a start",
+            "start_turn a end",
+        ]
+        assert len(locks) == 0
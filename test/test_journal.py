@@ -0,0 +1,98 @@
+from dopynion.data_model import CardName, Cards, Game, Player
+
+from cards import COPPER, SILVER
+from game_state import GameState, GameStateStore
+from journal import GameJournal, attach_journal, decode_state, encode_state
+
+
+def play_request(opponent_score: int) -> Game:
+    players = [
+        Player(name="Big Money", hand=None, score=opponent_score),
+        Player(name="Rhum & Ruin", hand=Cards(quantities={CardName.COPPER: 5}), score=3),
+    ]
+    return Game(finished=False, players=players, stock=Cards(quantities={CardName.SILVER: 39}))
+
+
+def played_state(game_id: str) -> GameState:
+    game_state = GameState(game_id)
+    game_state.reset_turn()
+    game_state.use_purchase()
+    game_state.our_player_index = 1
+    game_state.known_piles = {COPPER, SILVER}
+    game_state.deck.record_decision("BUY SILVER")
+    game_state.opponents.observe(play_request(opponent_score=3), 1, game_state.turn)
+    return game_state
+
+
+def restart(directory) -> GameStateStore:
+    store = GameStateStore()
+    attach_journal(store, directory).close()
+    return store
+
+
+class TestGameJournal:
+    """Tests for the crash-safe journal of game states."""
+
+    def test_encoding_round_trip(self):
+        """Test a game state survives its compact binary encoding."""
+        game_state = decode_state("game_1", encode_state(played_state("game_1")))
+        assert game_state.turn == 1
+        assert not game_state.can_purchase()
+        assert game_state.our_player_index == 1
+        assert game_state.known_piles == {COPPER, SILVER}
+        assert game_state.deck.owned[SILVER] == 1
+        assert game_state.deck.discard[SILVER] == 1
+        game_state.opponents.observe(play_request(opponent_score=9), 1, game_state.turn + 1)
+        assert game_state.opponents.leading_opponent().points_per_turn() == 6.0
+
+    def test_restart_restores_live_games(self, tmp_path):
+        """Test games updated before a restart are back, released ones are not."""
+        store = GameStateStore()
+        journal = attach_journal(store, tmp_path)
+        with store.session("game_1") as game_state:
+            game_state.reset_turn()
+            game_state.use_purchase()
+        with store.session("game_2") as game_state:
+            game_state.reset_turn()
+        store.release("game_2")
+        journal.close()
+
+        restarted = restart(tmp_path)
+        assert "game_2" not in restarted
+        game_state = restarted.get("game_1")
+        assert game_state.turn == 1
+        assert not game_state.can_purchase()
+
+    def test_snapshot_compacts_journal(self, tmp_path):
+        """Test a snapshot empties the journal and keeps every live game."""
+        store = GameStateStore()
+        journal = attach_journal(store, tmp_path)
+        for turn in range(5):
+            with store.session("game_1") as game_state:
+                game_state.reset_turn()
+        journal.snapshot()
+        with store.session("game_2") as game_state:
+            game_state.reset_turn()
+        journal.close()
+
+        assert journal.snapshot_path.stat().st_size > 0
+        restarted = restart(tmp_path)
+        assert restarted.get("game_1").turn == 5
+        assert restarted.get("game_2").turn == 1
+
+    def test_incomplete_record_is_dropped(self, tmp_path):
+        """Test a record torn by a crash is ignored and cut from the journal."""
+        store = GameStateStore()
+        journal = attach_journal(store, tmp_path)
+        with store.session("game_1") as game_state:
+            game_state.reset_turn()
+        journal.close()
+        valid_size = journal.journal_path.stat().st_size
+        with journal.journal_path.open("ab") as journal_file:
+            journal_file.write(b"\x01\x06\x00")
+
+        restarted_journal = GameJournal(tmp_path)
+        game_states = restarted_journal.replay()
+        assert [game_state.game_id for game_state in game_states] == ["game_1"]
+        assert journal.journal_path.stat().st_size == valid_size
+        assert restart(tmp_path).get("game_1").turn == 1
@@ -0,0 +1,71 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from dopynion.data_model import CardName, Cards, Game, Player
+
+from buy_policy import BIG_MONEY_POLICY, END_TURN
+from cards import PROVINCE, score_of
+from game_state import GameState
+from lookahead import Lookahead, Position, playout
+from metrics import metrics
+from strategy import update_deck_tracker
+
+
+def play_request(copper_count: int, stock: dict[CardName, int]) -> tuple[Game, GameState]:
+    players = [
+        Player(name="Rhum & Ruin", hand=Cards(quantities={CardName.COPPER: copper_count}), score=3),
+        Player(name="Big Money", hand=None, score=3),
+    ]
+    game = Game(finished=False, players=players, stock=Cards(quantities=stock))
+    game_state = GameState("lookahead_game")
+    game_state.reset_turn()
+    update_deck_tracker(game, game_state)
+    return game, game_state
+
+
+STOCK = {CardName.COPPER: 46, CardName.SILVER: 40, CardName.GOLD: 30, CardName.ESTATE: 8, CardName.PROVINCE: 8}
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+class TestLookahead:
+    """Tests for the playout search of /play."""
+
+    def test_answers_within_budget(self, executor):
+        """Test the search returns a legal buy in time and reports its playouts."""
+        game, game_state = play_request(5, STOCK)
+        decisions_before = metrics.search.decisions
+        start = time.perf_counter()
+        decision = Lookahead(budget=0.1, nb_workers=2, executor=executor).decide(game, game_state)
+        assert time.perf_counter() - start < 0.3
+        assert decision in {END_TURN, "BUY COPPER", "BUY SILVER", "BUY ESTATE"}
+        assert metrics.search.decisions == decisions_before + 1
+        assert metrics.search.max_playouts > 0
+
+    def test_falls_back_without_playouts(self, executor):
+        """Test an exhausted budget answers with the buy policy."""
+        game, game_state = play_request(2, STOCK)
+        fallbacks_before = metrics.search.fallbacks
+        assert Lookahead(budget=0.0, nb_workers=2, executor=executor).decide(game, game_state) == "BUY ESTATE"
+        assert metrics.search.fallbacks == fallbacks_before + 1
+
+    def test_no_search_without_purchase(self, executor):
+        """Test no playout is run once the purchase of the turn is used."""
+        game, game_state = play_request(5, STOCK)
+        game_state.use_purchase()
+        decisions_before = metrics.search.decisions
+        assert Lookahead(budget=0.1, executor=executor).decide(game, game_state) == END_TURN
+        assert metrics.search.decisions == decisions_before
+
+    def test_last_province_ends_playout(self):
+        """Test buying the last Province ends the playout with its points."""
+        game, game_state = play_request(5, {**STOCK, CardName.PROVINCE: 1})
+        position = Position.from_game(game, game_state)
+        score = playout(random.Random(0), position, PROVINCE, BIG_MONEY_POLICY)
+        assert score == score_of(position.owned) + 6
@@ -0,0 +1,66 @@
+from fastapi.testclient import TestClient
+
+from BOOT import app
+from metrics import Histogram, metrics
+
+PLAY_PAYLOAD = {
+    "finished": False,
+    "players": [
+        {"name": "Rhum & Ruin", "hand": {"quantities": {"copper": 3, "estate": 2}}, "score": 3},
+        {"name": "Other", "hand": None, "score": 3},
+    ],
+    "stock": {"quantities": {"copper": 46, "estate": 8, "province": 8}},
+}
+
+
+class TestHistogram:
+    """Tests for the latency histogram."""
+
+    def test_empty_histogram(self):
+        """Test an empty histogram reports zeros."""
+        summary = Histogram().summary()
+        assert summary["count"] == 0
+        assert summary["p99_ms"] == 0.0
+
+    def test_percentiles(self):
+        """Test percentiles land within one bucket of the real value."""
+        histogram = Histogram()
+        for millisecond in range(1, 101):
+            histogram.observe(millisecond / 1000)
+        summary = histogram.summary()
+        assert summary["count"] == 100
+        assert 50 <= summary["p50_ms"] <= 50 * 1.25
+        assert 95 <= summary["p95_ms"] <= 95 * 1.25
+        assert summary["p99_ms"] <= summary["max_ms"] == 100
+
+    def test_near_timeout(self):
+        """Test slow observations are counted as close to the arbiter timeout."""
+        histogram = Histogram()
+        histogram.observe(0.001)
+        histogram.observe(60.0)
+        assert histogram.summary()["near_timeout"] == 1
+
+
+class TestMetricsEndpoint:
+    """Tests for the instrumentation of the bot API."""
+
+    def test_play_is_measured(self):
+        """Test /play feeds the route, phase and decision metrics."""
+        client = TestClient(app)
+        before = metrics.decisions.get("BUY ESTATE", 0)
+        response = client.post("/play", json=PLAY_PAYLOAD, headers={"X-Game-Id": "metrics_game"})
+        assert response.json()["decision"] == "BUY ESTATE"
+
+        snapshot = client.get("/metrics").json()
+        assert snapshot["routes"]["/play"]["count"] >= 1
+        assert snapshot["phases"]["/play parse"]["count"] >= 1
+        assert snapshot["phases"]["/play strategy"]["count"] >= 1
+        assert snapshot["decisions"]["BUY ESTATE"] == before + 1
+        assert "/metrics" not in snapshot["routes"]
+
+    def test_card_decisions_are_counted(self):
+        """Test card interaction endpoints count the chosen card."""
+        client = TestClient(app)
+        before = metrics.decisions.get("TRASH CURSE", 0)
+        client.post("/trash_card_from_hand", json={"hand": ["curse", "copper"]}, headers={"X-Game-Id": "metrics_game"})
+        assert metrics.decisions["TRASH CURSE"] == before + 1
@@ -0,0 +1,98 @@
+from dopynion.data_model import CardName, Cards, Game, Player
+
+from cards import COPPER, CURSE, ESTATE, NB_CARD_TYPES, VICTORY_POINTS
+from endgame import OPPONENT_POINTS_PER_TURN, EndgameSolver
+from game_state import GameState
+from opponent_tracker import SCORE_HISTORY_TURNS, OpponentTracker
+from simulator import BigMoneyPlayer, RhumAndRuinPlayer, Simulation
+
+
+def play_rounds(simulation: Simulation, nb_rounds: int) -> OpponentTracker:
+    """Feed a tracker as BOOT.py does, our player being the first one, then take a last snapshot."""
+    tracker = OpponentTracker()
+    for strategy in simulation.strategies:
+        strategy.start_game(simulation.game_id)
+    for turn in range(1, nb_rounds + 1):
+        tracker.observe(simulation.game_view(0), 0, turn)
+        simulation.play_turn(0)
+        tracker.observe(simulation.game_view(0), 0, turn)
+        tracker.end_turn()
+        for index in range(1, len(simulation.players)):
+            simulation.play_turn(index)
+    tracker.observe(simulation.game_view(0), 0, nb_rounds + 1)
+    return tracker
+
+
+def game(our_score: int, opponent_score: int, curses: int) -> Game:
+    players = [
+        Player(name="Rhum & Ruin", hand=Cards(quantities={CardName.COPPER: 5}), score=our_score),
+        Player(name="Witch player", hand=None, score=opponent_score),
+    ]
+    return Game(finished=False, players=players, stock=Cards(quantities={CardName.CURSE: curses}))
+
+
+class TestOpponentTracker:
+    """Tests for the opponent purchases inferred from the /play snapshots."""
+
+    def test_single_opponent_purchases_are_exact(self):
+        """Test every card a lone opponent takes is attributed to it."""
+        simulation = Simulation([RhumAndRuinPlayer(), BigMoneyPlayer()], seed=3)
+        tracker = play_rounds(simulation, 12)
+        assert tracker.opponents[0] is None
+        assert tracker.opponents[1].estimated_deck() == simulation.players[1].owned()
+        assert tracker.opponents[1].score == simulation.players[1].score()
+        assert not any(tracker.shared_gains)
+
+    def test_victory_cards_follow_score_changes(self):
+        """Test victory cards are attributed by score with several opponents, the rest being shared."""
+        simulation = Simulation([RhumAndRuinPlayer(), BigMoneyPlayer(), BigMoneyPlayer()], seed=4)
+        tracker = play_rounds(simulation, 14)
+        gained = [0] * NB_CARD_TYPES
+        for index in (1, 2):
+            model = tracker.opponents[index]
+            points = sum(VICTORY_POINTS[card] * quantity for card, quantity in enumerate(model.gained))
+            assert points == model.score - 3
+            gained = [total + quantity for total, quantity in zip(gained, model.gained)]
+        gained = [total + shared for total, shared in zip(gained, tracker.shared_gains)]
+        owned = [first + second for first, second in zip(simulation.players[1].owned(), simulation.players[2].owned())]
+        owned[COPPER] -= 14
+        owned[ESTATE] -= 6
+        assert gained == owned
+
+    def test_attacks(self):
+        """Test curses we receive count as Witch attacks and forced discards as Militia attacks."""
+        tracker = OpponentTracker()
+        tracker.observe(game(3, 3, curses=10), 0, turn=1)
+        tracker.end_turn()
+        tracker.observe_discard()
+        tracker.observe_discard()
+        tracker.observe(game(2, 3, curses=9), 0, turn=2)
+        tracker.observe_discard()  # Our own Poacher, during our turn
+        assert (tracker.witch_attacks, tracker.curses_received, tracker.militia_attacks) == (1, 1, 1)
+        assert tracker.opponents[1].gained[CURSE] == 0
+        tracker.end_turn()
+        tracker.observe(game(0, 3, curses=7), 0, turn=3)
+        assert (tracker.witch_attacks, tracker.curses_received) == (2, 3)
+
+    def test_bounded_score_history(self):
+        """Test the scoring rate only looks at the last turns."""
+        tracker = OpponentTracker()
+        for turn in range(1, 20):
+            tracker.observe(game(3, 3 * turn, curses=10), 0, turn)
+        model = tracker.opponents[1]
+        assert len(model.scores) == SCORE_HISTORY_TURNS + 1
+        assert model.points_per_turn() == 3.0
+
+
+class TestEndgameOpponentRate:
+    """Tests for the endgame solver using the measured scoring rate."""
+
+    def test_measured_rate_replaces_the_default(self):
+        """Test the solver models the leading opponent with its rate in this game."""
+        solver = EndgameSolver()
+        game_state = GameState("game")
+        assert solver.opponent_rate(game_state) == OPPONENT_POINTS_PER_TURN
+        for turn in range(1, 4):
+            game_state.opponents.observe(game(3, 3 + 5 * turn, curses=10), 0, turn)
+        assert solver.opponent_rate(game_state) == 5
+        assert solver.opponent_rate(GameState("other game")) == OPPONENT_POINTS_PER_TURN
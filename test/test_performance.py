@@ -0,0 +1,163 @@
+"""
+Performance regression benchmarks, run on demand:
+
+    RHUM_BENCHMARK=check python -m pytest test/test_performance.py
+    RHUM_BENCHMARK=update python -m pytest test/test_performance.py
+
+"check" fails when a benchmark got slower or allocates more than its
+baseline in performance_baselines.json allows, "update" records the current
+results as the new baselines. Timings depend on the machine: baselines are
+to be updated on the machine that checks them.
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+from dopynion.data_model import Game
+
+import BOOT
+from game_state import GameState, GameStateStore
+from simulator import BigMoneyPlayer, RhumAndRuinPlayer, Simulation
+from strategy import should_buy_estate
+from strategy_helpers import count_copper_in_hand, get_player_hand_as_list, is_estate_available_in_stock
+from warmup import asgi_request
+
+BENCHMARK_ENV = "RHUM_BENCHMARK"
+LATENCY_TOLERANCE_ENV = "RHUM_BENCHMARK_TOLERANCE"
+BASELINES_PATH = Path(__file__).with_name("performance_baselines.json")
+
+# A benchmark fails when slower than its baseline by this ratio, plus a slack for the timer noise
+DEFAULT_LATENCY_TOLERANCE = 0.5
+LATENCY_SLACK_US = 1.0
+# ...or when its allocation peak grows by this ratio plus a fixed slack
+ALLOCATION_TOLERANCE = 0.2
+ALLOCATION_SLACK_KIB = 1.0
+# Timed batches of calls, the fastest batch being kept
+NB_BATCHES = 7
+# Rounds played before taking the /play payload, for a mid-game deck and stock
+NB_ROUNDS = 8
+NB_CHURN_GAMES = 5000
+CHURN_STORE_SIZE = 1000
+
+MODE = os.environ.get(BENCHMARK_ENV)
+pytestmark = pytest.mark.skipif(MODE not in ("check", "update"), reason=f"set {BENCHMARK_ENV}=check or update")
+
+
+def mid_game(nb_players: int) -> tuple[Game, bytes]:
+    """Validated /play payload of our player after a few rounds, and its JSON body."""
+    simulation = Simulation([RhumAndRuinPlayer()] + [BigMoneyPlayer() for _ in range(nb_players - 1)], seed=nb_players)
+    for strategy in simulation.strategies:
+        strategy.start_game(simulation.game_id)
+    for _ in range(NB_ROUNDS):
+        for index in range(nb_players):
+            simulation.play_turn(index)
+    body = simulation.game_view(0).model_dump_json().encode()
+    return Game.model_validate_json(body), body
+
+
+def measure(function, nb_calls: int) -> dict[str, float]:
+    """Microseconds per call of the fastest batch, and allocation peak of one call in KiB."""
+    function()
+    best = math.inf
+    for _ in range(NB_BATCHES):
+        start = time.perf_counter()
+        for _ in range(nb_calls):
+            function()
+        best = min(best, (time.perf_counter() - start) / nb_calls)
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"us_per_call": 1e6 * best, "peak_kib": (peak - before) / 1024}
+
+
+def check_baseline(name: str, result: dict[str, float]) -> None:
+    """Compare a result with its baseline, or record it as the baseline."""
+    baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    if MODE == "update":
+        baselines[name] = {key: round(value, 3) for key, value in result.items()}
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        return
+    if name not in baselines:
+        pytest.fail(f"No baseline for {name}, record one with {BENCHMARK_ENV}=update")
+    baseline = baselines[name]
+    tolerance = float(os.environ.get(LATENCY_TOLERANCE_ENV, DEFAULT_LATENCY_TOLERANCE))
+    assert result["us_per_call"] <= baseline["us_per_call"] * (1 + tolerance) + LATENCY_SLACK_US, (
+        f"{name} takes {result['us_per_call']:.2f}µs per call, baseline {baseline['us_per_call']:.2f}µs"
+    )
+    assert result["peak_kib"] <= baseline["peak_kib"] * (1 + ALLOCATION_TOLERANCE) + ALLOCATION_SLACK_KIB, (
+        f"{name} allocates {result['peak_kib']:.1f}KiB at peak, baseline {baseline['peak_kib']:.1f}KiB"
+    )
+
+
+class TestStrategyHelpersPerformance:
+    """Benchmarks of the strategy helpers on 2- and 4-player mid-game payloads."""
+
+    def test_helpers(self):
+        """Test the helpers are no slower and allocate no more than their baselines."""
+        for nb_players in (2, 4):
+            game, _ = mid_game(nb_players)
+            hand = get_player_hand_as_list(game)
+            game_state = GameState("benchmark")
+            game_state.reset_turn()
+            benchmarks = {
+                "count_copper_in_hand": (lambda: count_copper_in_hand(hand), 20_000),
+                "is_estate_available_in_stock": (lambda: is_estate_available_in_stock(game.stock), 20_000),
+                "get_player_hand_as_list": (lambda: get_player_hand_as_list(game), 10_000),
+                "should_buy_estate": (lambda: should_buy_estate(game, game_state), 10_000),
+            }
+            for name, (function, nb_calls) in benchmarks.items():
+                check_baseline(f"{name} {nb_players} players", measure(function, nb_calls))
+
+
+class TestPlayPerformance:
+    """Benchmarks of a whole /play request through the ASGI app."""
+
+    def test_play_request(self):
+        """Test a /play is no slower and allocates no more than its baseline, for 2 and 4 players."""
+        loop = asyncio.new_event_loop()
+        try:
+            for nb_players in (2, 4):
+                _, body = mid_game(nb_players)
+                game_id = f"benchmark-{nb_players}"
+
+                def play() -> None:
+                    BOOT.game_states.get(game_id).reset_turn()
+                    status, _ = loop.run_until_complete(asgi_request(BOOT.app, "POST", "/play", body, game_id))
+                    assert status == 200
+
+                check_baseline(f"/play {nb_players} players", measure(play, 500))
+                BOOT.release_game_state(game_id)
+        finally:
+            loop.close()
+
+
+class TestStateStorePerformance:
+    """Benchmark of a bounded state store under the churn of many games."""
+
+    def test_churn(self):
+        """Test thousands of games started, played, ended or evicted stay within the baseline."""
+
+        def churn() -> None:
+            store = GameStateStore(max_size=CHURN_STORE_SIZE)
+            for number in range(NB_CHURN_GAMES):
+                game_id = f"churn-{number}"
+                for _ in range(3):
+                    with store.session(game_id) as game_state:
+                        game_state.reset_turn()
+                # Every other game ends, the others are abandoned to the LRU eviction
+                if number % 2:
+                    store.release(game_id)
+                # A game started earlier is still being played
+                store.get(f"churn-{number // 2}")
+
+        check_baseline(f"state store churn {NB_CHURN_GAMES} games", measure(churn, 1))
@@ -0,0 +1,171 @@
+import pytest
+from dopynion.data_model import CardName
+
+from cards import CARD_INDEX, COPPER, CURSE, ESTATE, GOLD, PROVINCE, SILVER
+from simulator import (
+    BigMoneyPlayer,
+    IllegalActionError,
+    RhumAndRuinPlayer,
+    SimulatedPlayer,
+    Simulation,
+    score_of,
+)
+
+SMITHY = CARD_INDEX[CardName.SMITHY]
+WITCH = CARD_INDEX[CardName.WITCH]
+HARVEST = CARD_INDEX[CardName.HARVEST]
+MAGPIE = CARD_INDEX[CardName.MAGPIE]
+KINGDOM = [CARD_INDEX[CardName.SMITHY], CARD_INDEX[CardName.WITCH]]
+
+
+class IllegalPlayer(SimulatedPlayer):
+    """Player buying a card it can never afford."""
+
+    name = "Cheater"
+
+    def play(self, simulation, index):
+        return "BUY PROVINCE"
+
+
+class TestSimulationSetup:
+    """Tests for the initial state of a simulated game."""
+
+    def test_starting_decks(self):
+        """Test each player starts with 7 Copper and 3 Estate, 5 of them in hand."""
+        simulation = Simulation([BigMoneyPlayer(), BigMoneyPlayer()], seed=1, kingdom=KINGDOM)
+        for player in simulation.players:
+            owned = player.owned()
+            assert owned[COPPER] == 7
+            assert owned[ESTATE] == 3
+            assert sum(player.hand) == 5
+
+    def test_supply_two_players(self):
+        """Test victory piles hold 8 cards with 2 players."""
+        simulation = Simulation([BigMoneyPlayer(), BigMoneyPlayer()], seed=1, kingdom=KINGDOM)
+        assert simulation.supply[PROVINCE] == 8
+        assert simulation.supply[COPPER] == 60 - 14
+        assert simulation.supply[SMITHY] == 10
+
+    def test_supply_four_players(self):
+        """Test victory piles hold 12 cards with 4 players."""
+        simulation = Simulation([BigMoneyPlayer() for _ in range(4)], seed=1, kingdom=KINGDOM)
+        assert simulation.supply[PROVINCE] == 12
+        assert simulation.supply[CURSE] == 30
+
+    def test_too_many_players(self):
+        """Test a game refuses more than 4 players."""
+        with pytest.raises(ValueError):
+            Simulation([BigMoneyPlayer() for _ in range(5)])
+
+
+class TestSimulationRules:
+    """Tests for the turn mechanics of the simulator."""
+
+    def test_buy_spends_treasures(self):
+        """Test buying moves the bought card to the discard and uses the treasures."""
+        simulation = Simulation([BigMoneyPlayer(), BigMoneyPlayer()], seed=1, kingdom=KINGDOM)
+        player = simulation.players[0]
+        player.hand = [0] * len(player.hand)
+        player.hand[COPPER] = 3
+        simulation.start_turn(0)
+        simulation.apply(0, "BUY SILVER")
+        assert player.discard[SILVER] == 1
+        assert player.hand[COPPER] == 0
+        assert player.buys == 0
+
+    def test_buy_without_money_is_illegal(self):
+        """Test buying a card we cannot afford raises an error."""
+        simulation = Simulation([BigMoneyPlayer(), BigMoneyPlayer()], seed=1, kingdom=KINGDOM)
+        simulation.start_turn(0)
+        with pytest.raises(IllegalActionError):
+            simulation.apply(0, "BUY PROVINCE")
+
+    def test_witch_gives_curses(self):
+        """Test playing a Witch gives a Curse to the other player."""
+        simulation = Simulation([BigMoneyPlayer(), BigMoneyPlayer()], seed=1, kingdom=KINGDOM)
+        simulation.players[0].hand[WITCH] = 1
+        simulation.start_turn(0)
+        simulation.apply(0, "ACTION witch")
+        assert simulation.players[1].discard[CURSE] == 1
+        assert simulation.supply[CURSE] == 9
+
+    def test_magpie_gains_a_magpie_on_a_treasure(self):
+        """Test Mag Pie draws a revealed Treasure and gains a Mag Pie, leaving other cards on the deck."""
+        simulation = Simulation([BigMoneyPlayer(), BigMoneyPlayer()], seed=1, kingdom=[MAGPIE])
+        player = simulation.players[0]
+        player.hand[MAGPIE] = 2
+        simulation.start_turn(0)
+        # Popped from the end: the +1 card, then the revealed card
+        player.deck = [ESTATE, SILVER, COPPER]
+        simulation.apply(0, "ACTION magpie")
+        assert player.hand[SILVER] == 1 and player.discard[MAGPIE] == 1
+        player.deck = [SILVER, ESTATE, COPPER]
+        simulation.apply(0, "ACTION magpie")
+        assert player.deck == [SILVER, ESTATE] and player.discard[MAGPIE] == 1
+
+    def test_harvest_draws_one_card_per_card_type(self):
+        """Test Harvest counts the types of the revealed cards, not their names."""
+        simulation = Simulation([BigMoneyPlayer(), BigMoneyPlayer()], seed=1, kingdom=[HARVEST])
+        player = simulation.players[0]
+        player.hand = [0] * len(player.hand)
+        player.hand[HARVEST] = 1
+        simulation.start_turn(0)
+        player.discard = [0] * len(player.discard)
+        player.deck = [GOLD, GOLD, GOLD, ESTATE, SILVER, COPPER, CURSE]
+        simulation.apply(0, "ACTION harvest")
+        # Copper, Silver, Estate and a Curse are three types: Treasure, Victory and Curse
+        assert player.hand[GOLD] == 3
+        assert player.deck == []
+
+    def test_rhum_and_ruin_plays_moneylender(self):
+        """Test our strategy trashes a Copper for Moneylender, which Chapel would keep in a starting deck."""
+        moneylender = CARD_INDEX[CardName.MONEYLENDER]
+        simulation = Simulation([RhumAndRuinPlayer(), BigMoneyPlayer()], seed=1, kingdom=[moneylender])
+        player = simulation.players[0]
+        player.hand = [0] * len(player.hand)
+        player.hand[moneylender] = 1
+        player.hand[COPPER] = 2
+        simulation.start_turn(0)
+        # What /play records when the bot answers with the action
+        simulation.strategies[0].game_state.deck.record_decision("ACTION moneylender")
+        simulation.apply(0, "ACTION moneylender")
+        assert player.hand[COPPER] == 1
+        assert player.money == 3
+
+    def test_illegal_player_is_eliminated(self):
+        """Test an illegal decision eliminates the player and the game goes on."""
+        result = Simulation([IllegalPlayer(), BigMoneyPlayer()], seed=3, kingdom=KINGDOM).run()
+        assert result.scores[0] == -10000
+        assert result.winners == [1]
+
+    def test_score_of_gardens(self):
+        """Test Gardens score one point per 10 owned cards."""
+        counts = [0] * len(CARD_INDEX)
+        counts[COPPER] = 20
+        counts[CARD_INDEX[CardName.GARDENS]] = 1
+        counts[GOLD] = 1
+        assert score_of(counts) == 2
+
+
+class TestSimulationGames:
+    """Tests for full simulated games."""
+
+    def test_game_ends(self):
+        """Test a Big Money mirror ends through one of the end conditions."""
+        simulation = Simulation([BigMoneyPlayer(), BigMoneyPlayer()], seed=7)
+        result = simulation.run()
+        assert simulation.finished
+        assert result.turns < 150
+
+    def test_same_seed_same_result(self):
+        """Test games are deterministic for a given seed."""
+        first = Simulation([BigMoneyPlayer(), BigMoneyPlayer()], seed=42).run()
+        second = Simulation([BigMoneyPlayer(), BigMoneyPlayer()], seed=42).run()
+        assert first.scores == second.scores
+        assert first.turns == second.turns
+
+    def test_rhum_and_ruin_buys_estates(self):
+        """Test our strategy plays through the simulator and gains Estates."""
+        simulation = Simulation([RhumAndRuinPlayer(), BigMoneyPlayer()], seed=5, kingdom=KINGDOM)
+        simulation.run()
+        assert simulation.players[0].owned()[ESTATE] > 3
@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from dopynion.data_model import CardName, Cards, Game, Player
+
+import BOOT
+from cards import CARD_NAMES
+from endgame import EndgameSolver
+from game_state import GameState
+from metrics import metrics
+from speculation import Speculator
+from strategy import choose_play, update_deck_tracker
+
+STOCK = {CardName.COPPER: 46, CardName.SILVER: 40, CardName.ESTATE: 8, CardName.PROVINCE: 8}
+
+
+def play_request(hand: dict, stock: dict = STOCK, opponent_score: int = 3) -> Game:
+    players = [
+        Player(name="Big Money", hand=None, score=opponent_score),
+        Player(name="Rhum & Ruin", hand=Cards(quantities=hand), score=3),
+    ]
+    return Game(finished=False, players=players, stock=Cards(quantities=stock))
+
+
+def end_first_turn(speculator: Speculator) -> GameState:
+    """Play our first turn, let the speculation run, and start our second turn."""
+    game_state = GameState("speculation_game")
+    game_state.reset_turn()
+    game = play_request({CardName.COPPER: 3, CardName.ESTATE: 2})
+    update_deck_tracker(game, game_state)
+    game_state.deck.record_decision("END_TURN")
+    speculator.schedule(game, game_state)
+    speculator.executor.shutdown(wait=True)
+    game_state.reset_turn()
+    return game_state
+
+
+def most_likely_hand(game_state: GameState) -> dict:
+    _probability, hand = game_state.deck.likely_next_hands(1)[0]
+    return {CARD_NAMES[card]: quantity for card, quantity in enumerate(hand) if quantity}
+
+
+class TestSpeculator:
+    """Tests for the decisions computed between our turns."""
+
+    def test_likely_hand_is_a_hit(self):
+        """Test the next /play with a likely hand gets the decision computed in advance."""
+        speculator = Speculator(choose_play, executor=ThreadPoolExecutor(max_workers=1))
+        game_state = end_first_turn(speculator)
+        game = play_request(most_likely_hand(game_state))
+        update_deck_tracker(game, game_state)
+        hits_before = metrics.counters.get("speculation hit", 0)
+        decision = speculator.lookup(game, game_state)
+        assert decision == choose_play(game, game_state)
+        assert metrics.counters["speculation hit"] == hits_before + 1
+
+    def test_stock_change_is_a_miss(self):
+        """Test an emptied pile since the speculation misses the cache."""
+        speculator = Speculator(choose_play, executor=ThreadPoolExecutor(max_workers=1))
+        game_state = end_first_turn(speculator)
+        stock = {card_name: quantity for card_name, quantity in STOCK.items() if card_name != CardName.SILVER}
+        game = play_request(most_likely_hand(game_state), stock)
+        update_deck_tracker(game, game_state)
+        assert speculator.lookup(game, game_state) is None
+
+    def test_opponent_purchase_is_a_hit(self):
+        """Test an opponent buying from a pile that stays in the stock keeps the decision computed in advance."""
+        speculator = Speculator(choose_play, executor=ThreadPoolExecutor(max_workers=1))
+        game_state = end_first_turn(speculator)
+        stock = {**STOCK, CardName.ESTATE: STOCK[CardName.ESTATE] - 1, CardName.SILVER: STOCK[CardName.SILVER] - 1}
+        game = play_request(most_likely_hand(game_state), stock, opponent_score=4)
+        update_deck_tracker(game, game_state)
+        hits_before = metrics.counters.get("speculation hit", 0)
+        assert speculator.lookup(game, game_state) == choose_play(game, game_state)
+        assert metrics.counters["speculation hit"] == hits_before + 1
+
+    def test_province_taken_is_a_miss(self):
+        """Test a Province bought since the speculation misses the cache."""
+        speculator = Speculator(choose_play, executor=ThreadPoolExecutor(max_workers=1))
+        game_state = end_first_turn(speculator)
+        stock = {**STOCK, CardName.PROVINCE: STOCK[CardName.PROVINCE] - 1}
+        game = play_request(most_likely_hand(game_state), stock, opponent_score=9)
+        update_deck_tracker(game, game_state)
+        assert speculator.lookup(game, game_state) is None
+
+    def test_endgame_is_not_speculated(self, monkeypatch):
+        """Test /play leaves the speculated decisions aside once the endgame solver takes over."""
+        monkeypatch.setattr(BOOT, "speculator", Speculator(choose_play, executor=ThreadPoolExecutor(max_workers=1)))
+        monkeypatch.setattr(BOOT, "endgame", EndgameSolver())
+        game_state = GameState("speculation_game")
+        game_state.reset_turn()
+        hand = {CardName.COPPER: 3, CardName.ESTATE: 2}
+        assert BOOT.speculating(play_request(hand), game_state)
+        assert not BOOT.speculating(play_request(hand, {**STOCK, CardName.PROVINCE: 2}), game_state)
+
+    def test_forget(self):
+        """Test a finished game drops its speculated decisions."""
+        speculator = Speculator(choose_play, executor=ThreadPoolExecutor(max_workers=1))
+        game_state = end_first_turn(speculator)
+        speculator.forget("speculation_game")
+        game = play_request(most_likely_hand(game_state))
+        update_deck_tracker(game, game_state)
+        assert speculator.lookup(game, game_state) is None
@@ -1,9 +1,14 @@
 from dopynion.data_model import CardName, Game, Player, Hand, Cards
-from game_state import GameState
+from game_state import GameState, GameStateStore
+from cards import CARD_INDEX, COPPER, NB_CARD_TYPES, SILVER
 from strategy_helpers import (
     count_copper_in_hand,
+    get_our_hand_counts,
+    get_our_player_index,
+    has_action_card,
     is_estate_available_in_stock,
     get_player_hand_as_list,
+    money_in_hand,
 )
 from strategy import should_buy_estate
 
@@ -247,4 +252,95 @@ class TestGameState:
         game_state.purchases_remaining_this_turn = 0
         
         game_state.reset_turn()
-        assert game_state.purchases_remaining_this_turn == 1
\ No newline at end of file
+        assert game_state.purchases_remaining_this_turn == 1
+
+
+class FakeClock:
+    """Manually advanced clock for the game state store."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestGameStateStore:
+    """Tests for GameStateStore class."""
+
+    def test_get_creates_and_reuses_state(self):
+        """Test the same game id always gives the same state."""
+        store = GameStateStore()
+        game_state = store.get("game_1")
+        game_state.use_purchase()
+        assert store.get("game_1") is game_state
+        assert store.size == 1
+
+    def test_release(self):
+        """Test releasing a finished game forgets its state."""
+        store = GameStateStore()
+        store.get("game_1")
+        assert store.release("game_1") == True
+        assert "game_1" not in store
+        assert store.release("game_1") == False
+
+    def test_idle_games_expire(self):
+        """Test games idle for longer than the TTL are evicted."""
+        clock = FakeClock()
+        store = GameStateStore(ttl=10, clock=clock)
+        store.get("idle_game")
+        clock.now = 5
+        store.get("active_game")
+        clock.now = 12
+        store.get("active_game")
+        assert "idle_game" not in store
+        assert "active_game" in store
+
+    def test_capacity_evicts_least_recently_used(self):
+        """Test the least recently used game is evicted when the store is full."""
+        store = GameStateStore(max_size=2)
+        store.get("game_1")
+        store.get("game_2")
+        store.get("game_1")
+        store.get("game_3")
+        assert len(store) == 2
+        assert "game_2" not in store
+        assert "game_1" in store and "game_3" in store
+
+
+class TestCountsHelpers:
+    """Tests for the counts-list helpers."""
+
+    def test_our_player_index_is_cached(self):
+        """Test our player is found once, then read from the game state."""
+        players = [
+            Player(name="Other Player", hand=None, score=0),
+            Player(name="Rhum & Ruin", hand=Cards(quantities={CardName.COPPER: 2}), score=0),
+        ]
+        game = Game(finished=False, players=players, stock=Cards())
+        game_state = GameState("test_game")
+        assert get_our_player_index(game, game_state) == 1
+        assert game_state.our_player_index == 1
+        assert get_our_hand_counts(game, game_state)[COPPER] == 2
+
+    def test_stale_index_is_resolved_again(self):
+        """Test a cached index pointing at another player is looked up again."""
+        players = [
+            Player(name="Rhum & Ruin", hand=Cards(quantities={CardName.SILVER: 1}), score=0),
+            Player(name="Other Player", hand=None, score=0),
+        ]
+        game = Game(finished=False, players=players, stock=Cards())
+        game_state = GameState("test_game")
+        game_state.our_player_index = 1
+        assert get_our_hand_counts(game, game_state)[SILVER] == 1
+        assert game_state.our_player_index == 0
+
+    def test_money_and_actions(self):
+        """Test money total and action check on a counts list."""
+        hand = [0] * NB_CARD_TYPES
+        hand[COPPER] = 2
+        hand[SILVER] = 1
+        assert money_in_hand(hand) == 4
+        assert not has_action_card(hand)
+        hand[CARD_INDEX[CardName.SMITHY]] = 1
+        assert has_action_card(hand)
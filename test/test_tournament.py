@@ -0,0 +1,93 @@
+import pytest
+
+from tournament import (
+    INITIAL_RATING,
+    GameRecord,
+    compute_elo,
+    game_seed,
+    load_results,
+    run_tournament,
+    schedule,
+    win_rates,
+)
+
+
+class TestSchedule:
+    """Tests for the round-robin schedule."""
+
+    def test_every_pair_plays(self):
+        """Test each pair of variants plays the requested number of games."""
+        games = list(schedule(["a", "b", "c"], 4))
+        assert len(games) == 12
+        assert [number for number, _ in games] == list(range(12))
+
+    def test_seats_rotate(self):
+        """Test the first seat alternates between the two variants."""
+        seatings = [seating for _, seating in schedule(["a", "b"], 4)]
+        assert seatings == [("a", "b"), ("b", "a"), ("a", "b"), ("b", "a")]
+
+    def test_pairings_are_interleaved(self):
+        """Test each round plays every pairing once before the next round starts."""
+        seatings = [seating for _, seating in schedule(["a", "b", "c"], 2)]
+        assert seatings == [("a", "b"), ("a", "c"), ("b", "c"), ("b", "a"), ("c", "a"), ("c", "b")]
+
+    def test_seeds_are_deterministic(self):
+        """Test a game seed only depends on the base seed and the game number."""
+        assert game_seed(3, 10) == game_seed(3, 10)
+        assert game_seed(3, 10) != game_seed(4, 10)
+
+
+class TestElo:
+    """Tests for the ELO ranking."""
+
+    def test_winner_gains_rating(self):
+        """Test the winner of a game gains what the loser loses."""
+        ratings = compute_elo([GameRecord(0, 0, ["a", "b"], [10, 5], 20)])
+        assert ratings["a"] > INITIAL_RATING > ratings["b"]
+        assert ratings["a"] + ratings["b"] == 2 * INITIAL_RATING
+
+    def test_draw_keeps_equal_ratings(self):
+        """Test a draw between equal players changes nothing."""
+        ratings = compute_elo([GameRecord(0, 0, ["a", "b"], [7, 7], 20)])
+        assert ratings == {"a": INITIAL_RATING, "b": INITIAL_RATING}
+
+    def test_multiplayer_game_counts_each_pair(self):
+        """Test the first of a 3-player game gains against both others."""
+        ratings = compute_elo([GameRecord(0, 0, ["a", "b", "c"], [9, 5, 1], 20)])
+        assert ratings["a"] > ratings["b"] > ratings["c"]
+
+    def test_averaged_over_the_games_of_each_player(self):
+        """Test an averaged rating only counts the player's own games of the second half."""
+        records = [
+            GameRecord(0, 0, ["a", "c"], [10, 5], 20),
+            GameRecord(1, 1, ["a", "b"], [10, 5], 20),
+            GameRecord(2, 2, ["a", "b"], [10, 5], 20),
+            GameRecord(3, 3, ["a", "b"], [5, 5], 20),
+        ]
+        averaged = compute_elo(records, averaged=True)
+        assert set(averaged) == {"a", "b"}
+        expected = (compute_elo(records[:3])["a"] + compute_elo(records)["a"]) / 2
+        assert averaged["a"] == pytest.approx(expected)
+
+    def test_win_rates(self):
+        """Test win rates count ties as wins for every tied player."""
+        records = [
+            GameRecord(0, 0, ["a", "b"], [10, 5], 20),
+            GameRecord(1, 1, ["b", "a"], [6, 6], 20),
+        ]
+        assert win_rates(records) == {"a": 1.0, "b": 0.5}
+
+
+class TestRunTournament:
+    """Tests for the parallel tournament runner."""
+
+    def test_results_are_streamed_to_file(self, tmp_path):
+        """Test every game ends up in the results file, in a reproducible way."""
+        output = tmp_path / "results.jsonl"
+        records = run_tournament(["big_money", "smithy_big_money"], 6, output, seed=1, max_workers=2)
+        assert len(records) == 6
+        reloaded = load_results(output)
+        assert [record.scores for record in reloaded] == [record.scores for record in records]
+
+        again = run_tournament(["big_money", "smithy_big_money"], 6, tmp_path / "again.jsonl", seed=1, max_workers=1)
+        assert [record.scores for record in again] == [record.scores for record in records]
@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+import BOOT
+from fake_arbiter import LoadReport, play_game
+from traffic import ORIGINAL, TrafficMiddleware, TrafficRecord, TrafficRecorder, read_records, replay
+
+
+def record_games(tmp_path, nb_games: int) -> TrafficRecorder:
+    """Play games against the bot through a recording middleware."""
+    recorder = TrafficRecorder(tmp_path / "traffic.log.gz")
+    recorder.start()
+    recorded_app = TrafficMiddleware(BOOT.app, recorder)
+    report = LoadReport()
+    with TestClient(recorded_app) as client:
+        for game_number in range(nb_games):
+            play_game(client, report, game_number, ["big_money"], seed=5, run_id="traffic")
+    assert report.ok, report.summary()
+    return recorder
+
+
+class TestTrafficLog:
+    """Tests for the compressed log of the arbiter requests."""
+
+    def test_every_request_is_recorded(self, tmp_path):
+        """Test the log holds each request with its game id, body and answer, in order."""
+        recorder = record_games(tmp_path, 1)
+        recorder.close()
+        records = list(read_records(recorder.path))
+        assert len(records) == recorder.nb_records
+        assert [record.path for record in records[:2]] == ["/name", "/start_game"]
+        assert records[-1].path == "/end_game"
+        plays = [record for record in records if record.path == "/play"]
+        assert plays and all(record.game_id == "traffic-0" for record in plays)
+        assert "players" in json.loads(plays[0].request)
+        assert json.loads(plays[0].response)["game_id"] == "traffic-0"
+
+    def test_log_readable_while_written_and_appended(self, tmp_path):
+        """Test flushed records are readable before the log is closed, and a new process appends to it."""
+        path = tmp_path / "traffic.log.gz"
+        record = TrafficRecord(1.0, 0.001, 200, "GET", "/start_turn", "game", b"", b'{"decision":"OK"}')
+        for _ in range(2):
+            recorder = TrafficRecorder(path)
+            recorder.start()
+            recorder.record(record)
+            recorder.flush()
+            assert list(read_records(path))[-1].response == record.response
+            recorder.close()
+        assert len(list(read_records(path))) == 2
+
+
+class TestReplay:
+    """Tests for the replay of a log through the app."""
+
+    def test_replay_gives_the_recorded_decisions(self, tmp_path):
+        """Test replaying a log reproduces every decision, both as fast as possible and with its timing."""
+        recorder = record_games(tmp_path, 2)
+        recorder.close()
+        records = list(read_records(recorder.path))
+        report = asyncio.run(replay(BOOT.app, records))
+        assert report.ok, report.summary()
+        assert report.nb_requests == len(records)
+        assert report.latencies["/play"].count == report.recorded_latencies["/play"].count > 0
+
+        report = asyncio.run(replay(BOOT.app, records, ORIGINAL, speed=100.0))
+        assert report.ok, report.summary()
+
+    def test_changed_decision_is_reported(self, tmp_path):
+        """Test a decision different from the recorded one is counted with an example."""
+        recorder = record_games(tmp_path, 1)
+        recorder.close()
+        records = list(read_records(recorder.path))
+        play = next(record for record in records if record.path == "/play")
+        play.response = json.dumps({"game_id": play.game_id, "decision": "BUY COLONY"}).encode()
+        report = asyncio.run(replay(BOOT.app, records))
+        assert report.nb_mismatches == 1
+        assert "BUY COLONY" in report.mismatch_samples[0]
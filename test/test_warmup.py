@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import BOOT
+from buy_policy import BuyPolicy, BuyRule, load_tables, save_tables
+from cards import NB_CARD_TYPES
+from metrics import metrics
+from warmup import TABLE_CACHE_FILE, WARM_UP_GAME_ID, Startup, startup_from_env
+
+
+def estate_policy() -> BuyPolicy:
+    return BuyPolicy("test", [BuyRule("province", min_money=8), BuyRule("estate")])
+
+
+class TestTableCache:
+    """Tests for the compiled buy tables saved between runs."""
+
+    def test_saved_tables_are_not_compiled_again(self, tmp_path, monkeypatch):
+        """Test a policy with the same rules gets its tables from the file."""
+        path = tmp_path / "tables.json"
+        policy = estate_policy()
+        expected = policy.decide([8] * NB_CARD_TYPES, money=8, coppers=0, buys=1, empty_piles=0, turn=1)
+        assert save_tables(path, [policy]) == 1
+
+        loaded = estate_policy()
+        monkeypatch.setattr(loaded, "compile", lambda available: pytest.fail("table compiled again"))
+        assert load_tables(path, [loaded]) == 1
+        assert loaded.decide([8] * NB_CARD_TYPES, money=8, coppers=0, buys=1, empty_piles=0, turn=1) == expected
+
+    def test_changed_rules_are_compiled_again(self, tmp_path):
+        """Test tables of a policy whose rules changed are ignored."""
+        path = tmp_path / "tables.json"
+        policy = estate_policy()
+        policy.table_for([8] * NB_CARD_TYPES)
+        save_tables(path, [policy])
+        changed = BuyPolicy("test", [BuyRule("province", min_money=8), BuyRule("silver")])
+        assert load_tables(path, [changed]) == 0
+        assert changed.nb_tables == 0
+
+    def test_malformed_cache_is_rejected(self, tmp_path):
+        """Test a truncated or foreign file raises ValueError and adds nothing."""
+        path = tmp_path / "tables.json"
+        policy = estate_policy()
+        policy.table_for([8] * NB_CARD_TYPES)
+        save_tables(path, [policy])
+        content = json.loads(path.read_text())
+        content["test"]["tables"][0][1] = content["test"]["tables"][0][1][:10]
+        path.write_text(json.dumps(content))
+        fresh = estate_policy()
+        with pytest.raises(ValueError):
+            load_tables(path, [fresh])
+        path.write_text("[1, 2]")
+        with pytest.raises(ValueError):
+            load_tables(path, [fresh])
+        assert fresh.nb_tables == 0
+
+    def test_cache_is_opt_in(self, tmp_path, monkeypatch):
+        """Test tables are only cached in the directory given by RHUM_CACHE_DIR."""
+        monkeypatch.delenv("RHUM_CACHE_DIR")
+        assert startup_from_env(0.0, []).cache_path is None
+        monkeypatch.setenv("RHUM_CACHE_DIR", str(tmp_path))
+        assert startup_from_env(0.0, []).cache_path == tmp_path / TABLE_CACHE_FILE
+
+
+class TestStartup:
+    """Tests for the warm-up run before the first request and the readiness endpoint."""
+
+    def test_not_ready_before_the_warm_up(self, tmp_path):
+        """Test the startup is only ready once the synthetic game is over, and saves its tables."""
+        policy = estate_policy()
+        startup = Startup(0.1, [policy], cache_path=tmp_path / "tables.json", warm_up=False)
+        assert not startup.summary()["ready"]
+        policy.table_for([8] * NB_CARD_TYPES)
+        asyncio.run(startup.start(BOOT.app))
+        assert startup.ready
+        assert (tmp_path / "tables.json").exists()
+
+        reloaded = Startup(0.1, [estate_policy()], cache_path=tmp_path / "tables.json", warm_up=False)
+        reloaded.load_tables()
+        assert reloaded.tables_loaded == 1
+
+    def test_server_warms_up_on_startup(self, monkeypatch, tmp_path):
+        """Test the server plays the synthetic game, then reports ready with clean metrics."""
+        startup = Startup(0.1, [BOOT.active_policy], cache_path=tmp_path / "tables.json")
+        monkeypatch.setattr(BOOT, "startup", startup)
+        with TestClient(BOOT.app) as client:
+            response = client.get("/ready")
+            assert response.status_code == 200
+            summary = response.json()
+            assert summary["warm_up_failures"] == 0
+            assert summary["warm_up_ms"] > 0
+            assert "/play" not in metrics.snapshot()["routes"]
+            assert client.get("/metrics").json()["startup"]["ready"]
+        assert WARM_UP_GAME_ID not in BOOT.game_states
@@ -0,0 +1,243 @@
+"""
+Round-robin tournament runner for Rhum & Ruin bot.
+Plays simulated matches between strategy variants on every core, streams
+each game result to a JSON lines file as soon as it is known, and ranks the
+variants with the same ELO system as the arbiter.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from simulator import STRATEGIES, Simulation
+
+INITIAL_RATING = 1000.0
+K_FACTOR = 32.0
+GAMES_PER_TASK = 50
+
+
+class GameRecord:
+    """Compact result of one tournament game, as stored in the results file."""
+
+    __slots__ = ("game_number", "seed", "players", "scores", "turns")
+
+    def __init__(self, game_number: int, seed: int, players: list[str], scores: list[int], turns: int):
+        self.game_number = game_number
+        self.seed = seed
+        self.players = players
+        self.scores = scores
+        self.turns = turns
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "game": self.game_number,
+            "seed": self.seed,
+            "players": self.players,
+            "scores": self.scores,
+            "turns": self.turns,
+        })
+
+    @classmethod
+    def from_json(cls, line: str) -> "GameRecord":
+        data = json.loads(line)
+        return cls(data["game"], data["seed"], data["players"], data["scores"], data["turns"])
+
+
+#####################################################
+# Scheduling
+#####################################################
+
+
+def schedule(variants: list[str], games_per_match: int, players_per_game: int = 2) -> Iterator[tuple[int, tuple[str, ...]]]:
+    """Yield (game number, seating) for a round-robin between the variants.
+
+    Each round plays one game of every pairing, so that the pairings are
+    interleaved over the tournament. Seats rotate from one round to the next
+    so that no variant keeps the advantage of playing first.
+    """
+    matches = list(itertools.combinations(variants, players_per_game))
+    game_number = 0
+    for game_in_match in range(games_per_match):
+        shift = game_in_match % players_per_game
+        for match in matches:
+            yield game_number, match[shift:] + match[:shift]
+            game_number += 1
+
+
+def game_seed(base_seed: int, game_number: int) -> int:
+    """Deterministic seed of a game, independent of the worker that plays it."""
+    return base_seed * 1_000_003 + game_number
+
+
+def _play_games(base_seed: int, games: list[tuple[int, tuple[str, ...]]]) -> list[GameRecord]:
+    """Worker entry point: play a chunk of scheduled games."""
+    records = []
+    for game_number, seating in games:
+        seed = game_seed(base_seed, game_number)
+        players = [STRATEGIES[variant]() for variant in seating]
+        result = Simulation(players, seed=seed).run()
+        records.append(GameRecord(game_number, seed, list(seating), result.scores, result.turns))
+    return records
+
+
+def _chunks(games: Iterable[tuple[int, tuple[str, ...]]], size: int) -> Iterator[list[tuple[int, tuple[str, ...]]]]:
+    chunk = []
+    for game in games:
+        chunk.append(game)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_tournament(
+    variants: list[str],
+    games_per_match: int,
+    output: Path,
+    *,
+    players_per_game: int = 2,
+    seed: int = 0,
+    max_workers: int | None = None,
+) -> list[GameRecord]:
+    """Play the whole round-robin on a process pool, writing results to output as they come."""
+    for variant in variants:
+        if variant not in STRATEGIES:
+            raise ValueError(f"Unknown strategy variant {variant!r}")
+    records = []
+    games = schedule(variants, games_per_match, players_per_game)
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor, output.open("w") as results_file:
+        futures = [
+            executor.submit(_play_games, seed, chunk)
+            for chunk in _chunks(games, GAMES_PER_TASK)
+        ]
+        for future in as_completed(futures):
+            chunk_records = future.result()
+            results_file.write("".join(record.to_json() + "\n" for record in chunk_records))
+            results_file.flush()
+            records.extend(chunk_records)
+    records.sort(key=lambda record: record.game_number)
+    return records
+
+
+def load_results(path: Path) -> list[GameRecord]:
+    """Read back a results file, in game order."""
+    with path.open() as results_file:
+        records = [GameRecord.from_json(line) for line in results_file if line.strip()]
+    records.sort(key=lambda record: record.game_number)
+    return records
+
+
+#####################################################
+# Ranking
+#####################################################
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    """Probability of winning against an opponent, according to ELO."""
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+
+def compute_elo(records: Iterable[GameRecord], k_factor: float = K_FACTOR, *, averaged: bool = False) -> dict[str, float]:
+    """ELO ratings of the variants, updating after each game like the arbiter.
+
+    A game with more than two players counts as one duel between each pair of
+    players, a better final score being a win and an equal score a draw.
+    With averaged, the rating of each player is averaged over its own games
+    in the second half instead of taken after the last one, which removes
+    most of the noise the last few updates add when comparing variants.
+    Players without a game in the second half are left out.
+    """
+    records = list(records)
+    burn_in = len(records) // 2
+    ratings: dict[str, float] = {}
+    totals: dict[str, float] = {}
+    nb_averaged_games: dict[str, int] = {}
+    for game_position, record in enumerate(records):
+        for player in record.players:
+            ratings.setdefault(player, INITIAL_RATING)
+        deltas = dict.fromkeys(record.players, 0.0)
+        for first, second in itertools.combinations(range(len(record.players)), 2):
+            first_name = record.players[first]
+            second_name = record.players[second]
+            if first_name == second_name:
+                continue
+            if record.scores[first] > record.scores[second]:
+                result = 1.0
+            elif record.scores[first] < record.scores[second]:
+                result = 0.0
+            else:
+                result = 0.5
+            change = k_factor * (result - expected_score(ratings[first_name], ratings[second_name]))
+            deltas[first_name] += change
+            deltas[second_name] -= change
+        for player, delta in deltas.items():
+            ratings[player] += delta
+        if game_position >= burn_in:
+            for player in deltas:
+                totals[player] = totals.get(player, 0.0) + ratings[player]
+                nb_averaged_games[player] = nb_averaged_games.get(player, 0) + 1
+    if not averaged:
+        return ratings
+    return {player: total / nb_averaged_games[player] for player, total in totals.items()}
+
+
+def win_rates(records: Iterable[GameRecord]) -> dict[str, float]:
+    """Share of games each variant won, ties included."""
+    games: dict[str, int] = {}
+    wins: dict[str, int] = {}
+    for record in records:
+        best = max(record.scores)
+        for player, score in zip(record.players, record.scores):
+            games[player] = games.get(player, 0) + 1
+            wins[player] = wins.get(player, 0) + (score == best)
+    return {player: wins[player] / games[player] for player in games}
+
+
+#####################################################
+# Command line
+#####################################################
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Round-robin tournament between strategy variants")
+    parser.add_argument("variants", nargs="*", help=f"strategies among {sorted(STRATEGIES)}")
+    parser.add_argument("--games", type=int, default=1000, help="games per match")
+    parser.add_argument("--players-per-game", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", type=Path, default=Path("tournament_results.jsonl"))
+    parser.add_argument("--rank-only", action="store_true", help="only rank an existing results file")
+    args = parser.parse_args()
+
+    if args.rank_only:
+        records = load_results(args.output)
+    else:
+        variants = args.variants or sorted(STRATEGIES)
+        start = time.perf_counter()
+        records = run_tournament(
+            variants,
+            args.games,
+            args.output,
+            players_per_game=args.players_per_game,
+            seed=args.seed,
+            max_workers=args.workers,
+        )
+        elapsed = time.perf_counter() - start
+        print(f"🏆 {len(records)} games in {elapsed:.1f}s ({len(records) / elapsed:.0f} games/s)")
+
+    ratings = compute_elo(records)
+    averaged_ratings = compute_elo(records, averaged=True)
+    rates = win_rates(records)
+    for variant in sorted(ratings, key=lambda variant: averaged_ratings.get(variant, ratings[variant]), reverse=True):
+        averaged = f"{averaged_ratings[variant]:.0f}" if variant in averaged_ratings else "-"
+        print(f"   - {variant}: ELO {averaged} averaged, {ratings[variant]:.0f} final, {rates[variant]:.1%} wins")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+Traffic recording and replay for Rhum & Ruin bot.
+An opt-in middleware records every request of the arbiter (method, route,
+X-Game-Id, body) with our answer and its latency into an append-only,
+gzip-compressed log. The request side only queues the captured bytes, a
+background thread encodes and compresses them in batches.
+
+The replay tool streams a log back through the app in-process, as fast as
+possible or with the original timing, checks that every decision is the
+one recorded and reports latency per route next to the recorded one, so
+that real tournament traffic serves as a regression benchmark:
+
+    python traffic.py traffic/traffic-*.log.gz [--timing original] [--speed 2]
+
+Recording is enabled by setting RHUM_TRAFFIC_DIR, one log per process.
+"""
+
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from metrics import Histogram
+from warmup import WARM_UP_GAME_ID, asgi_request
+
+TRAFFIC_DIR_ENV = "RHUM_TRAFFIC_DIR"
+FLUSH_INTERVAL_SECONDS = 0.5
+COMPRESSION_LEVEL = 6
+# zlib window bits for a gzip stream, each process appending its own gzip member
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+READ_CHUNK_SIZE = 1 << 16
+
+# Record header: arrival time, handling seconds, status, then the lengths of
+# the method, route, game id, request body and response body that follow
+RECORD = struct.Struct("<dfHBBHII")
+
+# Replay pacing: back to back, or at the recorded arrival times
+FAST, ORIGINAL = "fast", "original"
+# Number of differing decisions kept as examples in the report
+MAX_MISMATCH_SAMPLES = 10
+
+
+class TrafficRecord:
+    """One request of the arbiter and our answer."""
+
+    __slots__ = ("arrival", "seconds", "status", "method", "path", "game_id", "request", "response")
+
+    def __init__(
+        self,
+        arrival: float,
+        seconds: float,
+        status: int,
+        method: str,
+        path: str,
+        game_id: str,
+        request: bytes,
+        response: bytes,
+    ):
+        self.arrival = arrival
+        self.seconds = seconds
+        self.status = status
+        self.method = method
+        self.path = path
+        self.game_id = game_id
+        self.request = request
+        self.response = response
+
+    def encode(self) -> bytes:
+        method = self.method.encode()
+        path = self.path.encode()
+        game_id = self.game_id.encode()
+        header = RECORD.pack(
+            self.arrival, self.seconds, self.status,
+            len(method), len(path), len(game_id), len(self.request), len(self.response),
+        )
+        return b"".join((header, method, path, game_id, self.request, self.response))
+
+
+def decode_records(data: bytes | bytearray) -> tuple[list[TrafficRecord], int]:
+    """Complete records at the start of the data, and the number of bytes they take."""
+    records = []
+    position = 0
+    while position + RECORD.size <= len(data):
+        arrival, seconds, status, *lengths = RECORD.unpack_from(data, position)
+        end = position + RECORD.size + sum(lengths)
+        if end > len(data):
+            break
+        fields = []
+        start = position + RECORD.size
+        for length in lengths:
+            fields.append(bytes(data[start:start + length]))
+            start += length
+        method, path, game_id, request, response = fields
+        records.append(
+            TrafficRecord(arrival, seconds, status, method.decode(), path.decode(), game_id.decode(), request, response)
+        )
+        position = end
+    return records, position
+
+
+def read_records(path: Path) -> Iterator[TrafficRecord]:
+    """Records of a log in order, up to the last complete one when it is still being written."""
+    data = bytearray()
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    with Path(path).open("rb") as log_file:
+        while chunk := log_file.read(READ_CHUNK_SIZE):
+            while chunk:
+                data += decompressor.decompress(chunk)
+                if not decompressor.eof:
+                    break
+                # A gzip member ends where the log of a previous process did, the next one follows
+                chunk = decompressor.unused_data
+                decompressor = zlib.decompressobj(GZIP_WBITS)
+            records, consumed = decode_records(data)
+            del data[:consumed]
+            yield from records
+
+
+#####################################################
+# Recording
+#####################################################
+
+
+class TrafficRecorder:
+    """Compressed log writer fed by the middleware, written by a background thread."""
+
+    def __init__(self, path: Path, flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.nb_records = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._file = None
+
+    def record(self, record: TrafficRecord) -> None:
+        self._queue.put(record)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._file = self.path.open("ab")
+        self._thread = threading.Thread(target=self._run, name="traffic-recorder", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def close(self) -> None:
+        """Write the queued records and end the gzip stream."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._file.write(self._compressor.flush())
+        self._file.close()
+        self._file = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._stop.wait(self.flush_interval)
+            self.flush()
+        self.flush()
+
+    def flush(self) -> None:
+        """Compress every queued record at once, readable as soon as it is written."""
+        if self._file is None:
+            return
+        records = []
+        while True:
+            try:
+                records.append(self._queue.get_nowait().encode())
+            except queue.Empty:
+                break
+        if not records:
+            return
+        self._file.write(self._compressor.compress(b"".join(records)) + self._compressor.flush(zlib.Z_SYNC_FLUSH))
+        self._file.flush()
+        self.nb_records += len(records)
+
+
+class TrafficMiddleware:
+    """ASGI middleware handing every request and its answer to a recorder."""
+
+    def __init__(self, app, recorder: TrafficRecorder, excluded_paths: tuple[str, ...] = ("/metrics", "/ready")):
+        self.app = app
+        self.recorder = recorder
+        self.excluded_paths = excluded_paths
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+        request = []
+        response = []
+        status = 0
+
+        async def recording_receive() -> dict:
+            message = await receive()
+            if message["type"] == "http.request":
+                request.append(message.get("body", b""))
+            return message
+
+        async def recording_send(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response.append(message.get("body", b""))
+            await send(message)
+
+        arrival = time.time()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            seconds = time.perf_counter() - start
+            game_id = next((value.decode() for name, value in scope["headers"] if name == b"x-game-id"), "")
+            if game_id != WARM_UP_GAME_ID:
+                self.recorder.record(TrafficRecord(
+                    arrival, seconds, status, scope["method"], scope["path"], game_id,
+                    b"".join(request), b"".join(response),
+                ))
+
+
+def traffic_recorder_from_env() -> TrafficRecorder | None:
+    """Started recorder writing a new log in RHUM_TRAFFIC_DIR, None when unset."""
+    directory = os.environ.get(TRAFFIC_DIR_ENV)
+    if not directory:
+        return None
+    recorder = TrafficRecorder(Path(directory) / f"traffic-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.log.gz")
+    recorder.start()
+    return recorder
+
+
+#####################################################
+# Replay
+#####################################################
+
+
+def _decision(status: int, body: bytes) -> object:
+    """What the arbiter reads in an answer: the decision, or the status of a failed request."""
+    if status != 200:
+        return f"status {status}"
+    try:
+        return json.loads(body)["decision"]
+    except (ValueError, KeyError, TypeError):
+        return body
+
+
+class ReplayReport:
+    """Decisions compared with the recorded ones, and latencies per route."""
+
+    def __init__(self):
+        self.latencies: dict[str, Histogram] = {}
+        self.recorded_latencies: dict[str, Histogram] = {}
+        self.nb_mismatches = 0
+        self.mismatch_samples: list[str] = []
+        self.elapsed = 0.0
+
+    def observe(self, record: TrafficRecord, status: int, body: bytes, seconds: float) -> None:
+        self.latencies.setdefault(record.path, Histogram()).observe(seconds)
+        self.recorded_latencies.setdefault(record.path, Histogram()).observe(record.seconds)
+        expected = _decision(record.status, record.response)
+        replayed = _decision(status, body)
+        if replayed != expected:
+            self.nb_mismatches += 1
+            if len(self.mismatch_samples) < MAX_MISMATCH_SAMPLES:
+                self.mismatch_samples.append(
+                    f"{record.game_id} {record.path}: recorded {expected!r}, replayed {replayed!r}"
+                )
+
+    @property
+    def nb_requests(self) -> int:
+        return sum(histogram.count for histogram in self.latencies.values())
+
+    @property
+    def ok(self) -> bool:
+        """True when every decision was the recorded one."""
+        return not self.nb_mismatches
+
+    def summary(self) -> str:
+        elapsed = self.elapsed or 1e-9
+        lines = [
+            f"📼 {self.nb_requests} requests replayed in {self.elapsed:.2f}s ({self.nb_requests / elapsed:.0f} req/s), "
+            f"{self.nb_mismatches} decisions differ",
+        ]
+        for path, histogram in sorted(self.latencies.items()):
+            stats = histogram.summary()
+            recorded = self.recorded_latencies[path].summary()
+            lines.append(
+                f"   - {path}: {stats['count']} calls, p50 {stats['p50_ms']:.2f}ms "
+                f"(recorded {recorded['p50_ms']:.2f}ms), p99 {stats['p99_ms']:.2f}ms "
+                f"(recorded {recorded['p99_ms']:.2f}ms), max {stats['max_ms']:.2f}ms"
+            )
+        for sample in self.mismatch_samples:
+            lines.append(f"❌ {sample}")
+        return "\n".join(lines)
+
+
+async def _replay_one(app, record: TrafficRecord, report: ReplayReport, previous: asyncio.Task | None) -> None:
+    # Like the arbiter, the next request of a game waits for the answer to the previous one
+    if previous is not None:
+        await previous
+    start = time.perf_counter()
+    status, body = await asgi_request(app, record.method, record.path, record.request, record.game_id)
+    report.observe(record, status, body, time.perf_counter() - start)
+
+
+async def replay(app, records: Iterable[TrafficRecord], timing: str = FAST, speed: float = 1.0) -> ReplayReport:
+    """Send the recorded requests to an ASGI app, one at a time or at their recorded times."""
+    report = ReplayReport()
+    start = time.perf_counter()
+    if timing == FAST:
+        for record in records:
+            await _replay_one(app, record, report, None)
+    else:
+        first_arrival = None
+        last_tasks: dict[str, asyncio.Task] = {}
+        for record in records:
+            if first_arrival is None:
+                first_arrival = record.arrival
+            delay = (record.arrival - first_arrival) / speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            last_tasks[record.game_id] = asyncio.create_task(
+                _replay_one(app, record, report, last_tasks.get(record.game_id))
+            )
+        await asyncio.gather(*last_tasks.values())
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded arbiter traffic through the bot in-process")
+    parser.add_argument("logs", nargs="+", type=Path, help="traffic logs, replayed one after the other")
+    parser.add_argument("--timing", choices=[FAST, ORIGINAL], default=FAST)
+    parser.add_argument("--speed", type=float, default=1.0, help="time factor of --timing original")
+    args = parser.parse_args()
+
+    # The replayed requests must not be recorded again
+    os.environ.pop(TRAFFIC_DIR_ENV, None)
+    from BOOT import app, startup
+
+    async def run() -> ReplayReport:
+        await startup.start(app)
+        records = (record for path in args.logs for record in read_records(path))
+        return await replay(app, records, args.timing, args.speed)
+
+    report = asyncio.run(run())
+    print(report.summary())
+    raise SystemExit(0 if report.ok else 1)
+
+
+if __name__ == "__main__":
+    main()
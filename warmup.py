@@ -0,0 +1,192 @@
+"""
+Startup warm-up for Rhum & Ruin bot.
+Without it the first requests of a session pay for every first call: route
+and validator code paths never run, compiled buy tables, card priorities,
+strategy threads, caches of the serving path. Before the server accepts
+requests, the startup phase loads the buy tables saved by the previous run,
+then plays a short synthetic game through the application itself (every
+route, a first turn and an endgame /play) under a throwaway game id.
+
+Import, table loading and warm-up times are measured and reported by
+/ready, which answers 503 until the warm-up is over, and by /metrics.
+
+Configuration through the environment:
+- RHUM_CACHE_DIR: directory of the table cache (e.g. ~/.cache/rhum_and_ruin),
+  unset or "off" to compile every table at runtime
+- RHUM_WARM_UP: "off" to skip the synthetic game
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+from bot_logging import logger
+from buy_policy import BuyPolicy, load_tables, save_tables
+from cards import PROVINCE
+from metrics import metrics
+
+CACHE_DIR_ENV = "RHUM_CACHE_DIR"
+WARM_UP_ENV = "RHUM_WARM_UP"
+TABLE_CACHE_FILE = "buy_tables.json"
+
+WARM_UP_GAME_ID = "rhum-warm-up"
+# Purchases tried on the warm-up turns, a /play is asked for each one
+WARM_UP_PLAYS = 2
+# Provinces left in the stock of the endgame /play
+WARM_UP_ENDGAME_PROVINCES = 2
+
+
+def warm_up_requests() -> list[tuple[str, str, bytes]]:
+    """Method, path and body of every request of the synthetic game."""
+    from simulator import BigMoneyPlayer, RhumAndRuinPlayer, Simulation
+
+    # Our player first, under our name, so that /play finds its hand
+    simulation = Simulation([RhumAndRuinPlayer(), BigMoneyPlayer()], seed=0)
+    first_turn = simulation.game_view(0).model_dump_json().encode()
+    simulation.supply[PROVINCE] = WARM_UP_ENDGAME_PROVINCES
+    endgame = simulation.game_view(0).model_dump_json().encode()
+
+    hand = b'"hand": ["copper", "silver", "estate"]'
+    requests = [("GET", "/name", b""), ("GET", "/start_game", b""), ("GET", "/start_turn", b"")]
+    requests += [("POST", "/play", first_turn)] * WARM_UP_PLAYS
+    requests += [
+        ("POST", "/confirm_discard_card_from_hand", b'{"card_name": "estate", ' + hand + b"}"),
+        ("POST", "/discard_card_from_hand", b"{" + hand + b"}"),
+        ("POST", "/confirm_trash_card_from_hand", b'{"card_name": "copper", ' + hand + b"}"),
+        ("POST", "/trash_card_from_hand", b"{" + hand + b"}"),
+        ("POST", "/confirm_discard_deck", b""),
+        ("POST", "/choose_card_to_receive_in_discard", b'{"possible_cards": ["copper", "silver"]}'),
+        ("POST", "/choose_card_to_receive_in_deck", b'{"possible_cards": ["copper", "silver"]}'),
+        ("POST", "/skip_card_reception_in_hand", b'{"card_name": "estate", ' + hand + b"}"),
+        ("POST", "/trash_money_card_for_better_money_card", b'{"money_in_hand": ["copper", "silver"]}'),
+        ("GET", "/start_turn", b""),
+    ]
+    requests += [("POST", "/play", endgame)] * WARM_UP_PLAYS
+    requests.append(("GET", "/end_game", b""))
+    return requests
+
+
+async def asgi_request(app, method: str, path: str, body: bytes, game_id: str) -> tuple[int, bytes]:
+    """Send one request to an ASGI application in-process, returns the response status and body."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"x-game-id", game_id.encode()), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 0),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = 0
+    response = []
+
+    async def receive() -> dict:
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            response.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(response)
+
+
+class Startup:
+    """Startup phase of the bot: table cache, warm-up, and their measured times."""
+
+    def __init__(
+        self,
+        import_seconds: float,
+        policies: list[BuyPolicy],
+        cache_path: Path | None = None,
+        warm_up: bool = True,
+    ):
+        self.import_seconds = import_seconds
+        self.policies = policies
+        self.cache_path = cache_path
+        self.warm_up = warm_up
+        self.ready = False
+        self.tables_seconds = 0.0
+        self.warm_up_seconds = 0.0
+        self.tables_loaded = 0
+        self.warm_up_failures = 0
+        self._tables_saved = 0
+        self._started = threading.Lock()
+
+    async def start(self, app) -> None:
+        """Load the saved tables, play the synthetic game, then declare the bot ready.
+
+        Only the first call does it: clients of the app in-process each run its lifespan.
+        """
+        if not self._started.acquire(blocking=False):
+            return
+        start = time.perf_counter()
+        self.load_tables()
+        self.tables_seconds = time.perf_counter() - start
+        if self.warm_up:
+            start = time.perf_counter()
+            for method, path, body in warm_up_requests():
+                status, _ = await asgi_request(app, method, path, body, WARM_UP_GAME_ID)
+                if status != 200:
+                    self.warm_up_failures += 1
+                    logger.warning("⚠️ Warm-up request %s %s answered %d", method, path, status)
+            self.warm_up_seconds = time.perf_counter() - start
+            # The synthetic game must not show in the metrics of the real ones
+            metrics.reset()
+        self.save_tables()
+        self.ready = True
+        logger.info(
+            "🔥 READY - imports %.0f ms, %d tables loaded in %.1f ms, warm-up %.0f ms",
+            1000 * self.import_seconds,
+            self.tables_loaded,
+            1000 * self.tables_seconds,
+            1000 * self.warm_up_seconds,
+        )
+
+    def load_tables(self) -> None:
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        try:
+            self.tables_loaded = self._tables_saved = load_tables(self.cache_path, self.policies)
+        except (OSError, ValueError) as error:
+            logger.warning("⚠️ Table cache %s ignored: %s", self.cache_path, error)
+
+    def save_tables(self) -> None:
+        """Save the tables compiled since the last save, kept for the next start."""
+        nb_tables = sum(policy.nb_tables for policy in self.policies)
+        if self.cache_path is None or nb_tables == self._tables_saved:
+            return
+        try:
+            self._tables_saved = save_tables(self.cache_path, self.policies)
+        except OSError as error:
+            logger.warning("⚠️ Table cache %s not saved: %s", self.cache_path, error)
+
+    def summary(self) -> dict:
+        return {
+            "ready": self.ready,
+            "import_ms": 1000 * self.import_seconds,
+            "tables_ms": 1000 * self.tables_seconds,
+            "warm_up_ms": 1000 * self.warm_up_seconds,
+            "tables_loaded": self.tables_loaded,
+            "warm_up_failures": self.warm_up_failures,
+        }
+
+
+def startup_from_env(import_seconds: float, policies: list[BuyPolicy]) -> Startup:
+    cache_dir = os.environ.get(CACHE_DIR_ENV, "off")
+    return Startup(
+        import_seconds,
+        policies,
+        cache_path=None if cache_dir == "off" else Path(cache_dir) / TABLE_CACHE_FILE,
+        warm_up=os.environ.get(WARM_UP_ENV, "on") != "off",
+    )